@@ -59,10 +59,12 @@ except Exception:
 groq_api_key = os.getenv("GROQ_API_KEY", "").strip()
 groq_client = Groq(api_key=groq_api_key) if (Groq and groq_api_key) else None
 
+GEMINI_MODEL = "gemini-2.0-flash"
+
 gemini_api_key = os.getenv("GEMINI_API_KEY", "").strip()
 if genai and gemini_api_key:
     genai.configure(api_key=gemini_api_key)
-    gemini_model = genai.GenerativeModel("gemini-2.0-flash")
+    gemini_model = genai.GenerativeModel(GEMINI_MODEL)
 else:
     gemini_model = None
 
@@ -77,21 +79,30 @@ qdrant_client = QdrantClient(
     timeout=60,
 )
 
-COLLECTION = "legal_cases"
+# Alias (or, before the first registry build, the collection) that chunk
+# queries address; see app/core/index_registry.py.
+COLLECTION = os.getenv("QDRANT_COLLECTION", "legal_cases")
 
 # Embedding model
 from sentence_transformers import SentenceTransformer
 
+EMBED_MODEL = os.getenv("EMBED_MODEL", "sentence-transformers/all-MiniLM-L6-v2")
+
 try:
     # Prefer local cache to avoid startup warnings on locked cache refs files.
-    embedder = SentenceTransformer("sentence-transformers/all-MiniLM-L6-v2", local_files_only=True)
+    embedder = SentenceTransformer(EMBED_MODEL, local_files_only=True)
 except Exception:
-    logger.warning("Embedding cache missing locally; downloading sentence-transformers/all-MiniLM-L6-v2")
-    embedder = SentenceTransformer("sentence-transformers/all-MiniLM-L6-v2")
+    logger.warning("Embedding cache missing locally; downloading %s", EMBED_MODEL)
+    embedder = SentenceTransformer(EMBED_MODEL)
+
+EMBED_DIM = embedder.get_sentence_embedding_dimension()
+# Reduced-dimension first-pass vector for new index builds (0 = off). Only
+# for Matryoshka-trained models such as Qwen3-Embedding; see index_registry.
+EMBED_MRL_DIM = int(os.getenv("EMBED_MRL_DIM", "0"))
 
 # Tuning constants
-CHUNK_SIZE = 500
-CHUNK_OVERLAP = 50
+CHUNK_SIZE = int(os.getenv("CHUNK_SIZE", "500"))
+CHUNK_OVERLAP = int(os.getenv("CHUNK_OVERLAP", "50"))
 PDF_SMART_THRESHOLD = 4000   # chars - above this, extract key points first
 
 # Production constants
@@ -0,0 +1,154 @@
+"""
+Execution policy for async routes.
+
+Blocking work must not run on the event loop:
+  • run_in_thread  — blocking I/O and libraries that release the GIL
+                     (file writes, SQLite, PyMuPDF, LLM SDK calls)
+  • run_in_process — pure-Python CPU work (difflib, regex scoring);
+                     the function and its arguments must be picklable
+
+The loop-lag monitor sleeps for a fixed interval and measures how late it
+wakes up. Lag above LOOP_LAG_WARN_MS means something blocked the loop; the
+warning lists the requests that were running during the stalled window.
+"""
+
+import asyncio
+import functools
+import itertools
+import logging
+import multiprocessing as mp
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable
+
+logger = logging.getLogger("casecut")
+
+EXEC_THREAD_WORKERS = max(1, int(os.getenv("EXEC_THREAD_WORKERS", "16")))
+EXEC_PROCESS_WORKERS = max(1, int(os.getenv("EXEC_PROCESS_WORKERS", "2")))
+LOOP_LAG_INTERVAL_MS = float(os.getenv("LOOP_LAG_INTERVAL_MS", "250"))
+LOOP_LAG_WARN_MS = float(os.getenv("LOOP_LAG_WARN_MS", "100"))
+
+_thread_pool: ThreadPoolExecutor | None = None
+_process_pool: ProcessPoolExecutor | None = None
+_pool_lock = threading.Lock()
+
+_inflight: dict[int, tuple[str, float]] = {}
+_recent: "deque[tuple[str, float, float]]" = deque(maxlen=64)  # finished (label, start, end)
+_request_ids = itertools.count()
+_lag_stats = {"samples": 0, "warnings": 0, "max_lag_ms": 0.0}
+_monitor_task: asyncio.Task | None = None
+
+
+def _get_thread_pool() -> ThreadPoolExecutor:
+    global _thread_pool
+    with _pool_lock:
+        if _thread_pool is None:
+            _thread_pool = ThreadPoolExecutor(max_workers=EXEC_THREAD_WORKERS, thread_name_prefix="blocking")
+        return _thread_pool
+
+
+def _get_process_pool() -> ProcessPoolExecutor:
+    global _process_pool
+    with _pool_lock:
+        if _process_pool is None:
+            _process_pool = ProcessPoolExecutor(
+                max_workers=EXEC_PROCESS_WORKERS,
+                mp_context=mp.get_context("spawn"),
+            )
+        return _process_pool
+
+
+async def run_in_thread(func: Callable[..., Any], *args, **kwargs) -> Any:
+    """Run a blocking callable on the shared thread pool."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_get_thread_pool(), functools.partial(func, *args, **kwargs))
+
+
+async def run_in_process(func: Callable[..., Any], *args, **kwargs) -> Any:
+    """
+    Run a CPU-bound callable on the process pool.
+
+    If the pool breaks (a worker died), it is recreated and the call is
+    retried once on a thread so the request still completes.
+    """
+    global _process_pool
+    loop = asyncio.get_running_loop()
+    try:
+        return await loop.run_in_executor(_get_process_pool(), functools.partial(func, *args, **kwargs))
+    except BrokenProcessPool:
+        logger.warning("Execution  │ process pool broken │ retrying %s on a thread", getattr(func, "__name__", func))
+        with _pool_lock:
+            _process_pool = None
+        return await run_in_thread(func, *args, **kwargs)
+
+
+def track_request_start(label: str) -> int:
+    """Register an in-flight request for lag attribution; returns its token."""
+    token = next(_request_ids)
+    _inflight[token] = (label, time.perf_counter())
+    return token
+
+
+def track_request_end(token: int) -> None:
+    item = _inflight.pop(token, None)
+    if item is not None:
+        _recent.append((item[0], item[1], time.perf_counter()))
+
+
+async def _monitor_loop_lag() -> None:
+    interval = LOOP_LAG_INTERVAL_MS / 1000.0
+    while True:
+        start = time.perf_counter()
+        await asyncio.sleep(interval)
+        lag_ms = (time.perf_counter() - start - interval) * 1000.0
+        _lag_stats["samples"] += 1
+        _lag_stats["max_lag_ms"] = max(_lag_stats["max_lag_ms"], round(lag_ms, 1))
+        if lag_ms > LOOP_LAG_WARN_MS:
+            _lag_stats["warnings"] += 1
+            # The monitor only wakes once the loop is free, so the blocking
+            # handler may already have finished: report requests that were
+            # running at any point during the stalled window.
+            now = time.perf_counter()
+            suspects = [
+                f"{label} ({(now - started) * 1000:.0f}ms, running)"
+                for label, started in list(_inflight.values())
+            ] + [
+                f"{label} ({(ended - started) * 1000:.0f}ms)"
+                for label, started, ended in list(_recent)
+                if ended >= start
+            ]
+            logger.warning("Loop lag   │ %.0fms blocked │ requests: %s", lag_ms, ", ".join(suspects) or "-")
+
+
+def start_loop_monitor() -> None:
+    global _monitor_task
+    if _monitor_task is None or _monitor_task.done():
+        _monitor_task = asyncio.get_running_loop().create_task(_monitor_loop_lag())
+        logger.info("Loop lag   │ monitor on │ interval=%.0fms │ warn>%.0fms", LOOP_LAG_INTERVAL_MS, LOOP_LAG_WARN_MS)
+
+
+async def shutdown() -> None:
+    """Stop the lag monitor and the executors (called from the app lifespan)."""
+    global _monitor_task, _thread_pool, _process_pool
+    if _monitor_task is not None:
+        _monitor_task.cancel()
+        try:
+            await _monitor_task
+        except asyncio.CancelledError:
+            pass
+        _monitor_task = None
+    with _pool_lock:
+        thread_pool, _thread_pool = _thread_pool, None
+        process_pool, _process_pool = _process_pool, None
+    if thread_pool is not None:
+        thread_pool.shutdown(wait=False, cancel_futures=True)
+    if process_pool is not None:
+        process_pool.shutdown(wait=False, cancel_futures=True)
+
+
+def stats() -> dict:
+    return {"in_flight": len(_inflight), **_lag_stats}
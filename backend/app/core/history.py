@@ -2,16 +2,52 @@
 User history persistence.
 
 Stores session history to disk at  user_history/{user_id}/*.jsonl
+
+Also holds server-side chat sessions (/query, /pdf-chat, /voice-chat with a
+session_id): compacted turns + rolling summary, the last retrieval (case ids
+and response cases, for follow-ups) and the active document handle. Sessions
+and uploaded document texts live in in-memory LRUs that expire after
+SESSION_TTL seconds of inactivity; setting SESSION_DB_PATH also writes them
+through to SQLite so they survive restarts and are shared by workers.
+Session ids are issued by the server only. Concurrent requests on one
+session are serialized per worker by the routers; across workers sharing
+SESSION_DB_PATH the last save wins.
+Document handles are random ids readable only by the owner they were stored
+for (the uploading user_id, or the session).
 """
 
 import os
 import re
 import json
+import logging
+import sqlite3
+import threading
+import time
+import uuid
 from datetime import datetime
 from typing import Optional
 
+from app.core.cache import TTLCache
+
+logger = logging.getLogger("casecut")
+
 HISTORY_DIR = os.path.join(os.path.dirname(__file__), "..", "..", "user_history")
 
+SESSION_CACHE_SIZE = int(os.getenv("SESSION_CACHE_SIZE", "1024"))
+SESSION_DOC_CACHE_SIZE = int(os.getenv("SESSION_DOC_CACHE_SIZE", "32"))
+SESSION_TTL = float(os.getenv("SESSION_TTL", "86400"))
+SESSION_DB_PATH = os.getenv("SESSION_DB_PATH", "").strip()  # "" = in-memory only
+
+_sessions = TTLCache(maxsize=SESSION_CACHE_SIZE, ttl=SESSION_TTL)
+_documents = TTLCache(maxsize=SESSION_DOC_CACHE_SIZE, ttl=SESSION_TTL)
+_conn: sqlite3.Connection | None = None
+_db_lock = threading.Lock()
+_session_stats = {"created": 0, "restored": 0, "writes": 0}
+
+
+class UnknownSessionError(LookupError):
+    """A session_id the server never issued, or one that has expired."""
+
 
 def _sanitize_user_id(uid: str) -> str:
     """Prevent path traversal by stripping non-alphanumeric chars."""
@@ -71,3 +107,146 @@ def get_all_users() -> list[str]:
         d for d in os.listdir(HISTORY_DIR)
         if os.path.isdir(os.path.join(HISTORY_DIR, d))
     ]
+
+
+# ── Server-side chat sessions ─────────────────────────────────────────
+
+def _db() -> sqlite3.Connection | None:
+    """Lazy SQLite connection (None when SESSION_DB_PATH is unset). Call under _db_lock."""
+    global _conn
+    if not SESSION_DB_PATH:
+        return None
+    if _conn is None:
+        os.makedirs(os.path.dirname(os.path.abspath(SESSION_DB_PATH)), exist_ok=True)
+        conn = sqlite3.connect(SESSION_DB_PATH, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS sessions (id TEXT PRIMARY KEY, data TEXT NOT NULL, updated_at REAL NOT NULL)"
+        )
+        columns = [row[1] for row in conn.execute("PRAGMA table_info(documents)")]
+        if columns and "owner" not in columns:
+            # Content-hash handles from before owner scoping: cache only, drop them.
+            conn.execute("DROP TABLE documents")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS documents "
+            "(id TEXT PRIMARY KEY, owner TEXT NOT NULL, text TEXT NOT NULL, updated_at REAL NOT NULL)"
+        )
+        cutoff = time.time() - SESSION_TTL
+        conn.execute("DELETE FROM sessions WHERE updated_at < ?", (cutoff,))
+        conn.execute("DELETE FROM documents WHERE updated_at < ?", (cutoff,))
+        conn.commit()
+        _conn = conn
+    return _conn
+
+
+def _db_get(table: str, key: str, columns: tuple[str, ...]) -> tuple | None:
+    try:
+        with _db_lock:
+            conn = _db()
+            if conn is None:
+                return None
+            row = conn.execute(
+                f"SELECT {', '.join(columns)}, updated_at FROM {table} WHERE id = ?", (key,)
+            ).fetchone()
+    except Exception as e:
+        logger.warning("Sessions   │ read failed │ %s", e)
+        return None
+    if row is None or time.time() - row[-1] > SESSION_TTL:
+        return None
+    return row[:-1]
+
+
+def _db_put(table: str, key: str, values: dict) -> None:
+    try:
+        with _db_lock:
+            conn = _db()
+            if conn is None:
+                return
+            conn.execute(
+                f"INSERT OR REPLACE INTO {table} (id, {', '.join(values)}, updated_at) "
+                f"VALUES (?, {', '.join('?' * len(values))}, ?)",
+                (key, *values.values(), time.time()),
+            )
+            conn.commit()
+    except Exception as e:
+        logger.warning("Sessions   │ write failed │ %s", e)
+
+
+def get_chat_session(session_id: str | None) -> dict:
+    """
+    Session state for session_id, or a fresh session with a new id when it
+    is empty. Raises UnknownSessionError for any other id.
+
+    {id, created_at, updated_at, summary, turns, retrieval, document_id}:
+    summary/turns are the compacted conversation (history_service.compact),
+    retrieval is the last /query result ({query, case_ids, cases, confidence,
+    statute_ids}) or None.
+    """
+    sid = session_id or uuid.uuid4().hex
+    session = _sessions.get(sid)
+    if session is None:
+        row = _db_get("sessions", sid, ("data",)) if session_id else None
+        if row is not None:
+            session = json.loads(row[0])
+            _session_stats["restored"] += 1
+        elif session_id:
+            raise UnknownSessionError(f"Unknown or expired session_id '{session_id[:64]}'")
+        else:
+            now = datetime.now().isoformat()
+            session = {
+                "id": sid,
+                "created_at": now,
+                "updated_at": now,
+                "summary": "",
+                "turns": [],
+                "retrieval": None,
+                "document_id": None,
+            }
+            _session_stats["created"] += 1
+        _sessions.set(sid, session)
+    # Callers mutate and save a copy, so concurrent readers never see half an update.
+    return json.loads(json.dumps(session))
+
+
+def save_chat_session(session: dict) -> None:
+    """Store session state (refreshes its inactivity TTL)."""
+    session["updated_at"] = datetime.now().isoformat()
+    _sessions.set(session["id"], session)
+    _db_put("sessions", session["id"], {"data": json.dumps(session, ensure_ascii=False)})
+    _session_stats["writes"] += 1
+
+
+def put_document(text: str, owner: str, doc_id: str | None = None) -> str:
+    """
+    Keep a document's text server-side for owner; returns its handle.
+
+    A new random handle is issued unless doc_id (a handle owner already
+    holds) is given, in which case that document is overwritten.
+    """
+    doc_id = doc_id or uuid.uuid4().hex
+    _documents.set(doc_id, (owner, text))
+    _db_put("documents", doc_id, {"owner": owner, "text": text})
+    return doc_id
+
+
+def get_document(doc_id: str | None, owner: str) -> str | None:
+    """Text for a document handle, or None if unknown, expired or not owner's."""
+    if not doc_id:
+        return None
+    entry = _documents.get(doc_id)
+    if entry is None:
+        row = _db_get("documents", doc_id, ("owner", "text"))
+        if row is None:
+            return None
+        entry = tuple(row)
+        _documents.set(doc_id, entry)
+    return entry[1] if entry[0] == owner else None
+
+
+def session_stats() -> dict:
+    return {
+        "sessions": _sessions.stats(),
+        "documents": _documents.stats(),
+        "persistent": bool(SESSION_DB_PATH),
+        **_session_stats,
+    }
@@ -0,0 +1,308 @@
+"""
+Vector index registry — versioned chunk collections behind a Qdrant alias.
+
+Each build of the chunk index goes into its own collection
+(<alias>__<model-slug>__<timestamp>) and is recorded here with the
+embedding model, vector dimension, chunker parameters and build time.
+Queries address the alias (QDRANT_COLLECTION, default "legal_cases");
+activate() repoints it in a single update_collection_aliases call, so
+readers switch from the old build to the new one atomically (blue/green).
+
+resolve_query_collection() guards the query path: the collection behind
+the alias must have been built with the query embedder's model and
+dimension. If it was not (e.g. the alias was swapped to a new model before
+this API process was restarted), the newest still-existing build that does
+match is used instead; with none, IndexMismatchError is raised rather than
+searching with incompatible vectors.
+
+The registry is a JSON file (INDEX_REGISTRY_FILE), rewritten atomically.
+Collections that predate the registry are validated by vector size only.
+
+Reduced-dimension (Matryoshka) layout: with mrl_dim > 0 a collection stores
+two named vectors per point — MRL_VECTOR, the first mrl_dim components (kept
+in RAM, used for the ANN pass) and FULL_VECTOR (on disk, used to rescore
+the prefetched candidates). Only valid for MRL-trained embedders (Qwen3).
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+from datetime import datetime
+
+from qdrant_client.models import (
+    CreateAlias,
+    CreateAliasOperation,
+    DeleteAlias,
+    DeleteAliasOperation,
+    Distance,
+    VectorParams,
+)
+
+logger = logging.getLogger("casecut")
+
+INDEX_REGISTRY_FILE = os.getenv(
+    "INDEX_REGISTRY_FILE",
+    os.path.join(os.path.dirname(__file__), "..", "..", "data", "index_registry.json"),
+)
+# How often (seconds) the query path re-resolves the alias target.
+INDEX_CHECK_TTL = float(os.getenv("INDEX_CHECK_TTL", "30"))
+
+STATUS_BUILDING = "building"
+STATUS_READY = "ready"
+STATUS_ACTIVE = "active"
+STATUS_RETIRED = "retired"
+STATUS_FAILED = "failed"
+
+MRL_VECTOR = "mrl"
+FULL_VECTOR = "full"
+
+_lock = threading.Lock()
+_resolved: dict[tuple, tuple[float, str | None, str | None]] = {}
+
+
+class IndexMismatchError(RuntimeError):
+    """No index compatible with the query embedder's model/dimension."""
+
+
+def load() -> dict:
+    try:
+        with open(INDEX_REGISTRY_FILE, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except FileNotFoundError:
+        return {"indexes": {}}
+    data.setdefault("indexes", {})
+    return data
+
+
+def _save(data: dict) -> None:
+    os.makedirs(os.path.dirname(os.path.abspath(INDEX_REGISTRY_FILE)), exist_ok=True)
+    tmp_path = f"{INDEX_REGISTRY_FILE}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2)
+    os.replace(tmp_path, INDEX_REGISTRY_FILE)
+
+
+def entries(alias: str) -> list[dict]:
+    """Registered builds for alias, newest first."""
+    items = [e for e in load()["indexes"].values() if e.get("alias") == alias]
+    return sorted(items, key=lambda e: e.get("built_at", ""), reverse=True)
+
+
+def get(name: str) -> dict | None:
+    return load()["indexes"].get(name)
+
+
+def register(
+    name: str,
+    alias: str,
+    model: str,
+    dim: int,
+    chunk_size: int,
+    chunk_overlap: int,
+    mrl_dim: int = 0,
+) -> dict:
+    """Record a new build (status=building) before it is populated."""
+    entry = {
+        "name": name,
+        "alias": alias,
+        "model": model,
+        "dim": int(dim),
+        "mrl_dim": int(mrl_dim),
+        "chunk_size": int(chunk_size),
+        "chunk_overlap": int(chunk_overlap),
+        "built_at": datetime.now().isoformat(timespec="seconds"),
+        "points": 0,
+        "status": STATUS_BUILDING,
+    }
+    with _lock:
+        data = load()
+        data["indexes"][name] = entry
+        _save(data)
+    return entry
+
+
+def update(name: str, **fields) -> dict:
+    with _lock:
+        data = load()
+        if name not in data["indexes"]:
+            raise KeyError(f"Index '{name}' is not registered")
+        data["indexes"][name].update(fields)
+        _save(data)
+        return data["indexes"][name]
+
+
+def touch(name: str) -> None:
+    """Stamp updated_at on a build written in place (no-op for unregistered collections)."""
+    with _lock:
+        data = load()
+        if name in data["indexes"]:
+            data["indexes"][name]["updated_at"] = datetime.now().isoformat()
+            _save(data)
+
+
+def remove(name: str) -> None:
+    with _lock:
+        data = load()
+        data["indexes"].pop(name, None)
+        _save(data)
+
+
+def alias_target(client, alias: str) -> str | None:
+    """Collection the alias currently points at (None if the alias is unset)."""
+    for item in client.get_aliases().aliases:
+        if item.alias_name == alias:
+            return item.collection_name
+    return None
+
+
+def vectors_config(dim: int, mrl_dim: int = 0):
+    """Collection vectors config: one unnamed vector, or the mrl/full pair."""
+    if 0 < mrl_dim < dim:
+        return {
+            MRL_VECTOR: VectorParams(size=mrl_dim, distance=Distance.COSINE),
+            FULL_VECTOR: VectorParams(size=dim, distance=Distance.COSINE, on_disk=True),
+        }
+    return VectorParams(size=dim, distance=Distance.COSINE)
+
+
+def point_vector(vector, mrl_dim: int = 0):
+    """Point vector(s) for a collection created with vectors_config(dim, mrl_dim)."""
+    values = vector.tolist() if hasattr(vector, "tolist") else list(vector)
+    if mrl_dim:
+        return {MRL_VECTOR: values[:mrl_dim], FULL_VECTOR: values}
+    return values
+
+
+def mrl_dim_of(client, collection: str) -> int:
+    """mrl_dim of an existing collection's layout (0 for a single vector)."""
+    vectors = client.get_collection(collection).config.params.vectors
+    if isinstance(vectors, dict) and MRL_VECTOR in vectors:
+        return vectors[MRL_VECTOR].size
+    return 0
+
+
+def _vector_size(client, collection: str) -> int | None:
+    vectors = client.get_collection(collection).config.params.vectors
+    if isinstance(vectors, dict):
+        vectors = vectors.get(FULL_VECTOR)
+    return getattr(vectors, "size", None)
+
+
+def activate(client, alias: str, name: str, drop_legacy: bool = False) -> dict:
+    """
+    Point alias at the registered build `name` (atomic alias swap).
+
+    A physical collection that still carries the alias name (pre-registry
+    deployments) blocks the alias. The zero-downtime migration is to build
+    and activate under a new alias name, then point QDRANT_COLLECTION at it
+    and restart the API; the legacy collection can be deleted afterwards.
+    drop_legacy=True instead deletes the live legacy collection first, so
+    searches fail until the alias is created (downtime).
+    """
+    entry = get(name)
+    if entry is None or entry.get("alias") != alias:
+        raise KeyError(f"Index '{name}' is not registered for alias '{alias}'")
+    if entry["status"] == STATUS_BUILDING:
+        raise RuntimeError(f"Index '{name}' is still building")
+    if client.count(collection_name=name, exact=True).count == 0:
+        raise RuntimeError(f"Index '{name}' is empty")
+    size = _vector_size(client, name)
+    if size is not None and size != entry["dim"]:
+        raise IndexMismatchError(f"Index '{name}' has dim={size}, registry says {entry['dim']}")
+
+    previous = alias_target(client, alias)
+    if previous is None and client.collection_exists(alias):
+        if not drop_legacy:
+            raise RuntimeError(
+                f"A collection named '{alias}' exists; build and activate under a new alias and switch "
+                f"QDRANT_COLLECTION to it, or re-run with drop_legacy (deletes '{alias}' first: downtime)"
+            )
+        logger.warning("Index      │ dropping legacy collection '%s' for alias │ searches fail until it exists", alias)
+        client.delete_collection(alias)
+
+    operations = []
+    if previous is not None:
+        operations.append(DeleteAliasOperation(delete_alias=DeleteAlias(alias_name=alias)))
+    operations.append(CreateAliasOperation(create_alias=CreateAlias(collection_name=name, alias_name=alias)))
+    client.update_collection_aliases(change_aliases_operations=operations)
+
+    if previous and previous != name and get(previous):
+        update(previous, status=STATUS_RETIRED)
+    entry = update(name, status=STATUS_ACTIVE, activated_at=datetime.now().isoformat(timespec="seconds"))
+    _resolved.clear()
+    logger.info("Index      │ alias '%s' │ %s → %s", alias, previous or "-", name)
+    return entry
+
+
+def _resolve(client, alias: str, model: str, dim: int) -> str:
+    target = alias_target(client, alias) or alias
+    entry = get(target)
+    if entry is None:
+        # Unregistered (legacy) collection: only the dimension can be checked.
+        size = _vector_size(client, target)
+        if size is not None and size != dim:
+            raise IndexMismatchError(f"'{target}' has dim={size}; query embedder produces dim={dim}")
+        return target
+    if entry["model"] == model and entry["dim"] == dim:
+        return target
+
+    existing = {c.name for c in client.get_collections().collections}
+    for candidate in entries(alias):
+        if (
+            candidate["status"] in (STATUS_ACTIVE, STATUS_READY, STATUS_RETIRED)
+            and candidate["model"] == model
+            and candidate["dim"] == dim
+            and candidate["name"] in existing
+        ):
+            logger.warning(
+                "Index      │ alias '%s' → %s uses %s; querying %s built with %s",
+                alias, target, entry["model"], candidate["name"], model,
+            )
+            return candidate["name"]
+    raise IndexMismatchError(
+        f"'{alias}' → {target} was built with {entry['model']} (dim={entry['dim']}); "
+        f"query embedder is {model} (dim={dim}) and no compatible build exists"
+    )
+
+
+def resolve_query_collection(client, alias: str, model: str, dim: int) -> str:
+    """
+    Collection to search for queries embedded with (model, dim).
+
+    Cached for INDEX_CHECK_TTL seconds. Raises IndexMismatchError when no
+    compatible build exists; if Qdrant is unreachable the alias is returned
+    unchanged and the search itself reports the failure.
+    """
+    key = (alias, model, dim)
+    now = time.monotonic()
+    cached = _resolved.get(key)
+    if cached is not None and now - cached[0] < INDEX_CHECK_TTL:
+        _, name, error = cached
+    else:
+        try:
+            name, error = _resolve(client, alias, model, dim), None
+        except IndexMismatchError as e:
+            name, error = None, str(e)
+        except Exception as e:
+            logger.warning("Index      │ resolve failed │ %s", e)
+            return alias
+        _resolved[key] = (now, name, error)
+    if error:
+        raise IndexMismatchError(error)
+    return name
+
+
+def status(client, alias: str, model: str, dim: int) -> dict:
+    """Summary for /health."""
+    info = {"alias": alias, "model": model, "dim": dim}
+    try:
+        info["collection"] = resolve_query_collection(client, alias, model, dim)
+        entry = get(info["collection"]) or {}
+        info["built_at"] = entry.get("built_at")
+        info["ok"] = True
+    except IndexMismatchError as e:
+        info["ok"] = False
+        info["error"] = str(e)
+    return info
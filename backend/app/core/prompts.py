@@ -236,35 +236,120 @@ LANGUAGE_OUTPUT_RULES = {
 }
 
 
-def build_language_instruction(language: str | None = None) -> str:
-    """Build language output instruction for the model."""
-    if not language:
-        return (
-            LANGUAGE_OUTPUT_RULES["english"]
-            + " Keep the same depth, section count, and approximate length you would provide in English for this query."
-        )
-
-    normalized = language.strip().lower()
-    base_rule = LANGUAGE_OUTPUT_RULES.get(normalized, LANGUAGE_OUTPUT_RULES["english"])
-    return (
-        base_rule
-        + " Keep the same depth, section count, and approximate length you would provide in English for this query."
-    )
+# ─── Precompiled prompt prefixes ─────────────────────────────────────
+#
+# Everything that does not depend on the request is assembled once, at
+# import. Prompts open with the block shared by every request (guardrails),
+# then the per-(role, intent, language) instructions; conversation history,
+# retrieved context and the query come last. Providers that cache prompt
+# prefixes (OpenAI / Groq automatic caching, Gemini implicit caching) can
+# then reuse everything up to the first request-specific token.
 
+SHARED_PREFIX = GUARDRAIL_BLOCK.strip()
 
-def build_response_profile(role: str, intent: str | None = None) -> str:
-    """Build adaptive formatting instructions using role + detected user intent."""
-    resolved_intent = intent or "default"
-    intent_rule = INTENT_OUTPUT_PROFILES.get(resolved_intent, INTENT_OUTPUT_PROFILES["default"])
+_LENGTH_RULE = " Keep the same depth, section count, and approximate length you would provide in English for this query."
+
+_RAG_TASK = """RESPONSE LENGTH REQUIREMENT:
+Provide a thorough, comprehensive, and detailed response. Aim for 400-800 words minimum.
+Cover all relevant aspects of the query with proper analysis, explanations, and citations.
+Do NOT give brief or superficial answers. Each section should have substantive content.
+If the context provides enough information, expand on legal reasoning, implications, and practical takeaways.
+
+Based on the following retrieved legal cases, respond to the user's query."""
+
+_PDF_TASK = "The user has uploaded a legal document. Answer their question using ONLY the document content below."
+
+
+def _resolve_role(role: str | None) -> str:
+    return role if role in ROLE_SYSTEM_PROMPTS else "lawyer"
+
+
+def _resolve_intent(intent: str | None) -> str:
+    return intent if intent in INTENT_OUTPUT_PROFILES else "default"
+
+
+def _resolve_language(language: str | None) -> str:
+    normalized = (language or "english").strip().lower()
+    return normalized if normalized in LANGUAGE_OUTPUT_RULES else "english"
+
+
+def _compose_profile(role: str, intent: str) -> str:
     role_rule = ROLE_LENGTH_HINT.get(role, ROLE_LENGTH_HINT["lawyer"])
     return (
         "ADAPTIVE OUTPUT PROFILE:\n"
         f"- Role alignment: {role_rule}\n"
-        f"- Intent alignment: {intent_rule}\n"
+        f"- Intent alignment: {INTENT_OUTPUT_PROFILES[intent]}\n"
         "- If user asks for short output, prioritize brevity. If user asks for details, expand with structure."
     )
 
 
+def _compose_prefix(role: str, profile: str, language: str, task: str) -> str:
+    return f"""{SHARED_PREFIX}
+
+{ROLE_SYSTEM_PROMPTS[role]}
+
+{ROLE_OUTPUT_INSTRUCTIONS[role]}
+{profile}
+LANGUAGE REQUIREMENT:
+{LANGUAGE_INSTRUCTIONS[language]}
+
+{task}"""
+
+
+LANGUAGE_INSTRUCTIONS = {lang: rule + _LENGTH_RULE for lang, rule in LANGUAGE_OUTPUT_RULES.items()}
+
+RESPONSE_PROFILES = {
+    (role, intent): _compose_profile(role, intent)
+    for role in ROLE_SYSTEM_PROMPTS
+    for intent in INTENT_OUTPUT_PROFILES
+}
+
+RAG_PREFIXES = {
+    (role, intent, lang): _compose_prefix(role, profile, lang, _RAG_TASK)
+    for (role, intent), profile in RESPONSE_PROFILES.items()
+    for lang in LANGUAGE_OUTPUT_RULES
+}
+
+PDF_PREFIXES = {
+    (role, intent, lang): _compose_prefix(role, profile, lang, _PDF_TASK)
+    for (role, intent), profile in RESPONSE_PROFILES.items()
+    for lang in LANGUAGE_OUTPUT_RULES
+}
+
+
+def build_language_instruction(language: str | None = None) -> str:
+    """Build language output instruction for the model."""
+    return LANGUAGE_INSTRUCTIONS[_resolve_language(language)]
+
+
+def build_response_profile(role: str, intent: str | None = None) -> str:
+    """Build adaptive formatting instructions using role + detected user intent."""
+    return RESPONSE_PROFILES[(_resolve_role(role), _resolve_intent(intent))]
+
+
+def format_history(
+    turns: list[dict] | None,
+    summary: str = "",
+    user_label: str = "USER",
+    assistant_label: str = "ASSISTANT",
+) -> str:
+    """
+    Conversation text for a prompt: the rolling summary of earlier turns
+    (see app.services.history_service.compact), then the recent turns verbatim.
+    """
+    lines = [f"Summary of earlier conversation:\n{summary}\n"] if summary else []
+    for turn in turns or []:
+        prefix = user_label if turn.get("role") == "user" else assistant_label
+        lines.append(f"{prefix}: {turn['text']}")
+    return "\n".join(lines)
+
+
+def _history_block(conversation_history: list[dict] | None, summary: str, heading: str) -> str:
+    if not conversation_history and not summary:
+        return ""
+    return f"\n{heading}\n" + format_history(conversation_history, summary) + "\n"
+
+
 def build_rag_prompt(
     role: str,
     query: str,
@@ -272,6 +357,8 @@ def build_rag_prompt(
     language: str | None = None,
     conversation_history: list[dict] | None = None,
     response_profile: str | None = None,
+    intent: str | None = None,
+    history_summary: str = "",
 ) -> str:
     """
     Assemble the final prompt sent to the LLM.
@@ -280,46 +367,25 @@ def build_rag_prompt(
         role:                 'judge' | 'lawyer' | 'student' | 'strategy'
         query:                user's raw question
         context_block:        newline-joined case excerpts from retrieval
-        conversation_history: optional list of {role, text} dicts for context
+        conversation_history: recent {role, text} turns, already bounded
+                              (app.services.history_service.compact)
+        history_summary:      rolling summary of the turns before them
+        response_profile:     custom profile text (bypasses the precompiled prefix)
+        intent:               response intent selecting the precompiled profile
 
     Returns:
-        Full prompt string ready for the chat model.
+        Full prompt string ready for the chat model; the request-independent
+        prefix comes first (RAG_PREFIXES).
     """
-    system = ROLE_SYSTEM_PROMPTS.get(role, ROLE_SYSTEM_PROMPTS["lawyer"])
-    output = ROLE_OUTPUT_INSTRUCTIONS.get(role, ROLE_OUTPUT_INSTRUCTIONS["lawyer"])
-    profile_block = response_profile or build_response_profile(role)
-    language_block = build_language_instruction(language)
-
-    # Build conversation context if available
-    history_block = ""
-    if conversation_history:
-        turns = []
-        for turn in conversation_history[-6:]:  # last 3 exchanges max
-            prefix = "USER" if turn.get("role") == "user" else "ASSISTANT"
-            turns.append(f"{prefix}: {turn['text'][:300]}")
-        history_block = (
-            "\n\nPREVIOUS CONVERSATION (for context only):\n"
-            + "\n".join(turns)
-            + "\n"
-        )
-
-    return f"""{system}
-
-{GUARDRAIL_BLOCK}
-
-{output}
-{profile_block}
-LANGUAGE REQUIREMENT:
-{language_block}
-
-RESPONSE LENGTH REQUIREMENT:
-Provide a thorough, comprehensive, and detailed response. Aim for 400-800 words minimum.
-Cover all relevant aspects of the query with proper analysis, explanations, and citations.
-Do NOT give brief or superficial answers. Each section should have substantive content.
-If the context provides enough information, expand on legal reasoning, implications, and practical takeaways.
+    role, language = _resolve_role(role), _resolve_language(language)
+    if response_profile is None:
+        prefix = RAG_PREFIXES[(role, _resolve_intent(intent), language)]
+    else:
+        prefix = _compose_prefix(role, response_profile, language, _RAG_TASK)
+    history_block = _history_block(conversation_history, history_summary, "PREVIOUS CONVERSATION (for context only):")
+
+    return f"""{prefix}
 {history_block}
-Based on the following retrieved legal cases, respond to the user's query.
-
 CASES:
 {context_block}
 
@@ -335,6 +401,8 @@ def build_pdf_chat_prompt(
     language: str | None = None,
     conversation_history: list[dict] | None = None,
     response_profile: str | None = None,
+    intent: str | None = None,
+    history_summary: str = "",
 ) -> str:
     """
     Build a prompt for chatting with an uploaded PDF document.
@@ -343,37 +411,23 @@ def build_pdf_chat_prompt(
         role:                 persona to use
         query:                user's question about the document
         document_context:     extracted text chunks from the PDF
-        conversation_history: optional prior turns
+        conversation_history: recent prior turns, already bounded
+        history_summary:      rolling summary of earlier turns
+        response_profile:     custom profile text (bypasses the precompiled prefix)
+        intent:               response intent selecting the precompiled profile
 
     Returns:
-        Full prompt string.
+        Full prompt string; the request-independent prefix comes first (PDF_PREFIXES).
     """
-    system = ROLE_SYSTEM_PROMPTS.get(role, ROLE_SYSTEM_PROMPTS["lawyer"])
-    output = ROLE_OUTPUT_INSTRUCTIONS.get(role, ROLE_OUTPUT_INSTRUCTIONS["lawyer"])
-    profile_block = response_profile or build_response_profile(role)
-    language_block = build_language_instruction(language)
-
-    history_block = ""
-    if conversation_history:
-        turns = []
-        for turn in conversation_history[-6:]:
-            prefix = "USER" if turn.get("role") == "user" else "ASSISTANT"
-            turns.append(f"{prefix}: {turn['text'][:300]}")
-        history_block = (
-            "\n\nPREVIOUS CONVERSATION:\n" + "\n".join(turns) + "\n"
-        )
-
-    return f"""{system}
-
-{GUARDRAIL_BLOCK}
-
-{output}
-{profile_block}
-LANGUAGE REQUIREMENT:
-{language_block}
+    role, language = _resolve_role(role), _resolve_language(language)
+    if response_profile is None:
+        prefix = PDF_PREFIXES[(role, _resolve_intent(intent), language)]
+    else:
+        prefix = _compose_prefix(role, response_profile, language, _PDF_TASK)
+    history_block = _history_block(conversation_history, history_summary, "PREVIOUS CONVERSATION:")
+
+    return f"""{prefix}
 {history_block}
-The user has uploaded a legal document. Answer their question using ONLY the document content below.
-
 DOCUMENT CONTENT:
 {document_context}
 
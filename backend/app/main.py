@@ -19,8 +19,10 @@ from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
+from app.core import execution
 from app.routers import chat, summarize, pdf, feedback, learning, evaluation, books
 from app.middleware.error_handler import ErrorHandlerMiddleware
+from app.middleware.request_tracking import RequestTrackingMiddleware
 
 logger = logging.getLogger("casecut")
 
@@ -31,13 +33,23 @@ logger = logging.getLogger("casecut")
 async def lifespan(app: FastAPI):
     """Run startup checks, then yield to serve, then shutdown."""
     _print_startup_banner()
+
+    from app.services.summarizer_service import preload_local_models
+    preload_local_models()
+    execution.start_loop_monitor()
     yield
+    from app.services import inference_service
+    inference_service.shutdown()
+    from app.services import fetch_service
+    await fetch_service.aclose()
+    await execution.shutdown()
     logger.info("CaseCut Backend shutting down.")
 
 
 def _print_startup_banner():
     """Print startup banner with service status checks."""
-    from app.core.config import qdrant_client, embedder, COLLECTION
+    from app.core import index_registry
+    from app.core.config import qdrant_client, embedder, COLLECTION, EMBED_DIM, EMBED_MODEL
 
     banner = """
 ===========================================================
@@ -58,6 +70,12 @@ def _print_startup_banner():
     except Exception as e:
         logger.error("Qdrant       | Connection FAILED | %s", e)
 
+    index = index_registry.status(qdrant_client, COLLECTION, EMBED_MODEL, EMBED_DIM)
+    if index["ok"]:
+        logger.info("Index        | '%s' → %s | %s (dim=%d)", COLLECTION, index["collection"], EMBED_MODEL, EMBED_DIM)
+    else:
+        logger.error("Index        | MISMATCH | %s", index["error"])
+
     # LLM
     openai_ok = bool(os.getenv("OPENAI_API_KEY"))
     groq_ok = bool(os.getenv("GROQ_API_KEY"))
@@ -83,6 +101,8 @@ app = FastAPI(title="CaseCut Legal RAG API", version="5.0", lifespan=lifespan)
 
 # Global error handler middleware (catches unhandled exceptions)
 app.add_middleware(ErrorHandlerMiddleware)
+# In-flight request registry for the loop-lag monitor
+app.add_middleware(RequestTrackingMiddleware)
 
 # CORS - restricted to known origins
 ALLOWED_ORIGINS = os.getenv(
@@ -134,7 +154,8 @@ def get_topics():
 @app.get("/health")
 def health():
     """Health check with service status."""
-    from app.core.config import qdrant_client
+    from app.core import index_registry
+    from app.core.config import qdrant_client, COLLECTION, EMBED_DIM, EMBED_MODEL
 
     services = {}
     try:
@@ -146,12 +167,41 @@ def health():
     services["openai"] = "configured" if os.getenv("OPENAI_API_KEY") else "missing"
     services["groq"] = "configured" if os.getenv("GROQ_API_KEY") else "missing"
     services["gemini"] = "configured" if os.getenv("GEMINI_API_KEY") else "missing"
-    services["embedder"] = "loaded"
+    index = index_registry.status(qdrant_client, COLLECTION, EMBED_MODEL, EMBED_DIM)
+    services["embedder"] = "loaded" if index["ok"] else "error"
+
+    from app.services.qdrant_service import RETRIEVAL_MODE
+
+    from app.core.history import session_stats
+    from app.models.summarizer import pool_stats
+    from app.services import (
+        completion_cache,
+        fetch_service,
+        history_service,
+        inference_service,
+        llm_service,
+        statute_service,
+    )
+    from app.services.reranker_service import rerank_cache_stats
 
     all_ok = all(v not in ("error", "missing") for v in services.values())
     return {
         "status": "healthy" if all_ok else "degraded",
         "services": services,
+        "caches": {
+            "reranker": rerank_cache_stats(),
+            "llm_completions": completion_cache.stats(),
+            "llm_prompt_prefix": llm_service.prefix_cache_stats(),
+            "history_summaries": history_service.stats(),
+            "chat_sessions": session_stats(),
+            "fetched_documents": fetch_service.stats(),
+        },
+        "summarizer_pool": pool_stats(),
+        "inference_workers": inference_service.stats(),
+        "event_loop": execution.stats(),
+        "retrieval_mode": RETRIEVAL_MODE,
+        "index": index,
+        "statutes": statute_service.stats(),
         "version": "5.0",
     }
 
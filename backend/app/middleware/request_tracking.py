@@ -0,0 +1,20 @@
+"""
+In-flight request tracking.
+
+Registers each request with app.core.execution so the loop-lag monitor can
+name the handlers that were running when the event loop stalled.
+"""
+
+from fastapi import Request
+from starlette.middleware.base import BaseHTTPMiddleware
+
+from app.core.execution import track_request_end, track_request_start
+
+
+class RequestTrackingMiddleware(BaseHTTPMiddleware):
+    async def dispatch(self, request: Request, call_next):
+        token = track_request_start(f"{request.method} {request.url.path}")
+        try:
+            return await call_next(request)
+        finally:
+            track_request_end(token)
@@ -9,24 +9,52 @@ Uses centralized config from app.core.config.
 import hashlib
 import os
 import time
+from bisect import bisect_right
 from typing import Optional
 
-from qdrant_client.models import Distance, PayloadSchemaType, PointStruct, VectorParams
-
-from app.core.config import CHUNK_OVERLAP, CHUNK_SIZE, COLLECTION, embedder, logger, qdrant_client
+from qdrant_client.models import PayloadSchemaType, PointStruct
+
+from app.core import index_registry
+from app.core.config import (
+    CHUNK_OVERLAP,
+    CHUNK_SIZE,
+    COLLECTION,
+    EMBED_DIM,
+    EMBED_MRL_DIM,
+    embedder,
+    logger,
+    qdrant_client,
+)
 from app.utils.parser import parse_document
 
 DATA_RAW = os.path.join(os.path.dirname(__file__), "..", "..", "data", "raw")
 
-
-def _get_existing_files_in_qdrant() -> set[str]:
+# Payload indexes — the normalized date/court fields enable server-side
+# year-range and court-tier filtering at query time.
+PAYLOAD_INDEXES = {
+    "topics": PayloadSchemaType.KEYWORD,
+    "court": PayloadSchemaType.KEYWORD,
+    "ipc_sections": PayloadSchemaType.KEYWORD,
+    # Canonical statute ids ("IPC:302"; BNS/BNSS/BSA mapped) for section boosts.
+    "section_ids": PayloadSchemaType.KEYWORD,
+    "outcome": PayloadSchemaType.KEYWORD,
+    "court_tier": PayloadSchemaType.KEYWORD,
+    # Two-stage retrieval restricts chunk search to candidate doc_ids.
+    "doc_id": PayloadSchemaType.KEYWORD,
+    "year": PayloadSchemaType.INTEGER,
+    "date_epoch_days": PayloadSchemaType.INTEGER,
+    "date_iso": PayloadSchemaType.DATETIME,
+}
+
+
+def _get_existing_files_in_qdrant(collection: str = COLLECTION) -> set[str]:
     """Return unique payload file names already stored in Qdrant."""
     existing: set[str] = set()
     offset = None
 
     while True:
         points, offset = qdrant_client.scroll(
-            collection_name=COLLECTION,
+            collection_name=collection,
             limit=1000,
             with_payload=True,
             with_vectors=False,
@@ -47,7 +75,12 @@ def _get_existing_files_in_qdrant() -> set[str]:
     return existing
 
 
-def _upsert_with_retry(points: list[PointStruct], filename: str, batch_size: int = 50) -> int:
+def _upsert_with_retry(
+    points: list[PointStruct],
+    filename: str,
+    batch_size: int = 50,
+    collection: str = COLLECTION,
+) -> int:
     """Upload vectors to Qdrant in batches with retries."""
     uploaded = 0
     total_batches = (len(points) + batch_size - 1) // batch_size
@@ -57,7 +90,7 @@ def _upsert_with_retry(points: list[PointStruct], filename: str, batch_size: int
 
         for attempt in range(1, 4):
             try:
-                qdrant_client.upsert(collection_name=COLLECTION, points=batch)
+                qdrant_client.upsert(collection_name=collection, points=batch)
                 uploaded += len(batch)
                 logger.info(
                     "   [UPLOAD] %s | batch %d/%d | %d points",
@@ -86,67 +119,93 @@ def _upsert_with_retry(points: list[PointStruct], filename: str, batch_size: int
     return uploaded
 
 
-def create_collection():
-    """Create Qdrant collection (run once)."""
+def create_collection(collection: str = COLLECTION, mrl_dim: int = EMBED_MRL_DIM):
+    """Create Qdrant collection (run once); mrl_dim > 0 adds the reduced-dimension vector."""
     try:
         qdrant_client.create_collection(
-            collection_name=COLLECTION,
-            vectors_config=VectorParams(size=384, distance=Distance.COSINE),
+            collection_name=collection,
+            vectors_config=index_registry.vectors_config(EMBED_DIM, mrl_dim),
         )
         logger.info("[OK] Collection created successfully!")
     except Exception as e:
         logger.info("Collection exists or error: %s", e)
 
-    for field in ["topics", "court", "ipc_sections", "outcome"]:
+    for field, schema in PAYLOAD_INDEXES.items():
         try:
             qdrant_client.create_payload_index(
-                collection_name=COLLECTION,
+                collection_name=collection,
                 field_name=field,
-                field_schema=PayloadSchemaType.KEYWORD,
+                field_schema=schema,
             )
             logger.info("   [OK] Index created: %s", field)
         except Exception:
             pass
 
 
-def chunk_text(
+def chunk_spans(
     text: str,
     chunk_size: int = CHUNK_SIZE,
     overlap: int = CHUNK_OVERLAP,
-) -> list[str]:
+) -> list[tuple[int, str]]:
     """
-    Split text into overlapping chunks.
-
-    Args:
-        text:       input text
-        chunk_size: number of characters per chunk (default 500)
-        overlap:    overlap between chunks (default 100)
+    Split text into overlapping chunks, keeping each chunk's start offset.
 
     Returns:
-        List of text chunks.
+        List of (start_offset, chunk) tuples.
     """
-    chunks = []
+    spans = []
     start = 0
     text_len = len(text)
     while start < text_len:
         end = start + chunk_size
         chunk = text[start:end].strip()
         if chunk:
-            chunks.append(chunk)
+            spans.append((start, chunk))
         step = chunk_size - overlap
         if step <= 0:
             step = chunk_size  # prevent infinite loop
         start += step
-    return chunks
+    return spans
+
+
+def chunk_text(
+    text: str,
+    chunk_size: int = CHUNK_SIZE,
+    overlap: int = CHUNK_OVERLAP,
+) -> list[str]:
+    """
+    Split text into overlapping chunks.
+
+    Args:
+        text:       input text
+        chunk_size: number of characters per chunk (default 500)
+        overlap:    overlap between chunks (default 100)
+
+    Returns:
+        List of text chunks.
+    """
+    return [chunk for _, chunk in chunk_spans(text, chunk_size, overlap)]
+
 
+def page_number(page_offsets: list[int], offset: int) -> Optional[int]:
+    """1-based page containing char offset, or None when page offsets are unknown (TXT)."""
+    if not page_offsets:
+        return None
+    return max(1, bisect_right(page_offsets, offset))
 
-def process_and_upload(pdf_dir: Optional[str] = None, skip_existing: bool = True) -> dict:
+
+def process_and_upload(
+    pdf_dir: Optional[str] = None,
+    skip_existing: bool = True,
+    collection: str = COLLECTION,
+) -> dict:
     """
     Process raw documents, embed, and upload to Qdrant with metadata.
 
     Args:
         pdf_dir: Folder containing .pdf/.txt files.
         skip_existing: If True, skip files already present in Qdrant payloads.
+        collection: Target collection or alias (index builds pass their own).
 
     Returns:
         Summary dict with processing statistics.
@@ -190,7 +249,7 @@ def process_and_upload(pdf_dir: Optional[str] = None, skip_existing: bool = True
     existing_files: set[str] = set()
     if skip_existing:
         try:
-            existing_files = _get_existing_files_in_qdrant()
+            existing_files = _get_existing_files_in_qdrant(collection)
             logger.info("[INFO] Existing files in Qdrant: %d", len(existing_files))
         except Exception as e:
             logger.warning("[WARN] Could not fetch existing files from Qdrant: %s", e)
@@ -218,6 +277,9 @@ def process_and_upload(pdf_dir: Optional[str] = None, skip_existing: bool = True
             "skipped_empty_chunks": 0,
         }
 
+    # Match the target collection's vector layout (single or mrl/full).
+    mrl_dim = index_registry.mrl_dim_of(qdrant_client, collection)
+
     processed_docs = 0
     failed_docs = 0
     uploaded_points = 0
@@ -227,7 +289,7 @@ def process_and_upload(pdf_dir: Optional[str] = None, skip_existing: bool = True
     for idx, filename in enumerate(files_to_process, start=1):
         filepath = os.path.join(pdf_dir, filename)
         try:
-            parsed = parse_document(filepath)
+            parsed = parse_document(filepath, parallel=True)
             if parsed is None:
                 skipped_parse += 1
                 logger.warning(
@@ -238,31 +300,38 @@ def process_and_upload(pdf_dir: Optional[str] = None, skip_existing: bool = True
                 )
                 continue
 
-            all_chunks = chunk_text(parsed["full_text"])
-            chunks = [(i, c) for i, c in enumerate(all_chunks) if len(c.strip()) >= 30]
+            all_chunks = chunk_spans(parsed["full_text"])
+            page_offsets = parsed.get("page_offsets") or []
+            chunks = [(i, start, c) for i, (start, c) in enumerate(all_chunks) if len(c.strip()) >= 30]
             chunks = chunks[:500]  # up to 500 chunks per doc for full coverage
             if not chunks:
                 skipped_empty_chunks += 1
                 logger.warning("   [SKIP] %s (%d/%d): no valid chunks", filename, idx, len(files_to_process))
                 continue
 
-            texts = [c for _, c in chunks]
+            texts = [c for _, _, c in chunks]
             vectors = embedder.encode(texts, batch_size=64, show_progress_bar=False)
 
             doc_points: list[PointStruct] = []
-            for (i, chunk), vector in zip(chunks, vectors):
+            for (i, start, chunk), vector in zip(chunks, vectors):
                 point_id = hashlib.md5(f"{filename}_{i}".encode()).hexdigest()[:16]
                 doc_points.append(
                     PointStruct(
                         id=int(point_id, 16) % (2**63),
-                        vector=vector.tolist(),
+                        vector=index_registry.point_vector(vector, mrl_dim),
                         payload={
                             "text": chunk,
                             "file": filename,
                             "chunk_id": i,
+                            "page_number": page_number(page_offsets, start),
                             "court": parsed.get("court", "Unknown"),
                             "date": parsed.get("date", ""),
+                            "date_iso": parsed.get("date_iso"),
+                            "year": parsed.get("year"),
+                            "date_epoch_days": parsed.get("date_epoch_days"),
+                            "court_tier": parsed.get("court_tier", "unknown"),
                             "ipc_sections": parsed.get("ipc_sections", []),
+                            "section_ids": parsed.get("section_ids", []),
                             "topics": parsed.get("topics", []),
                             "outcome": parsed.get("outcome", "unknown"),
                             "doc_id": parsed.get("id", ""),
@@ -281,7 +350,7 @@ def process_and_upload(pdf_dir: Optional[str] = None, skip_existing: bool = True
                 sections,
             )
 
-            uploaded_points += _upsert_with_retry(doc_points, filename, batch_size=50)
+            uploaded_points += _upsert_with_retry(doc_points, filename, batch_size=50, collection=collection)
             processed_docs += 1
 
         except Exception as e:
@@ -292,6 +361,8 @@ def process_and_upload(pdf_dir: Optional[str] = None, skip_existing: bool = True
         logger.warning("[WARN] No valid chunks to upload")
     else:
         logger.info("[OK] Total: %d embeddings uploaded to Qdrant", uploaded_points)
+        # Same-size in-place re-indexes keep points_count; this invalidates result caches.
+        index_registry.touch(index_registry.alias_target(qdrant_client, collection) or collection)
 
     summary = {
         "raw_total": raw_total,
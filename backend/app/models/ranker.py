@@ -4,10 +4,41 @@ Ranker — feature-based re-ranking for retrieved legal cases.
  compatibility shim.)
 """
 
+import json
+import logging
+import os
 import re
-from datetime import datetime
+from datetime import date, datetime
 from typing import List, Dict, Optional
 
+from app.utils.parser import DATE_FORMATS, EPOCH
+from app.utils.statutes import canonical_ids, find_statute_refs
+
+logger = logging.getLogger("casecut")
+
+DEFAULT_WEIGHTS = {
+    "semantic": 0.40,
+    "ipc": 0.20,
+    "topic": 0.15,
+    "court": 0.15,
+    "recency": 0.10,
+}
+
+# Weight key → feature name as logged in `features` (and used by the trainer).
+FEATURE_KEYS = {
+    "semantic": "semantic",
+    "ipc": "ipc_match",
+    "topic": "topic_match",
+    "court": "court_authority",
+    "recency": "recency",
+}
+
+# Written by cronjobs/train_ranker_weights.py; loaded once at startup.
+RANKER_WEIGHTS_PATH = os.getenv(
+    "RANKER_WEIGHTS_PATH",
+    os.path.join(os.path.dirname(__file__), "..", "..", "data", "ranker_weights.json"),
+)
+
 COURT_WEIGHTS = {
     "Supreme Court of India": 1.0,
     "High Court": 0.8,
@@ -16,11 +47,35 @@ COURT_WEIGHTS = {
     "Unknown": 0.3,
 }
 
+# Same weights keyed by the ingest-time court_tier enum (see utils/parser).
+COURT_TIER_WEIGHTS = {
+    "supreme_court": 1.0,
+    "high_court": 0.8,
+    "district_court": 0.5,
+    "sessions_court": 0.5,
+    "unknown": 0.3,
+}
+
 
 def extract_query_sections(query: str) -> list:
-    matches = re.findall(r"[Ss]ection\s+(\d+[A-Z]?)", query)
-    numbers = re.findall(r"\b(\d{2,3}[A-Z]?)\b", query)
-    return list(set(matches + numbers))
+    """
+    Canonical ids for act-qualified references ("103 BNS" → "IPC:302"), the
+    bare numbers of IPC ids (what ipc_sections holds on payloads that predate
+    section_ids) plus bare section numbers for the rest of the query
+    ("section 438").
+    """
+    refs = find_statute_refs(query, subsections=True)
+    sections = {canonical for _, _, ref in refs for canonical in canonical_ids(ref)}
+    sections |= {s.split(":", 1)[1] for s in sections if s.startswith("IPC:")}
+
+    rest, last = [], 0
+    for start, end, _ in refs:
+        rest.append(query[last:max(last, start)])
+        last = max(last, end)
+    rest = " ".join(rest + [query[last:]])
+    matches = re.findall(r"[Ss]ection\s+(\d+[A-Z]?)", rest)
+    numbers = re.findall(r"\b(\d{2,3}[A-Z]?)\b", rest)
+    return list(sections | set(matches + numbers))
 
 
 def extract_query_topics(query: str) -> list:
@@ -37,6 +92,24 @@ def court_score(court_name: str) -> float:
     return 0.3
 
 
+def court_tier_score(tier: str) -> float:
+    return COURT_TIER_WEIGHTS.get(tier or "unknown", 0.3)
+
+
+def case_section_keys(payload: Dict) -> list:
+    """
+    Section keys a case can match on: its canonical ids ("IPC:302"), their
+    bare numbers and the raw ipc_sections with their IPC ids (payloads that
+    predate section_ids), so both key forms of a query section match.
+    """
+    section_ids = payload.get("section_ids") or []
+    ipc_sections = payload.get("ipc_sections", [])
+    return [
+        *section_ids, *(s.split(":", 1)[1] for s in section_ids),
+        *ipc_sections, *(f"IPC:{s}" for s in ipc_sections),
+    ]
+
+
 def ipc_match_score(query_sections: list, case_sections: list) -> float:
     if not query_sections or not case_sections:
         return 0.0
@@ -51,13 +124,15 @@ def topic_match_score(query_topics: list, case_topics: list) -> float:
     return min(overlap / max(len(query_topics), 1), 1.0)
 
 
+def recency_from_epoch_days(epoch_days: int) -> float:
+    years_ago = ((date.today() - EPOCH).days - epoch_days) / 365.25
+    return max(0.1, 1.0 - (years_ago / 20.0))
+
+
 def recency_score(date_str: str) -> float:
     if not date_str:
         return 0.3
-    for fmt in [
-        "%d/%m/%Y", "%d-%m-%Y", "%d.%m.%Y",
-        "%B %d, %Y", "%d %B %Y", "%d %B, %Y",
-    ]:
+    for fmt in DATE_FORMATS:
         try:
             dt = datetime.strptime(date_str.strip(), fmt)
             years_ago = (datetime.now() - dt).days / 365.25
@@ -67,6 +142,89 @@ def recency_score(date_str: str) -> float:
     return 0.3
 
 
+def _court_feature(payload: dict) -> float:
+    """Prefer the ingest-time court_tier; fall back to matching the court name."""
+    if payload.get("court_tier"):
+        return court_tier_score(payload["court_tier"])
+    return court_score(payload.get("court", "Unknown"))
+
+
+def _recency_feature(payload: dict) -> float:
+    """Prefer the ingest-time epoch days; fall back to parsing the raw date."""
+    epoch_days = payload.get("date_epoch_days")
+    if isinstance(epoch_days, int):
+        return recency_from_epoch_days(epoch_days)
+    return recency_score(payload.get("date", ""))
+
+
+def _load_learned_weights(path: str = RANKER_WEIGHTS_PATH) -> dict:
+    """
+    Load the calibrated per-role weights file, if one has been trained.
+
+    File shape: {"version": int, "trained_at": str, "roles": {role: weights}}
+    """
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except Exception as e:
+        logger.warning("Ranker     │ could not load weights file %s: %s", path, e)
+        return {}
+
+    roles = {
+        role: w for role, w in (data.get("roles") or {}).items()
+        if isinstance(w, dict) and set(DEFAULT_WEIGHTS) <= set(w)
+    }
+    logger.info(
+        "Ranker     │ loaded learned weights v%s │ roles=%s",
+        data.get("version", "?"), ",".join(sorted(roles)) or "none",
+    )
+    return {"version": data.get("version"), "roles": roles}
+
+
+LEARNED_WEIGHTS = _load_learned_weights()
+
+
+def default_role_weights(court_weight_boost: float = 0.0) -> Dict[str, float]:
+    """Hand-tuned defaults shifted by a role's court-authority boost (the training prior)."""
+    w = dict(DEFAULT_WEIGHTS)
+    if court_weight_boost:
+        w["court"] += court_weight_boost
+        w["recency"] -= court_weight_boost
+    return w
+
+
+def role_weights(role: str, court_weight_boost: float = 0.0) -> Dict[str, float]:
+    """
+    Resolve ranking weights for a role.
+
+    Learned weights (from feedback calibration) win when present for the
+    role; otherwise the hand-tuned defaults are shifted by the role's
+    court-authority boost from ROLE_RETRIEVAL_BIAS.
+    """
+    learned = LEARNED_WEIGHTS.get("roles", {}).get(role)
+    if learned:
+        return {k: float(learned[k]) for k in DEFAULT_WEIGHTS}
+    return default_role_weights(court_weight_boost)
+
+
+def case_features(
+    payload: Dict,
+    query_sections: list,
+    query_topics: list,
+    similarity: float = 0.5,
+) -> Dict[str, float]:
+    """Compute the raw ranking features for one case payload."""
+    return {
+        "semantic": similarity,
+        "ipc_match": ipc_match_score(query_sections, case_section_keys(payload)),
+        "topic_match": topic_match_score(query_topics, payload.get("topics", [])),
+        "court_authority": _court_feature(payload),
+        "recency": _recency_feature(payload),
+    }
+
+
 def rank_cases(
     cases: List[Dict],
     query: str,
@@ -76,13 +234,7 @@ def rank_cases(
     if not cases:
         return []
 
-    w = weights or {
-        "semantic": 0.40,
-        "ipc": 0.20,
-        "topic": 0.15,
-        "court": 0.15,
-        "recency": 0.10,
-    }
+    w = weights or DEFAULT_WEIGHTS
 
     query_sections = extract_query_sections(query)
     query_topics = extract_query_topics(query)
@@ -91,29 +243,14 @@ def rank_cases(
     for i, case in enumerate(cases):
         payload = case.get("payload", case)
         sim = similarity_scores[i] if similarity_scores and i < len(similarity_scores) else 0.5
-        ipc = ipc_match_score(query_sections, payload.get("ipc_sections", []))
-        topic = topic_match_score(query_topics, payload.get("topics", []))
-        court = court_score(payload.get("court", "Unknown"))
-        recency = recency_score(payload.get("date", ""))
-
-        score = (
-            w["semantic"] * sim
-            + w["ipc"] * ipc
-            + w["topic"] * topic
-            + w["court"] * court
-            + w["recency"] * recency
-        )
+        features = case_features(payload, query_sections, query_topics, sim)
+
+        score = sum(w[key] * features[name] for key, name in FEATURE_KEYS.items())
 
         ranked.append({
             **case,
             "rank_score": round(score, 4),
-            "features": {
-                "semantic": round(sim, 3),
-                "ipc_match": round(ipc, 3),
-                "topic_match": round(topic, 3),
-                "court_authority": round(court, 3),
-                "recency": round(recency, 3),
-            },
+            "features": {name: round(v, 3) for name, v in features.items()},
         })
 
     ranked.sort(key=lambda x: x["rank_score"], reverse=True)
@@ -1,24 +1,95 @@
 """
 Local summarizer model wrapper.
 
-This module loads local seq2seq summarizer models from backend/Model.
+This module loads local seq2seq summarizer models from backend/Model into a
+thread-safe model pool shared by all requests.
 """
 
 from __future__ import annotations
 
 import logging
 import os
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Iterable
+from typing import Any, Iterable
 
 logger = logging.getLogger("casecut")
 
-_model = None
-_tokenizer = None
 _torch = None
-_device = "cpu"
-_max_input_tokens = 1024
-_loaded_model_ref = ""
+
+# Model pool: several summarizers stay resident so mixed model_id traffic
+# does not reload weights. Least-recently-used models are evicted once the
+# summed parameter size exceeds SUMMARIZER_POOL_MAX_MB.
+SUMMARIZER_POOL_MAX_MB = float(os.getenv("SUMMARIZER_POOL_MAX_MB", "4096"))
+# Comma-separated model ids or paths loaded at startup (see summarizer_service).
+SUMMARIZER_PRELOAD = [
+    item.strip() for item in os.getenv("SUMMARIZER_PRELOAD", "").split(",") if item.strip()
+]
+
+
+@dataclass
+class PooledModel:
+    """One loaded summarizer. `lock` serializes generate() calls on the model."""
+
+    ref: str
+    model: Any
+    tokenizer: Any
+    device: str
+    max_input_tokens: int
+    size_mb: float
+    lock: threading.Lock = field(default_factory=threading.Lock)
+
+
+_pool: "OrderedDict[str, PooledModel]" = OrderedDict()
+_aliases: dict[str, str] = {}  # requested ref -> loaded candidate ref
+_pool_lock = threading.Lock()
+_load_locks: dict[str, threading.Lock] = {}
+_import_lock = threading.Lock()
+_pool_stats = {"hits": 0, "loads": 0, "evictions": 0, "load_failures": 0}
+
+# Chunk prompts are generated together in padded batches. The memory cap
+# bounds batch_size × padded_input_tokens × num_beams for a single call.
+SUMMARIZER_BATCH_SIZE = max(1, int(os.getenv("SUMMARIZER_BATCH_SIZE", "8")))
+SUMMARIZER_BATCH_MAX_TOKENS = max(1, int(os.getenv("SUMMARIZER_BATCH_MAX_TOKENS", "32768")))
+
+# Decoding profiles for model.generate. length_scale shrinks the preset's
+# max_length (fast profile stops earlier). Greedy search exits at EOS.
+DECODING_PROFILES = {
+    "fast": {
+        "num_beams": 1,
+        "do_sample": False,
+        "use_cache": True,
+        "no_repeat_ngram_size": 3,
+        "length_scale": 0.75,
+    },
+    "balanced": {
+        "num_beams": 2,
+        "use_cache": True,
+        "length_penalty": 1.0,
+        "no_repeat_ngram_size": 3,
+        "repetition_penalty": 1.1,
+        "early_stopping": True,
+        "length_scale": 1.0,
+    },
+    "quality": {
+        "num_beams": 4,
+        "use_cache": True,
+        "length_penalty": 1.2,
+        "no_repeat_ngram_size": 3,
+        "repetition_penalty": 1.1,
+        "early_stopping": True,
+        "length_scale": 1.0,
+    },
+}
+
+# Profile used when the request does not pick one.
+DEFAULT_DECODING_PROFILE = {
+    "short": "fast",
+    "medium": "balanced",
+    "large": "quality",
+}
 
 SUMMARY_PRESETS = {
     "short": {
@@ -130,77 +201,154 @@ def _normalize_model_max_length(model_max_length: int) -> int:
     return max(256, min(model_max_length, 4096))
 
 
-def _load_model(model_ref: str | None = None) -> None:
-    """Lazy-load a local seq2seq summarizer model."""
-    global _model, _tokenizer, _torch, _device, _max_input_tokens, _loaded_model_ref
+def _model_size_mb(model) -> float:
+    try:
+        size = sum(p.numel() * p.element_size() for p in model.parameters())
+        size += sum(b.numel() * b.element_size() for b in model.buffers())
+    except Exception:
+        return 0.0
+    return size / (1024 * 1024)
+
+
+def _pool_lookup(key: str) -> PooledModel | None:
+    """Return a pooled model for a requested ref (or alias) and mark it recently used."""
+    with _pool_lock:
+        ref = _aliases.get(key, key)
+        entry = _pool.get(ref)
+        if entry is not None:
+            _pool.move_to_end(ref)
+            _pool_stats["hits"] += 1
+        return entry
+
+
+def _pool_insert(key: str, entry: PooledModel) -> None:
+    """Add a loaded model, then evict LRU models until the pool fits the budget."""
+    evicted: list[PooledModel] = []
+    with _pool_lock:
+        _pool[entry.ref] = entry
+        _pool.move_to_end(entry.ref)
+        _aliases[key] = entry.ref
+        total = sum(item.size_mb for item in _pool.values())
+        while total > SUMMARIZER_POOL_MAX_MB and len(_pool) > 1:
+            ref, old = _pool.popitem(last=False)
+            total -= old.size_mb
+            evicted.append(old)
+            for alias in [a for a, target in _aliases.items() if target == ref]:
+                del _aliases[alias]
+            _pool_stats["evictions"] += 1
+
+    for old in evicted:
+        logger.info("Summarizer pool │ evicted %s (%.0f MB)", old.ref, old.size_mb)
+    if evicted and _torch is not None and _torch.cuda.is_available():
+        _torch.cuda.empty_cache()
+
+
+def _load_model(model_ref: str | None = None) -> PooledModel | None:
+    """
+    Return a pooled seq2seq summarizer for model_ref, loading it on first use.
 
-    requested_model_ref = _resolve_model_reference(model_ref or "")
-    if _model is not None and _tokenizer is not None and (
-        not requested_model_ref or requested_model_ref == _loaded_model_ref
-    ):
-        return
+    Concurrent callers for the same model wait on a per-model lock, so each
+    model is loaded once. When none of the candidates load, the most
+    recently used pooled model is returned instead (or None if the pool is empty).
+    """
+    global _torch
 
-    try:
-        import torch
-        from transformers import AutoModelForSeq2SeqLM, AutoTokenizer
-    except ImportError:
-        logger.warning("Local summarizer disabled: install transformers and torch.")
-        return
-
-    previous_model = _model
-    previous_tokenizer = _tokenizer
-    previous_device = _device
-    previous_max_input_tokens = _max_input_tokens
-    previous_model_ref = _loaded_model_ref
+    key = _resolve_model_reference(model_ref or "")
+    entry = _pool_lookup(key)
+    if entry is not None:
+        return entry
+
+    # torch/transformers are not safe to import from several threads at once.
+    with _import_lock:
+        try:
+            import torch
+            from transformers import AutoModelForSeq2SeqLM, AutoTokenizer
+        except ImportError:
+            logger.warning("Local summarizer disabled: install transformers and torch.")
+            return None
 
     _torch = torch
-    last_error = None
+    with _pool_lock:
+        load_lock = _load_locks.setdefault(key, threading.Lock())
+
+    with load_lock:
+        # Another thread may have finished loading while we waited.
+        entry = _pool_lookup(key)
+        if entry is not None:
+            return entry
+
+        last_error = None
+        for candidate in _iter_model_candidates(key or None):
+            entry = _pool_lookup(candidate)
+            if entry is not None:
+                with _pool_lock:
+                    _aliases[key] = entry.ref
+                return entry
+
+            try:
+                logger.info("Loading local summarizer model: %s", candidate)
+                tokenizer = AutoTokenizer.from_pretrained(candidate, use_fast=True)
+                model = AutoModelForSeq2SeqLM.from_pretrained(candidate)
+
+                device = "cuda" if torch.cuda.is_available() else "cpu"
+                model.to(device)
+                model.eval()
+
+                entry = PooledModel(
+                    ref=candidate,
+                    model=model,
+                    tokenizer=tokenizer,
+                    device=device,
+                    max_input_tokens=_normalize_model_max_length(
+                        getattr(tokenizer, "model_max_length", 1024)
+                    ),
+                    size_mb=_model_size_mb(model),
+                )
+                _pool_insert(key, entry)
+                _pool_stats["loads"] += 1
+
+                logger.info(
+                    "Local summarizer ready (model=%s, device=%s, max_input_tokens=%d, size=%.0f MB)",
+                    entry.ref,
+                    entry.device,
+                    entry.max_input_tokens,
+                    entry.size_mb,
+                )
+                return entry
+            except Exception as exc:
+                last_error = exc
+                logger.warning("Could not load summarizer candidate '%s': %s", candidate, exc)
+
+        _pool_stats["load_failures"] += 1
+        with _pool_lock:
+            fallback = next(reversed(_pool.values()), None)
+        if fallback is not None:
+            logger.warning("Falling back to previously loaded summarizer model: %s", fallback.ref)
+            return fallback
+
+        logger.warning("No local summarizer model available: %s", last_error or "unknown error")
+        return None
 
-    for candidate in _iter_model_candidates(requested_model_ref or None):
-        try:
-            logger.info("Loading local summarizer model: %s", candidate)
-            tokenizer = AutoTokenizer.from_pretrained(candidate, use_fast=True)
-            model = AutoModelForSeq2SeqLM.from_pretrained(candidate)
-
-            _device = "cuda" if torch.cuda.is_available() else "cpu"
-            model.to(_device)
-            model.eval()
-
-            _tokenizer = tokenizer
-            _model = model
-            _max_input_tokens = _normalize_model_max_length(
-                getattr(tokenizer, "model_max_length", 1024)
-            )
-            _loaded_model_ref = candidate
 
-            logger.info(
-                "Local summarizer ready (model=%s, device=%s, max_input_tokens=%d)",
-                _loaded_model_ref,
-                _device,
-                _max_input_tokens,
-            )
-            return
-        except Exception as exc:
-            last_error = exc
-            logger.warning("Could not load summarizer candidate '%s': %s", candidate, exc)
-
-    # Restore previous working model if new target could not be loaded.
-    if previous_model is not None and previous_tokenizer is not None:
-        _model = previous_model
-        _tokenizer = previous_tokenizer
-        _device = previous_device
-        _max_input_tokens = previous_max_input_tokens
-        _loaded_model_ref = previous_model_ref
-        logger.warning(
-            "Falling back to previously loaded summarizer model: %s",
-            _loaded_model_ref or "unknown",
-        )
-        return
+def preload_models(model_refs: Iterable[str]) -> list[str]:
+    """Load each model ref into the pool (startup warm-up). Returns the loaded refs."""
+    loaded = []
+    for ref in model_refs:
+        entry = _load_model(ref)
+        if entry is not None:
+            loaded.append(entry.ref)
+    return loaded
+
 
-    _model = None
-    _tokenizer = None
-    _loaded_model_ref = ""
-    logger.warning("No local summarizer model available: %s", last_error or "unknown error")
+def pool_stats() -> dict:
+    with _pool_lock:
+        models = [{"ref": e.ref, "device": e.device, "size_mb": round(e.size_mb, 1)} for e in _pool.values()]
+    return {
+        "max_mb": SUMMARIZER_POOL_MAX_MB,
+        "used_mb": round(sum(m["size_mb"] for m in models), 1),
+        "models": models,
+        **_pool_stats,
+    }
 
 
 def _clean_text(text: str) -> str:
@@ -243,96 +391,176 @@ def _split_text(text: str, chunk_chars: int, overlap_chars: int, max_chunks: int
     return chunks
 
 
-def _generate(prompt: str, min_length: int, max_length: int) -> str:
-    if _model is None or _tokenizer is None or _torch is None:
-        return ""
+def resolve_decoding_profile(profile: str | None, summary_size: str = "large") -> str:
+    """Return a valid profile name: explicit choice, else the size default."""
+    normalized = (profile or "").strip().lower()
+    if normalized in DECODING_PROFILES:
+        return normalized
+    return DEFAULT_DECODING_PROFILE.get((summary_size or "").lower(), "quality")
+
+
+def _plan_batches(lengths: list[int], num_beams: int) -> list[list[int]]:
+    """
+    Group prompt indices into generate() batches.
 
-    encoded = _tokenizer(
-        prompt,
-        return_tensors="pt",
+    Prompts are sorted by token length (less padding) and packed while the
+    batch stays within SUMMARIZER_BATCH_SIZE and the padded-token cap.
+    """
+    order = sorted(range(len(lengths)), key=lambda i: lengths[i])
+    batches: list[list[int]] = []
+    current: list[int] = []
+    for idx in order:
+        padded_len = max([lengths[i] for i in current] + [lengths[idx]])
+        cost = (len(current) + 1) * padded_len * num_beams
+        if current and (len(current) >= SUMMARIZER_BATCH_SIZE or cost > SUMMARIZER_BATCH_MAX_TOKENS):
+            batches.append(current)
+            current = []
+        current.append(idx)
+    if current:
+        batches.append(current)
+    return batches
+
+
+def _generate_batch(
+    entry: PooledModel,
+    prompts: list[str],
+    min_length: int,
+    max_length: int,
+    profile: str = "quality",
+) -> list[str]:
+    """Generate one output per prompt using padded, batched model.generate calls."""
+    if _torch is None or not prompts:
+        return [""] * len(prompts)
+
+    decoding = dict(DECODING_PROFILES.get(profile, DECODING_PROFILES["quality"]))
+    length_scale = decoding.pop("length_scale", 1.0)
+    max_length = max(min_length + 1, int(max_length * length_scale))
+    num_beams = decoding["num_beams"]
+    encoded = entry.tokenizer(
+        prompts,
         truncation=True,
-        max_length=_max_input_tokens,
+        max_length=entry.max_input_tokens,
     )
-
-    input_ids = encoded["input_ids"].to(_device)
-    attention_mask = encoded.get("attention_mask")
-    if attention_mask is not None:
-        attention_mask = attention_mask.to(_device)
-
-    with _torch.no_grad():
-        output_ids = _model.generate(
-            input_ids=input_ids,
-            attention_mask=attention_mask,
-            min_length=min_length,
-            max_length=max_length,
-            num_beams=4,
-            length_penalty=1.2,
-            no_repeat_ngram_size=3,
-            repetition_penalty=1.1,
-            early_stopping=True,
+    lengths = [len(ids) for ids in encoded["input_ids"]]
+    outputs = [""] * len(prompts)
+
+    for batch in _plan_batches(lengths, num_beams):
+        padded = entry.tokenizer.pad(
+            {
+                "input_ids": [encoded["input_ids"][i] for i in batch],
+                "attention_mask": [encoded["attention_mask"][i] for i in batch],
+            },
+            return_tensors="pt",
         )
+        input_ids = padded["input_ids"].to(entry.device)
+        attention_mask = padded["attention_mask"].to(entry.device)
+
+        with entry.lock, _torch.no_grad():
+            output_ids = entry.model.generate(
+                input_ids=input_ids,
+                attention_mask=attention_mask,
+                min_length=min_length,
+                max_length=max_length,
+                **decoding,
+            )
 
-    return _tokenizer.decode(output_ids[0], skip_special_tokens=True).strip()
+        decoded = entry.tokenizer.batch_decode(output_ids, skip_special_tokens=True)
+        for i, text in zip(batch, decoded):
+            outputs[i] = text.strip()
 
+    return outputs
 
-def summarize_text(
-    text: str,
+
+def summarize_many(
+    texts: list[str],
     summary_size: str = "large",
     model_ref: str | None = None,
-) -> str | None:
+    decoding_profile: str | None = None,
+) -> list[str | None]:
     """
-    Summarize input text using the local model.
+    Summarize several documents with one model/preset/profile.
 
-    Returns None when no local model is available.
+    Chunk prompts from all documents are generated together, then the merge
+    prompts are generated together, so batches fill up across documents.
+
+    Returns one summary (or None) per input text.
     """
-    _load_model(model_ref=model_ref)
-    if _model is None or _tokenizer is None:
-        return None
+    entry = _load_model(model_ref=model_ref)
+    if entry is None:
+        return [None] * len(texts)
 
     preset = SUMMARY_PRESETS.get((summary_size or "").lower(), SUMMARY_PRESETS["large"])
-    chunks = _split_text(
-        text,
-        chunk_chars=preset["chunk_chars"],
-        overlap_chars=preset["chunk_overlap"],
-        max_chunks=preset["max_chunks"],
-    )
-
-    if not chunks:
-        return None
-
-    chunk_summaries: list[str] = []
-    for chunk in chunks:
-        prompt = (
-            "Summarize the following legal text with clear focus on material facts, "
-            "legal issues, court reasoning, and final outcome.\n\n"
-            f"TEXT:\n{chunk}\n\nSUMMARY:"
-        )
-        generated = _generate(
-            prompt,
-            min_length=preset["chunk_min"],
-            max_length=preset["chunk_max"],
+    profile = resolve_decoding_profile(decoding_profile, summary_size)
+
+    prompts: list[str] = []
+    owners: list[int] = []
+    for doc_idx, text in enumerate(texts):
+        chunks = _split_text(
+            text,
+            chunk_chars=preset["chunk_chars"],
+            overlap_chars=preset["chunk_overlap"],
+            max_chunks=preset["max_chunks"],
         )
-        if generated:
-            chunk_summaries.append(generated)
-
-    if not chunk_summaries:
-        return None
-
-    if len(chunk_summaries) == 1:
-        return chunk_summaries[0]
-
-    merged = "\n".join(f"- {item}" for item in chunk_summaries)
-    final_prompt = (
-        "Merge the section summaries into one coherent legal summary with headings: "
-        "Case Overview, Material Facts, Legal Issues, Court Reasoning, "
-        "Statutory Provisions, and Outcome.\n\n"
-        f"SECTION SUMMARIES:\n{merged}\n\nFINAL SUMMARY:"
+        for chunk in chunks:
+            prompts.append(
+                "Summarize the following legal text with clear focus on material facts, "
+                "legal issues, court reasoning, and final outcome.\n\n"
+                f"TEXT:\n{chunk}\n\nSUMMARY:"
+            )
+            owners.append(doc_idx)
+
+    generated = _generate_batch(
+        entry,
+        prompts,
+        min_length=preset["chunk_min"],
+        max_length=preset["chunk_max"],
+        profile=profile,
     )
+    chunk_summaries: list[list[str]] = [[] for _ in texts]
+    for doc_idx, item in zip(owners, generated):
+        if item:
+            chunk_summaries[doc_idx].append(item)
+
+    results: list[str | None] = [None] * len(texts)
+    merge_docs: list[int] = []
+    merge_prompts: list[str] = []
+    for doc_idx, items in enumerate(chunk_summaries):
+        if len(items) == 1:
+            results[doc_idx] = items[0]
+        elif items:
+            merged = "\n".join(f"- {item}" for item in items)
+            merge_docs.append(doc_idx)
+            merge_prompts.append(
+                "Merge the section summaries into one coherent legal summary with headings: "
+                "Case Overview, Material Facts, Legal Issues, Court Reasoning, "
+                "Statutory Provisions, and Outcome.\n\n"
+                f"SECTION SUMMARIES:\n{merged}\n\nFINAL SUMMARY:"
+            )
 
-    final_summary = _generate(
-        final_prompt,
+    final_summaries = _generate_batch(
+        entry,
+        merge_prompts,
         min_length=preset["final_min"],
         max_length=preset["final_max"],
+        profile=profile,
     )
+    for doc_idx, final_summary in zip(merge_docs, final_summaries):
+        results[doc_idx] = final_summary or "\n".join(chunk_summaries[doc_idx])
+
+    return results
+
+
+def summarize_text(
+    text: str,
+    summary_size: str = "large",
+    model_ref: str | None = None,
+    decoding_profile: str | None = None,
+) -> str | None:
+    """
+    Summarize input text using the local model.
 
-    return final_summary or "\n".join(chunk_summaries)
+    decoding_profile: 'fast' | 'balanced' | 'quality'; defaults by summary_size.
+
+    Returns None when no local model is available.
+    """
+    return summarize_many([text], summary_size, model_ref, decoding_profile)[0]
@@ -3,23 +3,37 @@
 
 Uses rag_service for the full pipeline.
 Returns structured {success, data, error} envelope.
+
+Every endpoint takes an optional session_id: the server then keeps the
+conversation (and, for /query, the last retrieval; for /pdf-chat, the
+document) so clients send only the new message. An empty session_id starts
+a new session and the server-issued id is returned as data.session_id;
+unknown or expired ids get a 404. Requests on one session are handled one
+at a time.
 """
 
 import asyncio
+import contextlib
 import logging
 import traceback
+import weakref
 
 from fastapi import APIRouter
 from fastapi.responses import JSONResponse
 from pydantic import BaseModel
 from typing import Optional
 
-from app.services import rag_service
+from app.core import history as history_store
+from app.services import history_service, rag_service
 from app.schemas.responses import ok, fail
 
 router = APIRouter()
 logger = logging.getLogger("casecut")
 
+# session_id -> lock held from loading a session to saving it; entries go
+# away once no request holds them.
+_session_locks: "weakref.WeakValueDictionary[str, asyncio.Lock]" = weakref.WeakValueDictionary()
+
 
 class MessageTurn(BaseModel):
     role: str  # 'user' or 'assistant'
@@ -33,104 +47,206 @@ class ChatRequest(BaseModel):
     topic: str = "all"
     k: int = 5
     conversation_history: Optional[list[MessageTurn]] = None
+    session_id: Optional[str] = None  # server-side history instead of conversation_history
+    # Optional server-side filters on ingest-time normalized metadata
+    year_from: Optional[int] = None
+    year_to: Optional[int] = None
+    court_tiers: Optional[list[str]] = None  # e.g. ["supreme_court", "high_court"]
 
 
 class PDFChatRequest(BaseModel):
     query: str
-    document_text: str
+    document_text: Optional[str] = None
+    document_id: Optional[str] = None  # "document_id" from /upload (same user_id), instead of document_text
+    user_id: str = "anonymous"
     role: str = "lawyer"
     language: str = "english"
     conversation_history: Optional[list[MessageTurn]] = None
+    session_id: Optional[str] = None
+
+
+def _session_lock(session_id: Optional[str]):
+    """Serialize requests on an existing session (new sessions need no lock)."""
+    if not session_id:
+        return contextlib.nullcontext()
+    lock = _session_locks.get(session_id)
+    if lock is None:
+        lock = _session_locks[session_id] = asyncio.Lock()
+    return lock
+
+
+def _unknown_session(e: history_store.UnknownSessionError) -> JSONResponse:
+    return JSONResponse(
+        status_code=404,
+        content=fail(str(e), "UnknownSession", "Send an empty session_id to start a new session."),
+    )
+
+
+def _open_session(session_id: str, turns: Optional[list[MessageTurn]]) -> tuple[dict, dict]:
+    """Load a session and its compacted history (client-sent turns replace the stored ones)."""
+    session = history_store.get_chat_session(session_id)
+    if turns:
+        history = history_service.compact([{"role": t.role, "text": t.text} for t in turns])
+    else:
+        history = history_service.compact(session["turns"], session["summary"])
+    return session, history
+
+
+def _load_document(document_id: str, user_id: str, session: Optional[dict]) -> Optional[str]:
+    """Text of an /upload handle owned by user_id, or of the session's own document."""
+    owners = [f"user:{user_id}"] + ([f"session:{session['id']}"] if session else [])
+    for owner in owners:
+        text = history_store.get_document(document_id, owner)
+        if text is not None:
+            return text
+    return None
+
+
+def _close_session(session: dict, history: dict, user_text: str, assistant_text: str) -> None:
+    """Record the exchange on top of the compacted history and save the session."""
+    session["summary"], session["turns"] = history["summary"], list(history["turns"])
+    history_service.append_exchange(session, user_text, assistant_text)
+    history_store.save_chat_session(session)
 
 
 @router.post("/query")
 async def chat(req: ChatRequest):
     """Full RAG pipeline: embed → retrieve → rank → summarise."""
     logger.info(
-        "📥 /query  │ role=%s │ lang=%s │ topic=%s │ k=%d │ history=%d │ '%s'",
+        "📥 /query  │ role=%s │ lang=%s │ topic=%s │ k=%d │ history=%d │ session=%s │ '%s'",
         req.role, req.language, req.topic, req.k,
         len(req.conversation_history or []),
+        req.session_id if req.session_id is not None else "-",
         req.query[:100],
     )
 
-    try:
-        # Convert conversation history to plain dicts
-        history = None
-        if req.conversation_history:
-            history = [{"role": t.role, "text": t.text} for t in req.conversation_history]
-
-        result = await asyncio.to_thread(
-            rag_service.run_query,
-            query=req.query,
-            role=req.role,
-            language=req.language,
-            topic=req.topic,
-            k=req.k,
-            conversation_history=history,
-        )
-
-        logger.info(
-            "📤 /query  │ cases=%d │ source=%s │ confidence=%s │ %dms",
-            len(result.get("cases", [])),
-            result.get("source", "unknown"),
-            result.get("confidence", {}).get("level", "?"),
-            result.get("llm_time_ms", 0),
-        )
-
-        return ok(result)
-
-    except Exception as e:
-        logger.error("❌ /query FAILED │ %s", traceback.format_exc())
-        return JSONResponse(
-            status_code=500,
-            content=fail(str(e), type(e).__name__, "Check backend logs for full traceback."),
-        )
+    async with _session_lock(req.session_id):
+        try:
+            # Convert conversation history to plain dicts
+            history, history_summary, session, compacted = None, "", None, None
+            if req.session_id is not None:
+                session, compacted = await asyncio.to_thread(_open_session, req.session_id, req.conversation_history)
+                history, history_summary = compacted["turns"], compacted["summary"]
+            elif req.conversation_history:
+                history = [{"role": t.role, "text": t.text} for t in req.conversation_history]
+
+            result = await asyncio.to_thread(
+                rag_service.run_query,
+                query=req.query,
+                role=req.role,
+                language=req.language,
+                topic=req.topic,
+                k=req.k,
+                conversation_history=history,
+                year_from=req.year_from,
+                year_to=req.year_to,
+                court_tiers=req.court_tiers,
+                history_summary=history_summary,
+                previous=session["retrieval"] if session else None,
+            )
+
+            if session is not None:
+                if not result.get("reused_retrieval"):
+                    session["retrieval"] = {
+                        "query": req.query,
+                        "case_ids": [c["id"] for c in result.get("cases", [])],
+                        "cases": result.get("cases", []),
+                        "confidence": result.get("confidence"),
+                        "statute_ids": [p["id"] for p in result.get("statutes", [])],
+                    } if result.get("cases") else None
+                await asyncio.to_thread(_close_session, session, compacted, req.query, result.get("summary", ""))
+                result["session_id"] = session["id"]
+
+            logger.info(
+                "📤 /query  │ cases=%d │ source=%s │ confidence=%s │ %dms",
+                len(result.get("cases", [])),
+                result.get("source", "unknown"),
+                result.get("confidence", {}).get("level", "?"),
+                result.get("llm_time_ms", 0),
+            )
+
+            return ok(result)
+
+        except history_store.UnknownSessionError as e:
+            return _unknown_session(e)
+        except Exception as e:
+            logger.error("❌ /query FAILED │ %s", traceback.format_exc())
+            return JSONResponse(
+                status_code=500,
+                content=fail(str(e), type(e).__name__, "Check backend logs for full traceback."),
+            )
 
 
 @router.post("/pdf-chat")
 async def pdf_chat(req: PDFChatRequest):
     """Chat with an uploaded PDF document using RAG over its content."""
     logger.info(
-        "📥 /pdf-chat │ role=%s │ lang=%s │ doc_len=%d │ '%s'",
-        req.role, req.language, len(req.document_text), req.query[:100],
+        "📥 /pdf-chat │ role=%s │ lang=%s │ doc_len=%d │ doc_id=%s │ session=%s │ '%s'",
+        req.role, req.language, len(req.document_text or ""), req.document_id or "-",
+        req.session_id if req.session_id is not None else "-", req.query[:100],
     )
 
-    if not req.document_text or len(req.document_text.strip()) < 50:
-        return JSONResponse(
-            status_code=400,
-            content=fail("Document text too short. Upload a valid PDF.", "ValidationError"),
-        )
-
-    try:
-        history = None
-        if req.conversation_history:
-            history = [{"role": t.role, "text": t.text} for t in req.conversation_history]
-
-        result = await asyncio.to_thread(
-            rag_service.chat_with_pdf,
-            query=req.query,
-            document_text=req.document_text,
-            role=req.role,
-            language=req.language,
-            conversation_history=history,
-        )
-
-        logger.info(
-            "📤 /pdf-chat │ source=%s │ citations=%d │ confidence=%s │ %dms",
-            result.get("source", "unknown"),
-            len(result.get("citations", [])),
-            result.get("confidence", {}).get("level", "?"),
-            result.get("llm_time_ms", 0),
-        )
-
-        return ok(result)
-
-    except Exception as e:
-        logger.error("❌ /pdf-chat FAILED │ %s", traceback.format_exc())
-        return JSONResponse(
-            status_code=500,
-            content=fail(str(e), type(e).__name__, "Check backend logs for full traceback."),
-        )
+    async with _session_lock(req.session_id):
+        try:
+            history, history_summary, session, compacted = None, "", None, None
+            if req.session_id is not None:
+                session, compacted = await asyncio.to_thread(_open_session, req.session_id, req.conversation_history)
+                history, history_summary = compacted["turns"], compacted["summary"]
+            elif req.conversation_history:
+                history = [{"role": t.role, "text": t.text} for t in req.conversation_history]
+
+            # Document: sent text, else the /upload handle, else the session's document
+            document_text = req.document_text
+            document_id = None if document_text else req.document_id or (session or {}).get("document_id")
+            if document_id:
+                document_text = await asyncio.to_thread(_load_document, document_id, req.user_id, session)
+            if not document_text or len(document_text.strip()) < 50:
+                return JSONResponse(
+                    status_code=400,
+                    content=fail(
+                        "Document text too short or unknown document_id. Upload a valid PDF.",
+                        "ValidationError",
+                    ),
+                )
+
+            result = await asyncio.to_thread(
+                rag_service.chat_with_pdf,
+                query=req.query,
+                document_text=document_text,
+                role=req.role,
+                language=req.language,
+                conversation_history=history,
+                history_summary=history_summary,
+            )
+
+            if session is not None:
+                if document_id is None or document_id != session.get("document_id"):
+                    # The session keeps its own copy under one handle, overwritten when the document changes.
+                    session["document_id"] = await asyncio.to_thread(
+                        history_store.put_document, document_text, f"session:{session['id']}", session.get("document_id"),
+                    )
+                await asyncio.to_thread(_close_session, session, compacted, req.query, result.get("answer", ""))
+                result["session_id"] = session["id"]
+                result["document_id"] = session["document_id"]
+
+            logger.info(
+                "📤 /pdf-chat │ source=%s │ citations=%d │ confidence=%s │ %dms",
+                result.get("source", "unknown"),
+                len(result.get("citations", [])),
+                result.get("confidence", {}).get("level", "?"),
+                result.get("llm_time_ms", 0),
+            )
+
+            return ok(result)
+
+        except history_store.UnknownSessionError as e:
+            return _unknown_session(e)
+        except Exception as e:
+            logger.error("❌ /pdf-chat FAILED │ %s", traceback.format_exc())
+            return JSONResponse(
+                status_code=500,
+                content=fail(str(e), type(e).__name__, "Check backend logs for full traceback."),
+            )
 
 
 # ── Voice Agent endpoint ─────────────────────────────────────────
@@ -139,6 +255,7 @@ class VoiceChatRequest(BaseModel):
     message: str
     language: str = "english"
     conversation_memory: Optional[list[MessageTurn]] = None
+    session_id: Optional[str] = None
 
 
 @router.post("/voice-chat")
@@ -146,59 +263,73 @@ async def voice_chat(req: VoiceChatRequest):
     """
     Conversational voice agent endpoint.
 
-    Accepts spoken user message + conversation memory, returns a concise
-    spoken-friendly response (no markdown, no tables, no URLs).
+    Accepts spoken user message + conversation memory (or a session_id),
+    returns a concise spoken-friendly response (no markdown, no tables, no URLs).
     """
+    from app.core.prompts import format_history
     from app.services.llm_service import generate
 
     logger.info(
-        "🎙️ /voice-chat │ lang=%s │ memory=%d │ '%s'",
+        "🎙️ /voice-chat │ lang=%s │ memory=%d │ session=%s │ '%s'",
         req.language,
         len(req.conversation_memory or []),
+        req.session_id if req.session_id is not None else "-",
         req.message[:100],
     )
 
-    try:
-        # Build conversation context from memory
-        memory_text = ""
-        if req.conversation_memory:
-            recent = req.conversation_memory[-10:]  # keep last 10 turns
-            memory_text = "\n".join(
-                f"{'User' if t.role == 'user' else 'Assistant'}: {t.text}"
-                for t in recent
+    async with _session_lock(req.session_id):
+        try:
+            # Build conversation context from memory: recent turns verbatim,
+            # older ones folded into a rolling summary (bounded prompt size).
+            memory_text, session, history = "", None, None
+            if req.session_id is not None:
+                session, history = await asyncio.to_thread(_open_session, req.session_id, req.conversation_memory)
+                memory_text = format_history(history["turns"], history["summary"], "User", "Assistant")
+            elif req.conversation_memory:
+                history = await asyncio.to_thread(
+                    history_service.compact,
+                    [{"role": t.role, "text": t.text} for t in req.conversation_memory],
+                )
+                memory_text = format_history(history["turns"], history["summary"], "User", "Assistant")
+
+            prompt = (
+                "You are CaseCut AI, a friendly and knowledgeable Indian legal assistant "
+                "having a real-time voice conversation. Respond naturally as if speaking — "
+                "use conversational tone, short sentences, and avoid markdown, bullet points, "
+                "tables, URLs, or any formatting. Keep answers concise (2-4 sentences for simple "
+                "questions, up to 6-8 for complex ones). If the user asks a legal question, "
+                "cite relevant IPC sections or case names verbally. "
+                f"Respond in {req.language}.\n\n"
             )
 
-        prompt = (
-            "You are CaseCut AI, a friendly and knowledgeable Indian legal assistant "
-            "having a real-time voice conversation. Respond naturally as if speaking — "
-            "use conversational tone, short sentences, and avoid markdown, bullet points, "
-            "tables, URLs, or any formatting. Keep answers concise (2-4 sentences for simple "
-            "questions, up to 6-8 for complex ones). If the user asks a legal question, "
-            "cite relevant IPC sections or case names verbally. "
-            f"Respond in {req.language}.\n\n"
-        )
-
-        if memory_text:
-            prompt += f"Previous conversation:\n{memory_text}\n\n"
-
-        prompt += f"User says: {req.message}\n\nAssistant:"
-
-        text, source, duration_ms = await asyncio.to_thread(generate, prompt)
-
-        logger.info(
-            "📤 /voice-chat │ source=%s │ %dms │ resp_len=%d",
-            source, duration_ms, len(text),
-        )
-
-        return ok({
-            "response": text,
-            "source": source,
-            "llm_time_ms": duration_ms,
-        })
-
-    except Exception as e:
-        logger.error("❌ /voice-chat FAILED │ %s", traceback.format_exc())
-        return JSONResponse(
-            status_code=500,
-            content=fail(str(e), type(e).__name__, "Voice agent error."),
-        )
+            if memory_text:
+                prompt += f"Previous conversation:\n{memory_text}\n\n"
+
+            prompt += f"User says: {req.message}\n\nAssistant:"
+
+            text, source, duration_ms = await asyncio.to_thread(generate, prompt)
+
+            logger.info(
+                "📤 /voice-chat │ source=%s │ %dms │ resp_len=%d",
+                source, duration_ms, len(text),
+            )
+
+            data = {
+                "response": text,
+                "source": source,
+                "llm_time_ms": duration_ms,
+            }
+            if session is not None:
+                await asyncio.to_thread(_close_session, session, history, req.message, text)
+                data["session_id"] = session["id"]
+
+            return ok(data)
+
+        except history_store.UnknownSessionError as e:
+            return _unknown_session(e)
+        except Exception as e:
+            logger.error("❌ /voice-chat FAILED │ %s", traceback.format_exc())
+            return JSONResponse(
+                status_code=500,
+                content=fail(str(e), type(e).__name__, "Voice agent error."),
+            )
@@ -12,6 +12,7 @@ from fastapi import APIRouter
 from fastapi.responses import JSONResponse
 from pydantic import BaseModel, ConfigDict, Field
 
+from app.core.execution import run_in_process
 from app.services.rag_eval_service import evaluate_rag_answer
 
 
@@ -42,7 +43,9 @@ async def evaluate_rag(req: RAGEvaluationRequest):
             len(req.model_answer),
         )
 
-        result = evaluate_rag_answer(
+        # difflib scoring is pure-Python CPU work → process pool.
+        result = await run_in_process(
+            evaluate_rag_answer,
             query=req.query,
             retrieved_context=req.retrieved_context,
             model_answer=req.model_answer,
@@ -10,6 +10,7 @@ from typing import Optional
 from fastapi import APIRouter
 from pydantic import BaseModel
 
+from app.core.execution import run_in_thread
 from app.services.feedback_analyzer_service import analyze_feedback
 
 router = APIRouter()
@@ -38,38 +39,43 @@ class FeedbackAnalyzeRequest(BaseModel):
     user_comment: Optional[str] = None
 
 
+def _record_feedback(req: FeedbackRequest) -> Optional[dict]:
+    """Analyze (optional) and append one feedback entry to feedback.jsonl."""
+    os.makedirs(os.path.dirname(FEEDBACK_FILE), exist_ok=True)
+
+    resolved_user_feedback = req.user_feedback or ("Helpful" if req.rating > 0 else "Not Helpful")
+    resolved_user_comment = req.user_comment if req.user_comment is not None else req.comment
+
+    analysis = None
+    if req.ai_response:
+        analysis = analyze_feedback(
+            ai_response=req.ai_response,
+            user_feedback=resolved_user_feedback,
+            user_comment=resolved_user_comment,
+        )
+
+    entry = {
+        "query": req.query,
+        "response_id": req.response_id,
+        "rating": req.rating,
+        "role": req.role,
+        "comment": req.comment,
+        "ai_response": req.ai_response,
+        "user_feedback": resolved_user_feedback,
+        "user_comment": resolved_user_comment,
+        "analysis": analysis,
+        "timestamp": datetime.now().isoformat(),
+    }
+    with open(FEEDBACK_FILE, "a", encoding="utf-8") as f:
+        f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+    return analysis
+
+
 @router.post("/feedback")
 async def submit_feedback(req: FeedbackRequest):
     """Store raw user feedback and optional analyzer output."""
     try:
-        os.makedirs(os.path.dirname(FEEDBACK_FILE), exist_ok=True)
-
-        resolved_user_feedback = req.user_feedback or ("Helpful" if req.rating > 0 else "Not Helpful")
-        resolved_user_comment = req.user_comment if req.user_comment is not None else req.comment
-
-        analysis = None
-        if req.ai_response:
-            analysis = analyze_feedback(
-                ai_response=req.ai_response,
-                user_feedback=resolved_user_feedback,
-                user_comment=resolved_user_comment,
-            )
-
-        entry = {
-            "query": req.query,
-            "response_id": req.response_id,
-            "rating": req.rating,
-            "role": req.role,
-            "comment": req.comment,
-            "ai_response": req.ai_response,
-            "user_feedback": resolved_user_feedback,
-            "user_comment": resolved_user_comment,
-            "analysis": analysis,
-            "timestamp": datetime.now().isoformat(),
-        }
-        with open(FEEDBACK_FILE, "a", encoding="utf-8") as f:
-            f.write(json.dumps(entry, ensure_ascii=False) + "\n")
-
+        analysis = await run_in_thread(_record_feedback, req)
         return {
             "status": "ok",
             "message": "Feedback recorded. Thank you!",
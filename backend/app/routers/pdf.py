@@ -2,19 +2,22 @@
 /upload router - PDF/TXT file parsing + extraction.
 
 Returns structured metadata and full extracted text for document chat/summarization.
+The text is also kept server-side for the uploading user_id, so /pdf-chat
+(with the same user_id) can take the returned "document_id" instead of the
+full text.
 """
 
 from __future__ import annotations
 
 import logging
-import os
-import tempfile
 from datetime import datetime
 
 from fastapi import APIRouter, File, Form, HTTPException, UploadFile
 
+from app.core import history as history_store
+from app.core.execution import run_in_thread
 from app.schemas.responses import ok
-from app.utils.parser import parse_document
+from app.utils.parser import parse_document_bytes
 
 router = APIRouter()
 logger = logging.getLogger("casecut")
@@ -44,44 +47,36 @@ async def upload_pdf(
     if len(content) > MAX_UPLOAD_BYTES:
         raise HTTPException(status_code=413, detail="File too large. Maximum size is 20 MB.")
 
-    suffix = ".pdf" if lower_name.endswith(".pdf") else ".txt"
-    tmp_path = ""
-
-    try:
-        with tempfile.NamedTemporaryFile(delete=False, suffix=suffix, mode="wb") as tmp:
-            tmp.write(content)
-            tmp_path = tmp.name
-
-        parsed = parse_document(tmp_path)
-        if parsed is None:
-            raise HTTPException(status_code=422, detail="Could not extract meaningful text from the file.")
-
-        response_data = {
-            "id": parsed.get("id", ""),
-            "filename": file.filename,
-            "court": parsed.get("court", "Unknown"),
-            "date": parsed.get("date", ""),
-            "ipc_sections": parsed.get("ipc_sections", []),
-            "topics": parsed.get("topics", []),
-            "outcome": parsed.get("outcome", ""),
-            "facts": parsed.get("facts", ""),
-            "text_preview": parsed.get("full_text", "")[:500],
-            "full_text": parsed.get("full_text", ""),
-            "text_length": parsed.get("text_length", 0),
-            "page_count": parsed.get("page_count", 0),
-            "content_type": file.content_type or "application/octet-stream",
-            "user_id": user_id,
-            "uploaded_at": datetime.now().isoformat(),
-        }
-
-        logger.info(
-            "POST /upload done | bytes=%d | pages=%d | text_len=%d",
-            len(content),
-            response_data["page_count"],
-            response_data["text_length"],
-        )
-
-        return ok(response_data)
-    finally:
-        if tmp_path and os.path.exists(tmp_path):
-            os.unlink(tmp_path)
+    parsed = await run_in_thread(parse_document_bytes, content, file.filename)
+    if parsed is None:
+        raise HTTPException(status_code=422, detail="Could not extract meaningful text from the file.")
+
+    document_id = await run_in_thread(history_store.put_document, parsed.get("full_text", ""), f"user:{user_id}")
+
+    response_data = {
+        "id": parsed.get("id", ""),
+        "document_id": document_id,
+        "filename": file.filename,
+        "court": parsed.get("court", "Unknown"),
+        "date": parsed.get("date", ""),
+        "ipc_sections": parsed.get("ipc_sections", []),
+        "topics": parsed.get("topics", []),
+        "outcome": parsed.get("outcome", ""),
+        "facts": parsed.get("facts", ""),
+        "text_preview": parsed.get("full_text", "")[:500],
+        "full_text": parsed.get("full_text", ""),
+        "text_length": parsed.get("text_length", 0),
+        "page_count": parsed.get("page_count", 0),
+        "content_type": file.content_type or "application/octet-stream",
+        "user_id": user_id,
+        "uploaded_at": datetime.now().isoformat(),
+    }
+
+    logger.info(
+        "POST /upload done | bytes=%d | pages=%d | text_len=%d",
+        len(content),
+        response_data["page_count"],
+        response_data["text_length"],
+    )
+
+    return ok(response_data)
@@ -7,8 +7,6 @@ Frontend calls this endpoint for both typed text and uploaded document text.
 from __future__ import annotations
 
 import logging
-import os
-import tempfile
 import traceback
 from typing import Optional
 
@@ -16,9 +14,10 @@ from fastapi import APIRouter, HTTPException
 from fastapi.responses import JSONResponse
 from pydantic import BaseModel, ConfigDict
 
+from app.core.execution import run_in_thread
 from app.schemas.responses import fail, ok
-from app.services import summarizer_service
-from app.utils.parser import extract_text_from_file
+from app.services import fetch_service, summarizer_service
+from app.services.inference_service import InferenceQueueFull
 
 router = APIRouter()
 logger = logging.getLogger("casecut")
@@ -29,62 +28,63 @@ class SummarizeRequest(BaseModel):
 
     text: Optional[str] = None
     file_url: Optional[str] = None
+    doc_id: Optional[str] = None  # corpus document id → served from the summary store
     model_id: str = "casecut-legal"
     mode: str = "lawyer"
     intent: str = "summarize"
     summary_size: str = "large"
+    decoding_profile: Optional[str] = None  # fast | balanced | quality (default: by summary_size)
 
 
 @router.post("/summarize")
 async def summarize(req: SummarizeRequest):
-    """Summarize raw text or a remote file URL."""
+    """Summarize raw text, a remote file URL, or a corpus document by doc_id."""
     logger.info(
-        "POST /summarize | model=%s | mode=%s | intent=%s | size=%s | text_len=%d | file_url=%s",
+        "POST /summarize | model=%s | mode=%s | intent=%s | size=%s | text_len=%d | file_url=%s | doc_id=%s",
         req.model_id,
         req.mode,
         req.intent,
         req.summary_size,
         len(req.text or ""),
         bool(req.file_url),
+        req.doc_id or "-",
     )
 
     text = req.text
 
-    if not text and req.file_url:
-        import requests as http_requests
+    if not text and not req.file_url and req.doc_id:
+        stored = await run_in_thread(
+            summarizer_service.get_precomputed,
+            req.doc_id, req.model_id, req.mode, req.summary_size, req.decoding_profile,
+        )
+        if stored is None or req.intent != "summarize":
+            raise HTTPException(
+                status_code=404,
+                detail="No precomputed summary for this document; send its text or file_url instead.",
+            )
+        return ok(stored)
 
-        tmp_path: Optional[str] = None
+    if not text and req.file_url:
         try:
-            response = http_requests.get(req.file_url, timeout=45)
-            response.raise_for_status()
-
-            url_lower = (req.file_url or "").lower().split("?")[0]
-            content_type = (response.headers.get("content-type") or "").lower()
-            is_pdf = url_lower.endswith(".pdf") or "pdf" in content_type
-            suffix = ".pdf" if is_pdf else ".txt"
-
-            with tempfile.NamedTemporaryFile(delete=False, suffix=suffix, mode="wb") as tmp:
-                tmp.write(response.content)
-                tmp_path = tmp.name
-
-            extracted_text, _page_count = extract_text_from_file(tmp_path)
-            text = extracted_text
+            text = await fetch_service.fetch_document_text(req.file_url)
+        except fetch_service.FetchTooLarge as exc:
+            raise HTTPException(status_code=413, detail=str(exc)) from exc
         except Exception as exc:
             raise HTTPException(status_code=400, detail=f"Could not fetch or parse file: {exc}") from exc
-        finally:
-            if tmp_path and os.path.exists(tmp_path):
-                os.unlink(tmp_path)
 
     if not text or len(text.strip()) < 50:
         raise HTTPException(status_code=400, detail="Not enough text to summarize.")
 
     try:
-        result = summarizer_service.summarize(
+        result = await run_in_thread(
+            summarizer_service.summarize,
             text=text,
             model_id=req.model_id,
             mode=req.mode,
             intent=req.intent,
             summary_size=req.summary_size,
+            doc_id=req.doc_id,
+            decoding_profile=req.decoding_profile,
         )
         logger.info(
             "POST /summarize done | provider=%s | summary_len=%d",
@@ -92,6 +92,13 @@ async def summarize(req: SummarizeRequest):
             len(result.get("summary", "")),
         )
         return ok(result)
+    except InferenceQueueFull as exc:
+        logger.warning("POST /summarize rejected | %s", exc)
+        return JSONResponse(
+            status_code=503,
+            content=fail(str(exc), "InferenceQueueFull", hint="Local summarizer is busy; retry shortly."),
+            headers={"Retry-After": "5"},
+        )
     except Exception as exc:
         logger.error("POST /summarize failed | %s", traceback.format_exc())
         return JSONResponse(status_code=500, content=fail(str(exc), type(exc).__name__))
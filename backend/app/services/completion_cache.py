@@ -0,0 +1,142 @@
+"""
+Completion cache — persistent, opt-in memo of LLM responses.
+
+Keyed on a SHA-256 of (provider, model, prompt, temperature, max_tokens) and
+stored in a local SQLite file, so identical prompts (e.g. key-point
+extraction for the same judgment) come back instantly across restarts.
+
+Features:
+  • Size cap (LLM_CACHE_MAX_MB) with least-recently-used eviction
+  • Entry TTL (LLM_CACHE_TTL_DAYS)
+  • Callers opt in per call: llm_service.generate(prompt, cache=True)
+"""
+
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+logger = logging.getLogger("casecut")
+
+LLM_CACHE_ENABLED = os.getenv("LLM_CACHE_ENABLED", "true").strip().lower() not in {"0", "false", "no"}
+LLM_CACHE_PATH = os.getenv(
+    "LLM_CACHE_PATH",
+    os.path.join(os.path.dirname(__file__), "..", "..", "data", "llm_cache.sqlite3"),
+)
+LLM_CACHE_MAX_MB = float(os.getenv("LLM_CACHE_MAX_MB", "256"))
+LLM_CACHE_TTL_DAYS = float(os.getenv("LLM_CACHE_TTL_DAYS", "30"))
+
+_conn: sqlite3.Connection | None = None
+_lock = threading.Lock()
+_stats = {"hits": 0, "misses": 0, "writes": 0, "evictions": 0}
+
+
+def _connection() -> sqlite3.Connection:
+    global _conn
+    if _conn is None:
+        os.makedirs(os.path.dirname(os.path.abspath(LLM_CACHE_PATH)), exist_ok=True)
+        conn = sqlite3.connect(LLM_CACHE_PATH, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS completions (
+                key TEXT PRIMARY KEY,
+                provider TEXT NOT NULL,
+                model TEXT NOT NULL,
+                response TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                created_at REAL NOT NULL,
+                last_access REAL NOT NULL
+            )
+            """
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_completions_access ON completions(last_access)")
+        conn.commit()
+        _conn = conn
+    return _conn
+
+
+def make_key(provider: str, model: str, prompt: str, temperature: float, max_tokens: int) -> str:
+    raw = json.dumps([provider, model, prompt, temperature, max_tokens], ensure_ascii=False)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def get(key: str) -> str | None:
+    """Return the cached response for key, or None (missing/expired/disabled)."""
+    if not LLM_CACHE_ENABLED:
+        return None
+    now = time.time()
+    try:
+        with _lock:
+            conn = _connection()
+            row = conn.execute(
+                "SELECT response, created_at FROM completions WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                _stats["misses"] += 1
+                return None
+            if now - row[1] > LLM_CACHE_TTL_DAYS * 86400:
+                conn.execute("DELETE FROM completions WHERE key = ?", (key,))
+                conn.commit()
+                _stats["misses"] += 1
+                return None
+            conn.execute("UPDATE completions SET last_access = ? WHERE key = ?", (now, key))
+            conn.commit()
+            _stats["hits"] += 1
+            return row[0]
+    except Exception as e:
+        logger.warning("LLM cache  │ read failed │ %s", e)
+        return None
+
+
+def put(key: str, provider: str, model: str, response: str) -> None:
+    """Store a response and evict least-recently-used entries over the size cap."""
+    if not LLM_CACHE_ENABLED:
+        return
+    now = time.time()
+    size = len(response.encode("utf-8"))
+    max_bytes = int(LLM_CACHE_MAX_MB * 1024 * 1024)
+    try:
+        with _lock:
+            conn = _connection()
+            conn.execute(
+                "INSERT OR REPLACE INTO completions "
+                "(key, provider, model, response, size, created_at, last_access) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (key, provider, model, response, size, now, now),
+            )
+            _stats["writes"] += 1
+
+            total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM completions").fetchone()[0]
+            if total > max_bytes:
+                # Evict down to 90% of the cap so we don't evict on every write.
+                target = int(max_bytes * 0.9)
+                for old_key, old_size in conn.execute(
+                    "SELECT key, size FROM completions ORDER BY last_access ASC"
+                ).fetchall():
+                    if total <= target:
+                        break
+                    conn.execute("DELETE FROM completions WHERE key = ?", (old_key,))
+                    total -= old_size
+                    _stats["evictions"] += 1
+            conn.commit()
+    except Exception as e:
+        logger.warning("LLM cache  │ write failed │ %s", e)
+
+
+def stats() -> dict:
+    result = {"enabled": LLM_CACHE_ENABLED, **_stats}
+    if not LLM_CACHE_ENABLED:
+        return result
+    try:
+        with _lock:
+            entries, total = _connection().execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM completions"
+            ).fetchone()
+        result.update({"entries": entries, "size_mb": round(total / (1024 * 1024), 2)})
+    except Exception:
+        pass
+    return result
@@ -0,0 +1,156 @@
+"""
+Fetch service — async streaming download of remote documents (/summarize file_url).
+
+Features:
+  • One pooled httpx.AsyncClient (keep-alive across requests), closed at shutdown
+  • FETCH_MAX_BYTES enforced while streaming (and up front via Content-Length)
+  • PDF detection by sniffing the first bytes (%PDF-), not just the URL/header
+  • Body kept in memory up to FETCH_SPOOL_MB and parsed from the buffer;
+    larger bodies are streamed to a temp file in _SPOOL_WRITE_BYTES blocks.
+    Disk writes and parsing run off the event loop
+  • Parsed text cached per URL; revalidated with ETag / Last-Modified so an
+    unchanged judgment is not downloaded again (304 → cached text)
+"""
+
+import logging
+import os
+import tempfile
+
+import httpx
+
+from app.core.cache import TTLCache
+from app.core.execution import run_in_thread
+from app.utils.parser import extract_text_from_bytes, extract_text_from_file
+
+logger = logging.getLogger("casecut")
+
+FETCH_TIMEOUT_S = float(os.getenv("FETCH_TIMEOUT_S", "45"))
+FETCH_MAX_BYTES = int(os.getenv("FETCH_MAX_MB", "25")) * 1024 * 1024
+FETCH_SPOOL_BYTES = int(float(os.getenv("FETCH_SPOOL_MB", "8")) * 1024 * 1024)
+FETCH_CACHE_SIZE = int(os.getenv("FETCH_CACHE_SIZE", "128"))
+FETCH_CACHE_TTL = float(os.getenv("FETCH_CACHE_TTL", str(24 * 3600)))
+
+# Once spooling to disk, chunks are gathered into blocks this size per write.
+_SPOOL_WRITE_BYTES = 1024 * 1024
+
+_client: httpx.AsyncClient | None = None
+# url -> {"text", "etag", "last_modified"}
+_text_cache = TTLCache(maxsize=FETCH_CACHE_SIZE, ttl=FETCH_CACHE_TTL)
+
+
+class FetchTooLarge(ValueError):
+    """Remote document exceeds FETCH_MAX_BYTES."""
+
+
+def _get_client() -> httpx.AsyncClient:
+    global _client
+    if _client is None:
+        _client = httpx.AsyncClient(
+            timeout=FETCH_TIMEOUT_S,
+            follow_redirects=True,
+            limits=httpx.Limits(max_connections=20, max_keepalive_connections=10),
+        )
+    return _client
+
+
+async def aclose() -> None:
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+
+def _looks_like_pdf(first_bytes: bytes, url: str, content_type: str) -> bool:
+    if first_bytes.lstrip()[:5] == b"%PDF-":
+        return True
+    return url.lower().split("?")[0].endswith(".pdf") or "pdf" in content_type
+
+
+def _open_spool(is_pdf: bool):
+    return tempfile.NamedTemporaryFile(delete=False, mode="wb", suffix=".pdf" if is_pdf else ".txt")
+
+
+def _parse_file(path: str) -> str:
+    # Serial reader: spooled downloads are on the request path (no process pool).
+    text, _page_count = extract_text_from_file(path)
+    return text
+
+
+def _parse_bytes(data: bytes, is_pdf: bool) -> str:
+    text, _page_count = extract_text_from_bytes(data, ".pdf" if is_pdf else "")
+    return text
+
+
+async def fetch_document_text(url: str) -> str:
+    """
+    Download url (PDF or plain text) and return its extracted text.
+
+    Raises FetchTooLarge over FETCH_MAX_BYTES; httpx errors propagate.
+    """
+    cached = _text_cache.get(url)
+    headers = {}
+    if cached:
+        if cached.get("etag"):
+            headers["If-None-Match"] = cached["etag"]
+        if cached.get("last_modified"):
+            headers["If-Modified-Since"] = cached["last_modified"]
+
+    tmp_path = ""
+    try:
+        async with _get_client().stream("GET", url, headers=headers) as response:
+            if response.status_code == 304 and cached:
+                logger.info("Fetch      │ 304 not modified │ cached text │ %s", url[:120])
+                _text_cache.set(url, cached)
+                return cached["text"]
+            response.raise_for_status()
+
+            declared = int(response.headers.get("content-length") or 0)
+            if declared > FETCH_MAX_BYTES:
+                raise FetchTooLarge(f"Remote file is {declared} bytes; limit is {FETCH_MAX_BYTES}.")
+
+            content_type = (response.headers.get("content-type") or "").lower()
+            received = 0
+            is_pdf = None
+            buffer = bytearray()
+            tmp = None
+            try:
+                async for chunk in response.aiter_bytes():
+                    if is_pdf is None:
+                        is_pdf = _looks_like_pdf(chunk, url, content_type)
+                    received += len(chunk)
+                    if received > FETCH_MAX_BYTES:
+                        raise FetchTooLarge(f"Remote file exceeds the {FETCH_MAX_BYTES}-byte limit.")
+                    buffer.extend(chunk)
+                    if tmp is None and received > FETCH_SPOOL_BYTES:
+                        # Too large to hold in memory: roll over to disk.
+                        tmp = await run_in_thread(_open_spool, bool(is_pdf))
+                        tmp_path = tmp.name
+                    if tmp is not None and len(buffer) >= _SPOOL_WRITE_BYTES:
+                        await run_in_thread(tmp.write, bytes(buffer))
+                        buffer = bytearray()
+                if tmp is not None and buffer:
+                    await run_in_thread(tmp.write, bytes(buffer))
+                    buffer = bytearray()
+            finally:
+                if tmp is not None:
+                    await run_in_thread(tmp.close)
+
+            etag = response.headers.get("etag")
+            last_modified = response.headers.get("last-modified")
+
+        if tmp_path:
+            text = await run_in_thread(_parse_file, tmp_path)
+        else:
+            text = await run_in_thread(_parse_bytes, bytes(buffer), bool(is_pdf))
+    finally:
+        if tmp_path and os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+
+    logger.info("Fetch      │ %d bytes │ pdf=%s │ text_len=%d │ %s", received, bool(is_pdf), len(text), url[:120])
+    if text and (etag or last_modified):
+        _text_cache.set(url, {"text": text, "etag": etag, "last_modified": last_modified})
+    return text
+
+
+def stats() -> dict:
+    return _text_cache.stats()
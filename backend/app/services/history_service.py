@@ -0,0 +1,152 @@
+"""
+Conversation history compaction for multi-turn chat.
+
+compact(history) keeps the last HISTORY_RECENT_TURNS turns verbatim (each
+clipped to HISTORY_TURN_CHARS) and folds everything older into a rolling
+summary of at most HISTORY_SUMMARY_TOKENS, so the history block of a prompt
+stays bounded however long the consultation runs.
+
+Summaries are keyed by a chained hash of the turns they cover. Turns are
+folded HISTORY_FOLD_TURNS at a time, and each fold extends the newest cached
+summary with just the turns added since, so a long conversation costs one
+small LLM call every few turns rather than a re-summary per request. If the
+summary call fails, the older turns are kept as clipped excerpts instead
+(not cached, so the next request tries again).
+
+Server-side sessions keep only compact()'s output: the next request passes
+the stored summary back in and folds new turns onto it, so session state
+stays bounded too.
+"""
+
+import hashlib
+import logging
+import os
+
+from app.core.cache import TTLCache
+from app.services import llm_service
+
+logger = logging.getLogger("casecut")
+
+HISTORY_RECENT_TURNS = int(os.getenv("HISTORY_RECENT_TURNS", "6"))
+HISTORY_FOLD_TURNS = max(1, int(os.getenv("HISTORY_FOLD_TURNS", "4")))
+HISTORY_TURN_CHARS = int(os.getenv("HISTORY_TURN_CHARS", "800"))
+HISTORY_SUMMARY_TOKENS = int(os.getenv("HISTORY_SUMMARY_TOKENS", "400"))
+HISTORY_SUMMARY_CACHE_SIZE = int(os.getenv("HISTORY_SUMMARY_CACHE_SIZE", "1024"))
+HISTORY_SUMMARY_CACHE_TTL = float(os.getenv("HISTORY_SUMMARY_CACHE_TTL", "86400"))
+
+# Rough chars-per-token for English legal text (no tokenizer on this path).
+_CHARS_PER_TOKEN = 4
+
+# prefix hash → summary of the turns up to and including that prefix
+_summaries = TTLCache(maxsize=HISTORY_SUMMARY_CACHE_SIZE, ttl=HISTORY_SUMMARY_CACHE_TTL)
+_stats = {"compactions": 0, "llm_summaries": 0, "fallbacks": 0}
+
+
+def _clip(text: str, limit: int) -> str:
+    text = (text or "").strip()
+    return text if len(text) <= limit else text[:limit].rsplit(" ", 1)[0] + " …"
+
+
+def _prefix_hashes(turns: list[dict], summary: str = "") -> list[str]:
+    """hashes[i] identifies summary + turns[:i + 1] (chained, so each step is O(turn))."""
+    hashes = []
+    digest = hashlib.sha1(summary.encode("utf-8")).digest() if summary else b""
+    for turn in turns:
+        digest = hashlib.sha1(digest + f"{turn['role']}\x00{turn['text']}".encode("utf-8")).digest()
+        hashes.append(digest.hex())
+    return hashes
+
+
+def _format(turns: list[dict]) -> str:
+    return "\n".join(f"{'USER' if t['role'] == 'user' else 'ASSISTANT'}: {t['text']}" for t in turns)
+
+
+def _fallback_summary(previous: str, turns: list[dict]) -> str:
+    """Clipped excerpts of the newest turns that fit the summary budget."""
+    budget = HISTORY_SUMMARY_TOKENS * _CHARS_PER_TOKEN
+    lines = [f"{'User' if t['role'] == 'user' else 'Assistant'}: {_clip(t['text'], 200)}" for t in turns]
+    kept, size = [], len(previous)
+    for line in reversed(lines):
+        if size + len(line) > budget:
+            break
+        kept.insert(0, line)
+        size += len(line) + 1
+    return "\n".join(filter(None, [previous, *kept]))[-budget:]
+
+
+def _summarize(previous: str, turns: list[dict]) -> str | None:
+    words = int(HISTORY_SUMMARY_TOKENS * 0.75)
+    prompt = (
+        "You maintain the running summary of a legal consultation between a user and CaseCut AI.\n"
+        f"Update the summary with the new turns below. Keep it under {words} words.\n"
+        "Preserve the user's facts and goals, parties, statutes and sections, case names, "
+        "dates, and any conclusions or advice already given. Drop pleasantries and repetition.\n"
+        "Return only the summary text.\n\n"
+        f"CURRENT SUMMARY:\n{previous or '(none)'}\n\n"
+        f"NEW TURNS:\n{_format(turns)}"
+    )
+    text, source, duration = llm_service.generate(prompt, cache=True)
+    if source == "error" or not text.strip():
+        return None
+    _stats["llm_summaries"] += 1
+    logger.info("History    │ folded %d turn(s) │ source=%s │ %dms", len(turns), source, duration)
+    return _clip(text, HISTORY_SUMMARY_TOKENS * _CHARS_PER_TOKEN)
+
+
+def _summary_for(turns: list[dict], hashes: list[str], end: int, summary: str = "") -> str:
+    """Summary of summary + turns[:end], extending the newest cached fold boundary."""
+    cached = _summaries.get(hashes[end - 1])
+    if cached is not None:
+        return cached
+
+    start, previous = 0, summary
+    for boundary in range(end - HISTORY_FOLD_TURNS, 0, -HISTORY_FOLD_TURNS):
+        hit = _summaries.get(hashes[boundary - 1])
+        if hit is not None:
+            start, previous = boundary, hit
+            break
+
+    summary = _summarize(previous, turns[start:end])
+    if summary is None:
+        # Not cached: the next request retries the LLM.
+        _stats["fallbacks"] += 1
+        logger.warning("History    │ summary failed │ keeping excerpts of %d turn(s)", end - start)
+        return _fallback_summary(previous, turns[start:end])
+    _summaries.set(hashes[end - 1], summary)
+    return summary
+
+
+def compact(history: list[dict] | None, summary: str = "") -> dict:
+    """
+    Bound a conversation for prompting.
+
+    Returns {"summary": str, "turns": [{role, text}], "summarized_turns": int};
+    turns are the verbatim tail (up to HISTORY_RECENT_TURNS + HISTORY_FOLD_TURNS - 1),
+    summary covers everything before it ("" for short conversations). Pass a
+    previous summary when history continues an already-compacted conversation.
+    """
+    turns = [
+        {"role": t.get("role", "user"), "text": _clip(t.get("text", ""), HISTORY_TURN_CHARS)}
+        for t in history or []
+        if (t.get("text") or "").strip()
+    ]
+    older = len(turns) - HISTORY_RECENT_TURNS
+    # Fold in steps of HISTORY_FOLD_TURNS so the summary only changes every few turns.
+    fold_end = older - older % HISTORY_FOLD_TURNS if older > 0 else 0
+    if fold_end <= 0:
+        return {"summary": summary, "turns": turns, "summarized_turns": 0}
+
+    _stats["compactions"] += 1
+    summary = _summary_for(turns, _prefix_hashes(turns[:fold_end], summary), fold_end, summary)
+    return {"summary": summary, "turns": turns[fold_end:], "summarized_turns": fold_end}
+
+
+def append_exchange(session: dict, user_text: str, assistant_text: str) -> None:
+    """Add a user/assistant exchange to a session's compacted turns (clipped)."""
+    for role, text in (("user", user_text), ("assistant", assistant_text)):
+        if (text or "").strip():
+            session["turns"].append({"role": role, "text": _clip(text, HISTORY_TURN_CHARS)})
+
+
+def stats() -> dict:
+    return {**_summaries.stats(), **_stats}
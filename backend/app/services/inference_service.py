@@ -0,0 +1,376 @@
+"""
+Inference service — local summarizer models in dedicated worker processes.
+
+With SUMMARIZER_WORKERS > 0 the torch models live in separate (spawned)
+processes instead of the API process. Callers submit jobs through a bounded
+queue; a dispatcher thread groups jobs that share (summary_size, model_ref,
+decoding_profile) into one summarizer.summarize_many call, so chunk prompts
+from concurrent requests are batched together on the worker.
+
+  • SUMMARIZER_WORKERS=0 (default) keeps inference in-process
+  • Queue full  → InferenceQueueFull (router answers 503)
+  • Job timeout → InferenceTimeout (caller falls back to the LLM pipeline);
+    the worker still running it is terminated and respawned, and the other
+    jobs of its batch fail fast instead of waiting out their own timeouts
+  • Worker-side errors, recycled batches and shutdown → InferenceWorkerError
+    (also a fallback to the LLM pipeline; InferenceTimeout is a subclass)
+  • Dead workers are respawned; their in-flight jobs time out
+  • Workers report the models they actually loaded ("ready") and each batch
+    they pick up ("start"), so preload/stats reflect worker-side state
+"""
+
+import itertools
+import logging
+import multiprocessing as mp
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future, TimeoutError as FutureTimeout
+
+from app.models import summarizer as local_summarizer
+
+logger = logging.getLogger("casecut")
+
+SUMMARIZER_WORKERS = max(0, int(os.getenv("SUMMARIZER_WORKERS", "0")))
+SUMMARIZER_QUEUE_SIZE = max(1, int(os.getenv("SUMMARIZER_QUEUE_SIZE", "64")))
+SUMMARIZER_JOB_TIMEOUT_S = float(os.getenv("SUMMARIZER_JOB_TIMEOUT_S", "300"))
+# How long the dispatcher waits for more jobs to join a batch, and the cap
+# on documents per worker call.
+SUMMARIZER_BATCH_WAIT_MS = float(os.getenv("SUMMARIZER_BATCH_WAIT_MS", "25"))
+SUMMARIZER_MAX_DOCS_PER_BATCH = max(1, int(os.getenv("SUMMARIZER_MAX_DOCS_PER_BATCH", "4")))
+# How long startup waits for workers to report their preloaded models (0 = don't wait).
+SUMMARIZER_PRELOAD_WAIT_S = float(os.getenv("SUMMARIZER_PRELOAD_WAIT_S", "0"))
+
+
+class InferenceQueueFull(RuntimeError):
+    """The inference queue is at capacity; retry later."""
+
+
+class InferenceWorkerError(RuntimeError):
+    """A job failed on the worker pool (worker error, recycle or shutdown)."""
+
+
+class InferenceTimeout(InferenceWorkerError, TimeoutError):
+    """A job did not finish within its timeout."""
+
+
+def _worker_main(jobs, results, preload: list[str]) -> None:
+    """
+    Worker process loop: load models, then run summarize_many per batch.
+
+    Messages to the parent are (kind, pid, payload): ("ready", pid, loaded
+    refs), ("start", pid, job_ids), ("done", pid, (job_ids, outputs, error)).
+    """
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s | %(levelname)-7s | [worker] %(message)s",
+        datefmt="%H:%M:%S",
+    )
+    pid = os.getpid()
+    results.put(("ready", pid, local_summarizer.preload_models(preload)))
+    while True:
+        item = jobs.get()
+        if item is None:
+            break
+        job_ids, texts, summary_size, model_ref, decoding_profile = item
+        results.put(("start", pid, job_ids))
+        try:
+            outputs = local_summarizer.summarize_many(texts, summary_size, model_ref, decoding_profile)
+            results.put(("done", pid, (job_ids, outputs, None)))
+        except Exception as exc:
+            results.put(("done", pid, (job_ids, None, f"{type(exc).__name__}: {exc}")))
+
+
+class _WorkerPool:
+    """Owns the worker processes plus the dispatcher and result-collector threads."""
+
+    def __init__(self, workers: int, preload: list[str]):
+        self._ctx = mp.get_context("spawn")  # fork is unsafe with torch + threads
+        self._preload = list(preload)
+        self._jobs = self._ctx.Queue(maxsize=workers * 2)
+        self._results = self._ctx.Queue()
+        self._pending: "queue.Queue[tuple]" = queue.Queue(maxsize=SUMMARIZER_QUEUE_SIZE)
+        self._futures: dict[int, Future] = {}
+        self._lock = threading.Lock()
+        self._procs_lock = threading.Lock()  # respawn (collector) vs recycle (timed-out caller)
+        self._ready = threading.Condition(self._lock)
+        self._loaded: dict[int, list[str]] = {}  # pid -> refs the worker reported loaded
+        self._running: dict[int, list[int]] = {}  # pid -> job ids of the batch it is running
+        self._ids = itertools.count()
+        self._stop = threading.Event()
+        self._stats = {
+            "submitted": 0, "completed": 0, "failed": 0, "timeouts": 0, "rejected": 0, "batches": 0, "recycled": 0,
+        }
+
+        self._procs = [self._spawn() for _ in range(workers)]
+        threading.Thread(target=self._dispatch_loop, name="inference-dispatch", daemon=True).start()
+        threading.Thread(target=self._collect_loop, name="inference-collect", daemon=True).start()
+        logger.info("Inference   │ %d worker process(es) │ queue=%d", workers, SUMMARIZER_QUEUE_SIZE)
+
+    def _spawn(self):
+        proc = self._ctx.Process(
+            target=_worker_main,
+            args=(self._jobs, self._results, self._preload),
+            name="summarizer-worker",
+            daemon=True,
+        )
+        proc.start()
+        return proc
+
+    def submit(self, text: str, summary_size: str, model_ref: str | None, decoding_profile: str | None) -> tuple[int, Future]:
+        future: Future = Future()
+        job_id = next(self._ids)
+        with self._lock:
+            self._futures[job_id] = future
+        try:
+            self._pending.put_nowait((job_id, text, (summary_size, model_ref, decoding_profile)))
+        except queue.Full:
+            with self._lock:
+                self._futures.pop(job_id, None)
+                self._stats["rejected"] += 1
+            raise InferenceQueueFull(f"Inference queue full ({SUMMARIZER_QUEUE_SIZE} pending jobs)")
+        with self._lock:
+            self._stats["submitted"] += 1
+        return job_id, future
+
+    def forget(self, job_id: int) -> None:
+        """
+        Drop a timed-out job. If a worker is still running it, that worker is
+        terminated and respawned (it would otherwise stay busy until the job
+        finishes) and the other jobs of its batch fail immediately.
+        """
+        with self._lock:
+            future = self._futures.pop(job_id, None)
+            self._stats["timeouts"] += 1
+            pid = next((p for p, ids in self._running.items() if job_id in ids), None)
+            batch = self._running.pop(pid, []) if pid is not None else []
+            siblings = [self._futures.pop(i) for i in batch if i in self._futures]
+        if future is not None:
+            future.cancel()
+        if pid is not None:
+            self._recycle(pid)
+            for sibling in siblings:
+                if not sibling.done():
+                    sibling.set_exception(InferenceWorkerError("Inference worker recycled after a job timeout"))
+
+    def _recycle(self, pid: int) -> None:
+        with self._procs_lock:
+            for idx, proc in enumerate(self._procs):
+                if proc.pid == pid and not self._stop.is_set():
+                    logger.warning("Inference   │ worker pid=%s timed out │ terminating and respawning", pid)
+                    proc.terminate()
+                    proc.join(5)
+                    with self._lock:
+                        self._loaded.pop(pid, None)
+                        self._stats["recycled"] += 1
+                    self._procs[idx] = self._spawn()
+                    return
+
+    def _dispatch_loop(self) -> None:
+        wait_s = SUMMARIZER_BATCH_WAIT_MS / 1000.0
+        while not self._stop.is_set():
+            try:
+                first = self._pending.get(timeout=0.5)
+            except queue.Empty:
+                continue
+
+            batch = [first]
+            deadline = time.monotonic() + wait_s
+            while len(batch) < SUMMARIZER_MAX_DOCS_PER_BATCH * 4:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._pending.get(timeout=remaining))
+                except queue.Empty:
+                    break
+
+            groups: dict[tuple, list[tuple[int, str]]] = {}
+            for job_id, text, key in batch:
+                with self._lock:
+                    future = self._futures.get(job_id)
+                if future is None or not future.set_running_or_notify_cancel():
+                    continue
+                groups.setdefault(key, []).append((job_id, text))
+
+            for (summary_size, model_ref, decoding_profile), jobs in groups.items():
+                for start in range(0, len(jobs), SUMMARIZER_MAX_DOCS_PER_BATCH):
+                    chunk = jobs[start : start + SUMMARIZER_MAX_DOCS_PER_BATCH]
+                    self._jobs.put((
+                        [job_id for job_id, _ in chunk],
+                        [text for _, text in chunk],
+                        summary_size,
+                        model_ref,
+                        decoding_profile,
+                    ))
+                    with self._lock:
+                        self._stats["batches"] += 1
+
+    def _collect_loop(self) -> None:
+        while not self._stop.is_set():
+            try:
+                kind, pid, payload = self._results.get(timeout=1.0)
+            except queue.Empty:
+                self._respawn_dead()
+                continue
+            except (EOFError, OSError):
+                break
+
+            if kind == "ready":
+                with self._ready:
+                    self._loaded[pid] = list(payload)
+                    self._ready.notify_all()
+                logger.info("Inference   │ worker pid=%s ready │ models=%s", pid, ", ".join(payload) or "none")
+                continue
+            if kind == "start":
+                with self._lock:
+                    self._running[pid] = list(payload)
+                continue
+
+            job_ids, outputs, error = payload
+            with self._lock:
+                if self._running.get(pid) == job_ids:
+                    del self._running[pid]
+            for idx, job_id in enumerate(job_ids):
+                with self._lock:
+                    future = self._futures.pop(job_id, None)
+                    if future is not None:
+                        self._stats["failed" if error else "completed"] += 1
+                if future is None or future.done():
+                    continue
+                if error:
+                    future.set_exception(InferenceWorkerError(error))
+                else:
+                    future.set_result(outputs[idx])
+
+    def _respawn_dead(self) -> None:
+        with self._procs_lock:
+            for idx, proc in enumerate(self._procs):
+                if not proc.is_alive() and not self._stop.is_set():
+                    logger.warning("Inference   │ worker pid=%s exited (code=%s) │ respawning", proc.pid, proc.exitcode)
+                    with self._lock:
+                        self._loaded.pop(proc.pid, None)
+                        self._running.pop(proc.pid, None)
+                    self._procs[idx] = self._spawn()
+
+    def loaded_refs(self, wait: float = 0.0) -> list[str]:
+        """Refs every worker has reported loaded (waits up to `wait` s for all to report)."""
+        deadline = time.monotonic() + wait
+        with self._ready:
+            while True:
+                pids = [proc.pid for proc in self._procs]
+                reported = [self._loaded[pid] for pid in pids if pid in self._loaded]
+                remaining = deadline - time.monotonic()
+                if len(reported) == len(pids) or remaining <= 0:
+                    break
+                self._ready.wait(remaining)
+        if len(reported) < len(pids):
+            return []
+        return [ref for ref in self._preload if all(ref in refs for refs in reported)]
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "workers": len(self._procs),
+                "alive": sum(proc.is_alive() for proc in self._procs),
+                "queued": self._pending.qsize(),
+                "in_flight": len(self._futures),
+                "worker_status": [
+                    {
+                        "pid": proc.pid,
+                        "alive": proc.is_alive(),
+                        "ready": proc.pid in self._loaded,
+                        "models": self._loaded.get(proc.pid, []),
+                        "running_jobs": len(self._running.get(proc.pid, [])),
+                    }
+                    for proc in self._procs
+                ],
+                **self._stats,
+            }
+
+    def shutdown(self, timeout: float = 10.0) -> None:
+        self._stop.set()
+        for _ in self._procs:
+            try:
+                self._jobs.put_nowait(None)
+            except queue.Full:
+                pass
+        for proc in self._procs:
+            proc.join(timeout)
+            if proc.is_alive():
+                proc.terminate()
+        with self._lock:
+            futures, self._futures = list(self._futures.values()), {}
+        for future in futures:
+            if not future.done():
+                future.set_exception(InferenceWorkerError("Inference workers shut down"))
+
+
+_pool: _WorkerPool | None = None
+_pool_lock = threading.Lock()
+
+
+def start(preload: list[str] | None = None) -> _WorkerPool | None:
+    """Start the worker processes once (no-op when SUMMARIZER_WORKERS=0)."""
+    global _pool
+    if SUMMARIZER_WORKERS <= 0:
+        return None
+    with _pool_lock:
+        if _pool is None:
+            _pool = _WorkerPool(SUMMARIZER_WORKERS, preload or [])
+        return _pool
+
+
+def shutdown() -> None:
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.shutdown()
+
+
+def preload(model_refs: list[str]) -> list[str]:
+    """
+    Warm models in the workers (or in-process when workers are disabled).
+
+    In worker mode, returns the refs every worker has reported loaded within
+    SUMMARIZER_PRELOAD_WAIT_S; the rest may still be loading (see stats()).
+    """
+    if SUMMARIZER_WORKERS > 0:
+        return start(model_refs).loaded_refs(wait=SUMMARIZER_PRELOAD_WAIT_S)
+    return local_summarizer.preload_models(model_refs)
+
+
+def summarize_text(
+    text: str,
+    summary_size: str = "large",
+    model_ref: str | None = None,
+    decoding_profile: str | None = None,
+    timeout: float | None = None,
+) -> str | None:
+    """
+    Local-model summary, run on a worker process when configured.
+
+    Raises InferenceQueueFull when the queue is at capacity,
+    InferenceTimeout when the job exceeds `timeout` seconds and
+    InferenceWorkerError when the worker pool fails the job.
+    """
+    pool = start()
+    if pool is None:
+        return local_summarizer.summarize_text(text, summary_size, model_ref, decoding_profile)
+
+    job_id, future = pool.submit(text, summary_size, model_ref, decoding_profile)
+    try:
+        return future.result(timeout=timeout or SUMMARIZER_JOB_TIMEOUT_S)
+    except FutureTimeout:
+        pool.forget(job_id)
+        raise InferenceTimeout(f"Local summarizer job exceeded {timeout or SUMMARIZER_JOB_TIMEOUT_S:g}s")
+
+
+def stats() -> dict:
+    with _pool_lock:
+        pool = _pool
+    if pool is None:
+        return {"workers": 0, "mode": "in-process"}
+    return {"mode": "processes", **pool.stats()}
@@ -6,19 +6,26 @@ Features:
   • Groq first → Gemini fallback → OpenAI (ChatGPT) last resort
   • Logs prompt length + wall-clock response time
   • Returns (text, source, duration_ms)
+  • Opt-in persistent completion cache per call (generate(..., cache=True))
+  • Counts the prompt tokens each provider reports as served from its
+    prompt-prefix cache (prefix_cache_stats(), shown in /health); prompts
+    from app.core.prompts start with a precompiled prefix so they hit it
 """
 
 import logging
 import os
+import threading
 import time
 
 from app.core.config import (
     groq_client,
     gemini_model,
+    GEMINI_MODEL,
     LLM_TIMEOUT,
     LLM_MAX_TOKENS,
     LLM_TEMPERATURE,
 )
+from app.services import completion_cache
 
 try:
     from openai import OpenAI
@@ -28,9 +35,16 @@ except Exception:  # pragma: no cover - optional dependency in local setups
 logger = logging.getLogger("casecut")
 
 OPENAI_MODEL = os.getenv("OPENAI_MODEL", "gpt-4.1-mini")
+GROQ_MODEL = "llama-3.3-70b-versatile"
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY", "").strip()
 openai_client = OpenAI(api_key=OPENAI_API_KEY) if (OpenAI and OPENAI_API_KEY) else None
 
+PROVIDER_MODELS = {
+    "groq": GROQ_MODEL,
+    "gemini": GEMINI_MODEL,
+    "openai": OPENAI_MODEL,
+}
+
 SCRIPT_RANGES = {
     "english": [(0x0041, 0x005A), (0x0061, 0x007A)],
     "hindi": [(0x0900, 0x097F)],
@@ -60,6 +74,42 @@ LANGUAGE_REWRITE_HINTS = {
 }
 
 
+_usage_lock = threading.Lock()
+_usage = {
+    name: {"requests": 0, "prompt_tokens": 0, "cached_tokens": 0, "cache_hits": 0}
+    for name in PROVIDER_MODELS
+}
+
+
+def _record_usage(provider_name: str, prompt_tokens, cached_tokens) -> None:
+    """Accumulate the provider-reported prompt / cached-prefix token counts."""
+    cached = int(cached_tokens or 0)
+    with _usage_lock:
+        stats = _usage[provider_name]
+        stats["requests"] += 1
+        stats["prompt_tokens"] += int(prompt_tokens or 0)
+        stats["cached_tokens"] += cached
+        stats["cache_hits"] += cached > 0
+
+
+def _record_chat_usage(provider_name: str, resp) -> None:
+    """OpenAI-compatible usage (OpenAI, Groq): prompt_tokens_details.cached_tokens."""
+    usage = getattr(resp, "usage", None)
+    if usage is None:
+        return
+    details = getattr(usage, "prompt_tokens_details", None)
+    _record_usage(provider_name, getattr(usage, "prompt_tokens", 0), getattr(details, "cached_tokens", 0))
+
+
+def prefix_cache_stats() -> dict:
+    """Per-provider prompt-prefix cache counters with the cached-token ratio."""
+    with _usage_lock:
+        result = {name: dict(stats) for name, stats in _usage.items()}
+    for stats in result.values():
+        stats["cached_ratio"] = round(stats["cached_tokens"] / stats["prompt_tokens"], 3) if stats["prompt_tokens"] else 0.0
+    return result
+
+
 def _call_openai(prompt: str) -> str:
     if not openai_client:
         raise RuntimeError("OpenAI is not configured")
@@ -71,6 +121,7 @@ def _call_openai(prompt: str) -> str:
         max_tokens=LLM_MAX_TOKENS,
         timeout=LLM_TIMEOUT,
     )
+    _record_chat_usage("openai", resp)
     return (resp.choices[0].message.content or "").strip()
 
 
@@ -79,11 +130,12 @@ def _call_groq(prompt: str) -> str:
         raise RuntimeError("Groq is not configured")
 
     resp = groq_client.chat.completions.create(
-        model="llama-3.3-70b-versatile",
+        model=GROQ_MODEL,
         messages=[{"role": "user", "content": prompt}],
         max_tokens=LLM_MAX_TOKENS,
         temperature=LLM_TEMPERATURE,
     )
+    _record_chat_usage("groq", resp)
     return (resp.choices[0].message.content or "").strip()
 
 
@@ -95,18 +147,40 @@ def _call_gemini(prompt: str) -> str:
         prompt,
         request_options={"timeout": LLM_TIMEOUT},
     )
+    usage = getattr(resp, "usage_metadata", None)
+    if usage is not None:
+        _record_usage(
+            "gemini",
+            getattr(usage, "prompt_token_count", 0),
+            getattr(usage, "cached_content_token_count", 0),
+        )
     return (resp.text or "").strip()
 
 
-def generate(prompt: str) -> tuple[str, str, int]:
+def _cache_key(provider_name: str, prompt: str) -> str:
+    return completion_cache.make_key(
+        provider_name,
+        PROVIDER_MODELS[provider_name],
+        prompt,
+        LLM_TEMPERATURE,
+        LLM_MAX_TOKENS,
+    )
+
+
+def generate(prompt: str, cache: bool = False) -> tuple[str, str, int]:
     """
     Send prompt to LLM providers with fallback.
 
+    Args:
+        cache: Reuse/store the completion in the persistent completion cache.
+               Only for prompts whose answer may be shared across requests.
+
     Returns:
-        (response_text, source, duration_ms)
+        (response_text, source, duration_ms) — source gets a "+cache"
+        suffix when served from the completion cache.
     """
     prompt_len = len(prompt)
-    logger.info("LLM req    │ prompt_len=%d chars", prompt_len)
+    logger.info("LLM req    │ prompt_len=%d chars │ cache=%s", prompt_len, cache)
 
     start = time.perf_counter()
     last_error = None
@@ -116,19 +190,29 @@ def generate(prompt: str) -> tuple[str, str, int]:
         ("gemini", _call_gemini),
         ("openai", _call_openai),
     ]
+    providers = [
+        (name, call) for name, call in providers
+        if (name == "groq" and groq_client)
+        or (name == "gemini" and gemini_model)
+        or (name == "openai" and openai_client)
+    ]
 
-    for provider_name, provider_call in providers:
-        if provider_name == "openai" and not openai_client:
-            continue
-        if provider_name == "groq" and not groq_client:
-            continue
-        if provider_name == "gemini" and not gemini_model:
-            continue
+    if cache:
+        # Any provider in the fallback chain may have produced the entry.
+        for provider_name, _ in providers:
+            cached = completion_cache.get(_cache_key(provider_name, prompt))
+            if cached is not None:
+                dur = int((time.perf_counter() - start) * 1000)
+                logger.info("LLM cache  │ hit │ source=%s │ %dms │ resp_len=%d", provider_name, dur, len(cached))
+                return cached, f"{provider_name}+cache", dur
 
+    for provider_name, provider_call in providers:
         try:
             text = provider_call(prompt)
             dur = int((time.perf_counter() - start) * 1000)
             logger.info("LLM ok     │ source=%s │ %dms │ resp_len=%d", provider_name, dur, len(text))
+            if cache and text:
+                completion_cache.put(_cache_key(provider_name, prompt), provider_name, PROVIDER_MODELS[provider_name], text)
             return text, provider_name, dur
         except Exception as err:
             last_error = err
@@ -164,7 +248,7 @@ def _rewrite_to_target_length(text: str, language: str, target_words: int) -> st
         "Do not add new facts.\n\n"
         f"ORIGINAL ANSWER:\n{text}"
     )
-    adjusted_text, source, _ = generate(prompt)
+    adjusted_text, source, _ = generate(prompt, cache=True)
     if source == "error" or not adjusted_text.strip():
         return text
     return adjusted_text
@@ -196,7 +280,7 @@ def enforce_output_language(text: str, language: str) -> tuple[str, bool]:
     )
     rewrite_prompt += f"ORIGINAL ANSWER:\n{text}"
 
-    rewritten_text, source, _ = generate(rewrite_prompt)
+    rewritten_text, source, _ = generate(rewrite_prompt, cache=True)
     if source == "error" or not rewritten_text.strip():
         return text, False
 
@@ -4,19 +4,33 @@ Qdrant service — vector search with retry logic + minimum similarity.
 Features:
   • 3 retries with exponential backoff on transient failures
   • Minimum similarity threshold (drops noisy results)
-  • Optional topic metadata filter
+  • Optional topic / year-range / court-tier metadata filters (server-side)
   • Logs chunk count retrieved
+  • RETRIEVAL_MODE=two_stage: candidate cases from the case-level collection
+    (Qwen3 vectors, cronjobs/upload_processed_to_qdrant.py), then a chunk
+    search restricted to those doc_ids; falls back to plain chunk search
+  • Collections with the reduced-dimension layout (index_registry.MRL_VECTOR
+    + FULL_VECTOR) are searched on the small vector for MRL_OVERSAMPLE x
+    limit candidates, then rescored on the full vector in the same request
+  • Section boost: when the query names statute sections, a second search
+    filtered on the canonical `section_ids` payload index reserves up to
+    SECTION_BOOST_SHARE of the results for chunks citing those sections
 """
 
+import os
+import threading
 import time
 import logging
 
-from qdrant_client.models import FieldCondition, MatchAny, Filter
+from qdrant_client.models import FieldCondition, MatchAny, Filter, Prefetch, Range
 
+from app.core import index_registry
 from app.core.config import (
     qdrant_client,
     embedder,
     COLLECTION,
+    EMBED_DIM,
+    EMBED_MODEL,
     QDRANT_RETRY_ATTEMPTS,
     QDRANT_RETRY_DELAY,
     MIN_SIMILARITY,
@@ -24,46 +38,244 @@ from app.core.config import (
 
 logger = logging.getLogger("casecut")
 
+# "chunks" (default) searches chunk vectors only; "two_stage" narrows the
+# chunk search to the TWO_STAGE_CASES best cases from CASE_COLLECTION.
+RETRIEVAL_MODE = os.getenv("RETRIEVAL_MODE", "chunks").strip().lower()
+CASE_COLLECTION = os.getenv("PROCESSED_QDRANT_COLLECTION", "legal_cases_sota_processed")
+CASE_EMBED_MODEL = os.getenv("PROCESSED_EMBED_MODEL", "Qwen/Qwen3-Embedding-0.6B")
+TWO_STAGE_CASES = int(os.getenv("TWO_STAGE_CASES", "20"))
+# First-pass candidates per requested result on reduced-dimension layouts.
+MRL_OVERSAMPLE = max(1, int(os.getenv("MRL_OVERSAMPLE", "4")))
+
+# Share of the result limit reserved for chunks citing the query's sections.
+SECTION_BOOST_SHARE = float(os.getenv("SECTION_BOOST_SHARE", "0.5"))
+
+# collection name -> mrl_dim (0 = single vector); builds never change layout.
+_layouts: dict[str, int] = {}
+
+_case_embedder = None
+_case_embedder_lock = threading.Lock()
+
+# How often (seconds) collection_fingerprint() re-checks Qdrant.
+FINGERPRINT_TTL = float(os.getenv("COLLECTION_FINGERPRINT_TTL", "30"))
+_fingerprint = {"value": None, "checked_at": 0.0}
+
+# Collections known to have section_ids, and when the others were last checked.
+_section_collections: set[str] = set()
+_section_checked: dict[str, float] = {}
+
 
 def embed_query(query: str) -> list[float]:
-    """Encode a text query into a 384-dim vector."""
+    """Encode a text query with the chunk embedder (EMBED_DIM dims)."""
     return embedder.encode(query).tolist()
 
 
+def query_collection(vector_dim: int = EMBED_DIM) -> str:
+    """
+    Chunk collection compatible with EMBED_MODEL / vector_dim behind the
+    COLLECTION alias. Raises index_registry.IndexMismatchError if none is.
+    """
+    return index_registry.resolve_query_collection(qdrant_client, COLLECTION, EMBED_MODEL, vector_dim)
+
+
+def _get_case_embedder():
+    """Load the case-level embedder on first two-stage query (it is large)."""
+    global _case_embedder
+    with _case_embedder_lock:
+        if _case_embedder is None:
+            from sentence_transformers import SentenceTransformer
+
+            logger.info("Qdrant     │ loading case embedder │ %s", CASE_EMBED_MODEL)
+            try:
+                _case_embedder = SentenceTransformer(CASE_EMBED_MODEL, local_files_only=True)
+            except Exception:
+                _case_embedder = SentenceTransformer(CASE_EMBED_MODEL)
+        return _case_embedder
+
+
+def embed_case_query(query: str) -> list[float]:
+    """Encode a query for the case-level collection (uses the model's query prompt)."""
+    model = _get_case_embedder()
+    prompts = getattr(model, "prompts", None) or {}
+    kwargs = {"prompt_name": "query"} if "query" in prompts else {}
+    return model.encode(query, **kwargs).tolist()
+
+
+def collection_fingerprint() -> str | None:
+    """
+    Cheap change marker for COLLECTION, used to invalidate result caches.
+
+    Based on the collection behind the alias, its point count, its
+    optimizer status, and the registry's build/update stamp (an in-place
+    re-index of the same size changes only the latter two), so an index swap
+    also invalidates; refreshed at most every FINGERPRINT_TTL seconds.
+    Returns None if Qdrant is unreachable.
+    """
+    now = time.monotonic()
+    if _fingerprint["value"] is not None and now - _fingerprint["checked_at"] < FINGERPRINT_TTL:
+        return _fingerprint["value"]
+    try:
+        collection = query_collection()
+        info = qdrant_client.get_collection(collection)
+        entry = index_registry.get(collection) or {}
+        stamp = entry.get("updated_at") or entry.get("built_at") or "-"
+        _fingerprint["value"] = f"{collection}:{info.points_count}:{info.status}:{stamp}"
+    except Exception as e:
+        logger.warning("Qdrant     │ fingerprint check failed │ %s", e)
+        _fingerprint["value"] = None
+    _fingerprint["checked_at"] = now
+    return _fingerprint["value"]
+
+
+def has_section_ids() -> bool:
+    """
+    Whether the live chunk collection carries indexed `section_ids`.
+
+    Collections uploaded before section ids existed have no such payload, so
+    a section-filtered search finds nothing there. A positive answer is kept
+    per collection (payloads are only added); a negative one is re-checked
+    after FINGERPRINT_TTL seconds.
+    """
+    try:
+        collection = query_collection()
+    except Exception:
+        return False
+    if collection in _section_collections:
+        return True
+    now = time.monotonic()
+    if now - _section_checked.get(collection, float("-inf")) < FINGERPRINT_TTL:
+        return False
+    _section_checked[collection] = now
+    try:
+        index = qdrant_client.get_collection(collection).payload_schema.get("section_ids")
+    except Exception as e:
+        logger.warning("Qdrant     │ payload schema check failed │ %s", e)
+        return False
+    if index is not None and (index.points or 0) > 0:
+        _section_collections.add(collection)
+        return True
+    return False
+
+
+def _mrl_dim(collection: str) -> int:
+    if collection not in _layouts:
+        _layouts[collection] = index_registry.mrl_dim_of(qdrant_client, collection)
+    return _layouts[collection]
+
+
+def _vector_query(collection: str, query_vector: list[float], query_filter, limit: int, with_payload) -> list:
+    """Nearest points, using the prefetch-then-rescore path on MRL layouts."""
+    mrl_dim = _mrl_dim(collection)
+    if not mrl_dim:
+        return qdrant_client.search(
+            collection_name=collection,
+            query_vector=query_vector,
+            query_filter=query_filter,
+            limit=limit,
+            with_payload=with_payload,
+        )
+    return qdrant_client.query_points(
+        collection_name=collection,
+        prefetch=Prefetch(
+            query=query_vector[:mrl_dim],
+            using=index_registry.MRL_VECTOR,
+            filter=query_filter,
+            limit=limit * MRL_OVERSAMPLE,
+        ),
+        query=query_vector,
+        using=index_registry.FULL_VECTOR,
+        limit=limit,
+        with_payload=with_payload,
+    ).points
+
+
+def build_filter(
+    topic: str = "all",
+    year_from: int | None = None,
+    year_to: int | None = None,
+    court_tiers: list[str] | None = None,
+    doc_ids: list[str] | None = None,
+    section_ids: list[str] | None = None,
+) -> Filter | None:
+    """
+    Build a Qdrant payload filter from the optional metadata constraints.
+
+    Year and court-tier conditions use the normalized fields written at
+    ingest time (`year`, `court_tier`), so they run against payload indexes.
+    doc_ids restricts chunk search to the given judgments (two-stage mode);
+    section_ids to chunks citing any of the canonical sections.
+    """
+    must = []
+    if topic and topic != "all":
+        must.append(FieldCondition(key="topics", match=MatchAny(any=[topic])))
+    if year_from is not None or year_to is not None:
+        must.append(FieldCondition(key="year", range=Range(gte=year_from, lte=year_to)))
+    if court_tiers:
+        must.append(FieldCondition(key="court_tier", match=MatchAny(any=list(court_tiers))))
+    if doc_ids:
+        must.append(FieldCondition(key="doc_id", match=MatchAny(any=list(doc_ids))))
+    if section_ids:
+        must.append(FieldCondition(key="section_ids", match=MatchAny(any=list(section_ids))))
+    return Filter(must=must) if must else None
+
+
+def _with_section_hits(results: list, section_hits: list, limit: int) -> list:
+    """Top results with the section-matching hits guaranteed a place, by score."""
+    ids = {r.id for r in section_hits}
+    rest = [r for r in results if r.id not in ids][: max(0, limit - len(section_hits))]
+    return sorted(section_hits + rest, key=lambda r: r.score, reverse=True)
+
+
 def search(
     query_vector: list[float],
     topic: str = "all",
     limit: int = 10,
+    year_from: int | None = None,
+    year_to: int | None = None,
+    court_tiers: list[str] | None = None,
+    doc_ids: list[str] | None = None,
+    section_ids: list[str] | None = None,
 ) -> list:
     """
     Search Qdrant with retry logic.
 
+    section_ids (canonical, e.g. "IPC:302") adds the section-filtered search
+    whose hits are kept ahead of weaker unfiltered ones.
+
     Returns list of ScoredPoint objects (filtered by MIN_SIMILARITY).
     """
-    # Optional topic filter
-    search_filter = None
-    if topic and topic != "all":
-        search_filter = Filter(
-            must=[FieldCondition(key="topics", match=MatchAny(any=[topic]))]
-        )
+    search_filter = build_filter(topic, year_from, year_to, court_tiers, doc_ids)
+    section_limit = max(1, int(limit * SECTION_BOOST_SHARE)) if section_ids else 0
+    try:
+        collection = query_collection(len(query_vector))
+    except index_registry.IndexMismatchError as e:
+        logger.error("Qdrant     │ index/embedder mismatch │ %s", e)
+        return []
 
     last_err = None
     for attempt in range(1, QDRANT_RETRY_ATTEMPTS + 1):
         try:
-            results = qdrant_client.search(
-                collection_name=COLLECTION,
-                query_vector=query_vector,
-                query_filter=search_filter,
-                limit=limit,
-                with_payload=True,
-            )
+            results = _vector_query(collection, query_vector, search_filter, limit, with_payload=True)
+            section_hits = []
+            if section_limit:
+                section_hits = _vector_query(
+                    collection,
+                    query_vector,
+                    build_filter(topic, year_from, year_to, court_tiers, doc_ids, section_ids),
+                    section_limit,
+                    with_payload=True,
+                )
+                results = _with_section_hits(results, section_hits, limit)
 
             # Apply minimum similarity threshold
             filtered = [r for r in results if r.score >= MIN_SIMILARITY]
 
             logger.info(
-                "Qdrant     │ attempt=%d │ raw=%d │ filtered=%d (min_sim=%.2f) │ topic=%s",
+                "Qdrant     │ attempt=%d │ raw=%d │ filtered=%d (min_sim=%.2f) │ topic=%s │ years=%s-%s │ courts=%s │ docs=%s │ section_hits=%s",
                 attempt, len(results), len(filtered), MIN_SIMILARITY, topic,
+                year_from or "*", year_to or "*", ",".join(court_tiers or []) or "all",
+                len(doc_ids) if doc_ids else "all",
+                len(section_hits) if section_limit else "-",
             )
             return filtered
 
@@ -78,3 +290,62 @@ def search(
 
     logger.error("Qdrant     │ All %d attempts failed │ %s", QDRANT_RETRY_ATTEMPTS, last_err)
     return []
+
+
+def case_candidates(
+    query: str,
+    topic: str = "all",
+    limit: int = TWO_STAGE_CASES,
+    year_from: int | None = None,
+    year_to: int | None = None,
+    court_tiers: list[str] | None = None,
+) -> list[str]:
+    """
+    Stage 1: ids of the best-matching judgments from CASE_COLLECTION.
+
+    Uses the same metadata filter as chunk search (the case payload carries
+    the same normalized fields). Returns [] on any failure.
+    """
+    try:
+        results = _vector_query(
+            CASE_COLLECTION,
+            embed_case_query(query),
+            build_filter(topic, year_from, year_to, court_tiers),
+            limit,
+            with_payload=["case_id"],
+        )
+    except Exception as e:
+        logger.warning("Qdrant     │ case stage failed │ %s", e)
+        return []
+    return [r.payload["case_id"] for r in results if (r.payload or {}).get("case_id")]
+
+
+def retrieve(
+    query: str,
+    query_vector: list[float],
+    topic: str = "all",
+    limit: int = 10,
+    year_from: int | None = None,
+    year_to: int | None = None,
+    court_tiers: list[str] | None = None,
+    section_ids: list[str] | None = None,
+) -> list:
+    """
+    Chunk retrieval honoring RETRIEVAL_MODE.
+
+    In two_stage mode the chunk search only scores chunks of the candidate
+    judgments; if stage 1 or the restricted search finds nothing, the plain
+    chunk search runs instead. section_ids boosts chunks citing those
+    canonical sections (see search).
+    """
+    if RETRIEVAL_MODE == "two_stage":
+        doc_ids = case_candidates(query, topic, TWO_STAGE_CASES, year_from, year_to, court_tiers)
+        if doc_ids:
+            results = search(
+                query_vector, topic, limit, year_from, year_to, court_tiers,
+                doc_ids=doc_ids, section_ids=section_ids,
+            )
+            if results:
+                return results
+        logger.info("Qdrant     │ two-stage empty (cases=%d) │ falling back to chunk search", len(doc_ids))
+    return search(query_vector, topic, limit, year_from, year_to, court_tiers, section_ids=section_ids)
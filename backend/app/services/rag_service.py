@@ -3,25 +3,50 @@ RAG service — orchestrates the full retrieval-augmented generation pipeline.
 
   embed query → search Qdrant → rank → build prompt → LLM generate
 
+Queries that only name a provision ("Section 438 CrPC") are answered from
+the statute index instead (exact key lookup, no embedding or vector search).
+
 This is a thin coordinator calling other services.
 Includes: confidence scoring, conversation context, PDF chat, strategic mode.
 """
 
+import json
 import logging
+import os
 import re
+import threading
+import uuid
+from datetime import datetime
 
-from app.services import llm_service, qdrant_service
-from app.services.reranker_service import rerank_with_llm
+from app.services import history_service, llm_service, qdrant_service, statute_service
+from app.services.reranker_service import decide_rerank, rerank_with_llm
 from app.core.prompts import (
     build_rag_prompt,
     build_pdf_chat_prompt,
-    build_response_profile,
     ROLE_RETRIEVAL_BIAS,
 )
-from app.models.ranker import rank_cases
+from app.utils.statutes import canonical_section_ids
+from app.models.ranker import (
+    case_features,
+    extract_query_sections,
+    extract_query_topics,
+    rank_cases,
+    role_weights,
+)
 
 logger = logging.getLogger("casecut")
 
+# Per-response ranking features, joined with /feedback by the offline
+# weight trainer (cronjobs/train_ranker_weights.py). Rotated to
+# retrieval_log.<timestamp>.jsonl past RETRIEVAL_LOG_MAX_MB; only the newest
+# RETRIEVAL_LOG_BACKUPS rotated files are kept.
+RETRIEVAL_LOG_FILE = os.path.join(
+    os.path.dirname(__file__), "..", "..", "data", "retrieval_log.jsonl"
+)
+RETRIEVAL_LOG_MAX_MB = float(os.getenv("RETRIEVAL_LOG_MAX_MB", "50"))
+RETRIEVAL_LOG_BACKUPS = int(os.getenv("RETRIEVAL_LOG_BACKUPS", "5"))
+_retrieval_log_lock = threading.Lock()
+
 
 def sanitize_query(query: str) -> str:
     """Strip prompt-injection patterns and cap length."""
@@ -62,6 +87,90 @@ def _compute_confidence(sim_scores: list[float], num_results: int) -> dict:
         }
 
 
+def _log_retrieval(response_id: str, query: str, role: str, reranker: str, cases: list[dict]) -> None:
+    """Append the features of the cases shown for one response."""
+    entry = {
+        "response_id": response_id,
+        "query": query,
+        "role": role,
+        "reranker": reranker,
+        "cases": [
+            {"id": c["id"], "rank": i, "features": c.get("features", {})}
+            for i, c in enumerate(cases)
+        ],
+        "timestamp": datetime.now().isoformat(),
+    }
+    try:
+        os.makedirs(os.path.dirname(RETRIEVAL_LOG_FILE), exist_ok=True)
+        with _retrieval_log_lock:
+            _rotate_retrieval_log()
+            with open(RETRIEVAL_LOG_FILE, "a", encoding="utf-8") as f:
+                f.write(json.dumps(entry, ensure_ascii=False, default=str) + "\n")
+    except Exception as e:
+        logger.warning("Retrieval log write failed │ %s", e)
+
+
+def _rotate_retrieval_log() -> None:
+    """Move the log aside once it passes RETRIEVAL_LOG_MAX_MB (caller holds the lock)."""
+    try:
+        size = os.path.getsize(RETRIEVAL_LOG_FILE)
+    except OSError:
+        return
+    if size < RETRIEVAL_LOG_MAX_MB * 1024 * 1024:
+        return
+    base, ext = os.path.splitext(RETRIEVAL_LOG_FILE)
+    os.replace(RETRIEVAL_LOG_FILE, f"{base}.{datetime.now().strftime('%Y%m%d%H%M%S%f')}{ext}")
+    directory, prefix = os.path.dirname(RETRIEVAL_LOG_FILE), os.path.basename(base) + "."
+    rotated = sorted(n for n in os.listdir(directory) if n.startswith(prefix) and n.endswith(ext))
+    for name in rotated[: max(0, len(rotated) - RETRIEVAL_LOG_BACKUPS)]:
+        os.remove(os.path.join(directory, name))
+    logger.info("Retrieval log rotated │ %.1f MB │ kept %d", size / 1024 / 1024, min(len(rotated), RETRIEVAL_LOG_BACKUPS))
+
+
+# A query made only of these words continues the previous answer ("explain
+# more", "why?", "simplify the second case") rather than asking something new.
+_FOLLOW_UP_WORDS = {
+    "a", "about", "above", "again", "an", "and", "answer", "bit", "brief", "briefly", "can",
+    "case", "cases", "clarify", "continue", "could", "detail", "detailed", "details", "do",
+    "does", "elaborate", "example", "examples", "expand", "explain", "first", "further", "give",
+    "go", "how", "in", "it", "its", "judgment", "judgments", "language", "last", "little", "me",
+    "mean", "means", "more", "of", "on", "one", "please", "point", "points", "second", "simple",
+    "simpler", "simplify", "so", "summarise", "summarize", "tell", "terms", "that", "the",
+    "them", "these", "third", "this", "those", "what", "why", "with", "words", "you",
+}
+_FOLLOW_UP_MAX_WORDS = 8
+# ...unless it asks for additional results ("more cases", "give me similar
+# judgments"), which needs a new search.
+_MORE_RESULTS = re.compile(
+    r"\b(?:more|other|another|similar|additional|different|new)\s+"
+    r"(?:(?:such|relevant|related|similar)\s+)?(?:cases?|judgments?|examples?)\b"
+)
+
+
+def _is_follow_up(query: str) -> bool:
+    """True for short follow-ups that name nothing new (numbers never match)."""
+    lower = (query or "").lower()
+    words = re.findall(r"[a-z0-9']+", lower)
+    return (
+        0 < len(words) <= _FOLLOW_UP_MAX_WORDS
+        and all(w in _FOLLOW_UP_WORDS for w in words)
+        and not _MORE_RESULTS.search(lower)
+    )
+
+
+def _case_context(response_cases: list[dict]) -> str:
+    """Prompt context block for response-format cases."""
+    return "\n---\n".join(
+        f"[Case from {c['court']}] "
+        f"(File: {c.get('file', 'N/A')}) "
+        f"(IPC: {', '.join(c['ipc_sections'][:3]) or 'N/A'}) "
+        f"(Date: {c.get('date', 'N/A')}) "
+        f"(Outcome: {c['outcome']}) "
+        f"(Source: {c.get('source_url', 'N/A')})\n{c['text']}"
+        for c in response_cases
+    )
+
+
 def _infer_intent(query: str) -> str:
     """Infer a coarse response intent from user phrasing."""
     q = (query or "").lower()
@@ -85,26 +194,73 @@ def run_query(
     k: int = 5,
     language: str = "english",
     conversation_history: list[dict] | None = None,
+    year_from: int | None = None,
+    year_to: int | None = None,
+    court_tiers: list[str] | None = None,
+    history_summary: str = "",
+    previous: dict | None = None,
 ) -> dict:
     """
     Full RAG pipeline.
 
+    year_from / year_to / court_tiers are applied as Qdrant payload filters
+    before ranking (e.g. "Supreme Court only, after 2015"). history_summary
+    is the rolling summary of turns before conversation_history; previous is
+    the last retrieval of a server-side session ({cases, confidence,
+    statute_ids}), reused without searching when the query is a follow-up.
+
     Returns:
         {cases, summary, source, ranked, total_retrieved, llm_time_ms, confidence}
     """
     clean_query = sanitize_query(query)
     logger.info("RAG start  │ role=%s │ topic=%s │ lang=%s │ k=%d │ '%s'", role, topic, language, k, clean_query[:80])
 
+    # 0 — Follow-up on a session ("explain more"): answer from the previous cases
+    if previous and previous.get("cases") and _is_follow_up(clean_query):
+        return _answer_from_previous(clean_query, previous, role, language, conversation_history, history_summary)
+
+    # 0b — Statute fast path: named provisions resolve by key lookup
+    provisions = statute_service.match_query(clean_query)
+    if provisions and statute_service.is_provision_only(clean_query):
+        return _answer_from_statutes(
+            clean_query, provisions, role, k, language, conversation_history, history_summary,
+            topic=topic, year_from=year_from, year_to=year_to, court_tiers=court_tiers,
+        )
+
     # 1 — Embed query
     q_vector = qdrant_service.embed_query(clean_query)
 
     # 2 — Vector search (with retry + min similarity)
     #     Retrieve more candidates (up to 20) so the LLM reranker has
-    #     a richer pool to evaluate for legal relevance.
-    retrieval_limit = max(k * 4, 20)
-    results = qdrant_service.search(q_vector, topic=topic, limit=retrieval_limit)
+    #     a richer pool to evaluate for legal relevance. When the query
+    #     names statute sections, chunks citing them (canonical ids, so
+    #     "103 BNS" also finds "302 IPC") are boosted server-side and a
+    #     smaller pool suffices — only if the live collection has
+    #     section_ids at all (older uploads don't).
+    section_ids = canonical_section_ids(clean_query)
+    if section_ids and not qdrant_service.has_section_ids():
+        section_ids = []
+    retrieval_limit = max(k * 2, 10) if section_ids else max(k * 4, 20)
+    results = qdrant_service.retrieve(
+        clean_query,
+        q_vector,
+        topic=topic,
+        limit=retrieval_limit,
+        year_from=year_from,
+        year_to=year_to,
+        court_tiers=court_tiers,
+        section_ids=section_ids,
+    )
 
     if not results:
+        # Without filters an empty search means the index has nothing better
+        # than the statute text; with filters it means nothing matched them,
+        # and the statute index must not answer with cases outside them.
+        filtered = (topic and topic != "all") or year_from is not None or year_to is not None or court_tiers
+        if provisions and not filtered:
+            return _answer_from_statutes(
+                clean_query, provisions, role, k, language, conversation_history, history_summary,
+            )
         return {
             "cases": [],
             "summary": "No matching cases found in the legal database. Try a different query or topic filter.",
@@ -125,7 +281,12 @@ def run_query(
                 "file": r.payload.get("file", ""),
                 "court": r.payload.get("court", "Unknown"),
                 "date": r.payload.get("date", ""),
+                "date_iso": r.payload.get("date_iso"),
+                "year": r.payload.get("year"),
+                "date_epoch_days": r.payload.get("date_epoch_days"),
+                "court_tier": r.payload.get("court_tier", ""),
                 "ipc_sections": r.payload.get("ipc_sections", []),
+                "section_ids": r.payload.get("section_ids", []),
                 "topics": r.payload.get("topics", []),
                 "outcome": r.payload.get("outcome", "unknown"),
                 "page_number": r.payload.get("page_number", ""),
@@ -140,40 +301,55 @@ def run_query(
     # 4 — Compute retrieval confidence
     confidence = _compute_confidence(sim_scores, len(results))
 
-    # 5 — LLM Reranker (with feature-based fallback)
-    #     The LLM reranker evaluates each passage for legal relevance,
-    #     IPC section alignment, court reasoning, and outcome matching.
-    #     Falls back to the feature-based ranker if the LLM call fails.
+    # 5 — Reranking policy → LLM Reranker (with feature-based fallback)
+    #     The feature ranker always runs (cheap). The LLM reranker evaluates
+    #     each passage for legal relevance, IPC alignment, court reasoning
+    #     and outcome matching, but only when the policy finds the candidate
+    #     set ambiguous. Falls back to the feature ranking if the LLM fails.
     bias = ROLE_RETRIEVAL_BIAS.get(role, {})
-    custom_weights = None
-    if bias.get("court_weight_boost"):
-        custom_weights = {
-            "semantic": 0.40,
-            "ipc": 0.20,
-            "topic": 0.15,
-            "court": 0.15 + bias["court_weight_boost"],
-            "recency": 0.10 - bias["court_weight_boost"],
-        }
-
-    top_cases, used_llm_reranker = rerank_with_llm(
-        query=clean_query,
-        cases=cases,
-        top_k=k,
-        fallback_ranker=rank_cases,
-        similarity_scores=sim_scores,
-        custom_weights=custom_weights,
-    )
+    custom_weights = role_weights(role, bias.get("court_weight_boost", 0.0))
+    feature_ranked = rank_cases(cases, clean_query, similarity_scores=sim_scores, weights=custom_weights)
+
+    similarity_top_id = cases[sim_scores.index(max(sim_scores))]["id"]
+    policy = decide_rerank(confidence, feature_ranked, k, similarity_top_id)
+
+    if policy["use_llm"]:
+        top_cases, used_llm_reranker = rerank_with_llm(
+            query=clean_query,
+            cases=cases,
+            top_k=k,
+            fallback_ranker=rank_cases,
+            similarity_scores=sim_scores,
+            custom_weights=custom_weights,
+        )
+        reranker = "llm" if used_llm_reranker else "feature"
+    else:
+        top_cases = feature_ranked[:k]
+        reranker = f"skipped:{policy['reason']}"
 
     # 6 — Format response cases with enhanced citation metadata
+    #     Features are recomputed for LLM-reranked cases so every response
+    #     logs the same feature vector the trainer calibrates on.
+    sim_by_id = {case["id"]: sim for case, sim in zip(cases, sim_scores)}
+    query_sections = extract_query_sections(clean_query)
+    query_topics = extract_query_topics(clean_query)
+
     response_cases = []
     for c in top_cases:
         p = c.get("payload", {})
+        features = c.get("features") or {
+            name: round(v, 3)
+            for name, v in case_features(p, query_sections, query_topics, sim_by_id.get(c["id"], 0.5)).items()
+        }
         response_cases.append({
             "id": c["id"],
             "text": p.get("text", "")[:500],
             "court": p.get("court", "Unknown"),
+            "court_tier": p.get("court_tier", ""),
             "date": p.get("date", ""),
+            "year": p.get("year"),
             "ipc_sections": p.get("ipc_sections", []),
+            "section_ids": p.get("section_ids", []),
             "topics": p.get("topics", []),
             "outcome": p.get("outcome", ""),
             "file": p.get("file", ""),
@@ -183,52 +359,223 @@ def run_query(
             "chunk_id": p.get("chunk_id", ""),
             "source_url": p.get("source_url", ""),
             "rank_score": c.get("rank_score", 0),
-            "similarity": round(sim_scores[0], 3) if sim_scores else 0,
+            "similarity": round(sim_by_id.get(c["id"], 0), 3),
+            "features": features,
         })
 
-    # 7 — Build context block with richer citations
-    context = "\n---\n".join(
-        f"[Case from {c['court']}] "
-        f"(File: {c.get('file', 'N/A')}) "
-        f"(IPC: {', '.join(c['ipc_sections'][:3]) or 'N/A'}) "
-        f"(Date: {c.get('date', 'N/A')}) "
-        f"(Outcome: {c['outcome']}) "
-        f"(Source: {c.get('source_url', 'N/A')})\n{c['text']}"
-        for c in response_cases
-    )
+    # 7 — Build context block with richer citations (statute text first)
+    context = _case_context(response_cases)
+    if provisions:
+        context = "\n---\n".join(filter(None, [statute_service.provision_context(provisions), context]))
 
     # 8 — Generate role-aware summary with conversation history
     intent = _infer_intent(clean_query)
-    profile = build_response_profile(role, intent)
     requested_language = (language or "english").strip().lower()
     generation_language = "english" if requested_language not in {"english", "any"} else requested_language
 
+    history = history_service.compact(conversation_history, history_summary)
     prompt = build_rag_prompt(
         role,
         clean_query,
         context,
         generation_language,
-        conversation_history,
-        profile,
+        history["turns"],
+        intent=intent,
+        history_summary=history["summary"],
     )
     summary, source, duration = llm_service.generate(prompt)
     summary, rewritten = llm_service.enforce_output_language(summary, requested_language)
     if rewritten:
         source = f"{source}+langfix"
 
+    response_id = uuid.uuid4().hex
+    _log_retrieval(response_id, clean_query, role, reranker, response_cases)
+
     logger.info("RAG done   │ source=%s │ cases=%d │ confidence=%s │ reranker=%s │ %dms",
-                source, len(response_cases), confidence["level"],
-                "llm" if used_llm_reranker else "feature", duration)
+                source, len(response_cases), confidence["level"], reranker, duration)
 
     return {
+        "response_id": response_id,
         "cases": response_cases,
         "summary": summary,
         "source": source,
         "ranked": True,
-        "reranker": "llm" if used_llm_reranker else "feature",
+        "reranker": reranker,
+        "reranker_policy": policy,
         "total_retrieved": len(results),
         "llm_time_ms": duration,
         "confidence": confidence,
+        "statutes": [statute_service.brief(p) for p in provisions],
+    }
+
+
+def _related_matches(
+    related: dict,
+    topic: str,
+    year_from: int | None,
+    year_to: int | None,
+    court_tiers: list[str] | None,
+) -> bool:
+    if topic and topic != "all" and topic not in related.get("topics", []):
+        return False
+    if year_from is not None or year_to is not None:
+        year = related.get("year")
+        if year is None:
+            return False
+        if (year_from is not None and year < year_from) or (year_to is not None and year > year_to):
+            return False
+    if court_tiers and related.get("court_tier") not in court_tiers:
+        return False
+    return True
+
+
+def _answer_from_statutes(
+    clean_query: str,
+    provisions: list[dict],
+    role: str,
+    k: int,
+    language: str,
+    conversation_history: list[dict] | None,
+    history_summary: str = "",
+    topic: str = "all",
+    year_from: int | None = None,
+    year_to: int | None = None,
+    court_tiers: list[str] | None = None,
+) -> dict:
+    """
+    Answer a provision-only query from the statute index (no vector search).
+
+    topic / year_from / year_to / court_tiers filter the related judgments
+    the same way build_filter does in Qdrant: a judgment missing the field
+    does not match.
+    """
+    response_cases = []
+    for p in provisions:
+        related = [
+            r for r in p.get("related", [])
+            if _related_matches(r, topic, year_from, year_to, court_tiers)
+        ]
+        for r in related[:k]:
+            if len(response_cases) >= k:
+                break
+            response_cases.append({
+                "id": r["doc_id"],
+                "text": r["snippet"][:500],
+                "court": r.get("court", "Unknown"),
+                "court_tier": r.get("court_tier", ""),
+                "date": r.get("date", ""),
+                "year": r.get("year"),
+                "ipc_sections": r.get("ipc_sections", []),
+                "topics": r.get("topics", []),
+                "outcome": r.get("outcome", ""),
+                "file": r.get("file", ""),
+                "page_number": "",
+                "section_title": "",
+                "doc_id": r["doc_id"],
+                "chunk_id": "",
+                "source_url": r.get("source_url", ""),
+                "rank_score": 0,
+                "similarity": 1.0,
+                "features": {},
+                "statute": p["id"],
+            })
+
+    context = "\n---\n".join(
+        [statute_service.provision_context(provisions)]
+        + [
+            f"[Case from {c['court']}] (File: {c['file'] or 'N/A'}) (Date: {c['date'] or 'N/A'}) "
+            f"(Cites: {c['statute']}) (Source: {c['source_url'] or 'N/A'})\n{c['text']}"
+            for c in response_cases
+        ]
+    )
+
+    intent = _infer_intent(clean_query)
+    requested_language = (language or "english").strip().lower()
+    generation_language = "english" if requested_language not in {"english", "any"} else requested_language
+
+    history = history_service.compact(conversation_history, history_summary)
+    prompt = build_rag_prompt(
+        role, clean_query, context, generation_language, history["turns"],
+        intent=intent, history_summary=history["summary"],
+    )
+    summary, source, duration = llm_service.generate(prompt)
+    summary, rewritten = llm_service.enforce_output_language(summary, requested_language)
+    if rewritten:
+        source = f"{source}+langfix"
+
+    response_id = uuid.uuid4().hex
+    _log_retrieval(response_id, clean_query, role, "statute", response_cases)
+
+    logger.info("RAG done   │ source=%s │ statutes=%s │ cases=%d │ reranker=statute │ %dms",
+                source, ",".join(p["id"] for p in provisions), len(response_cases), duration)
+
+    return {
+        "response_id": response_id,
+        "cases": response_cases,
+        "summary": summary,
+        "source": source,
+        "ranked": True,
+        "reranker": "statute",
+        "reranker_policy": {"use_llm": False, "reason": "statute_lookup"},
+        "total_retrieved": len(response_cases),
+        "llm_time_ms": duration,
+        "confidence": {
+            "level": "high",
+            "score": 1.0,
+            "explanation": "Exact statute match: " + ", ".join(p["id"] for p in provisions),
+        },
+        "statutes": [statute_service.brief(p) for p in provisions],
+    }
+
+
+def _answer_from_previous(
+    clean_query: str,
+    previous: dict,
+    role: str,
+    language: str,
+    conversation_history: list[dict] | None,
+    history_summary: str = "",
+) -> dict:
+    """Answer a session follow-up from the previous turn's cases (no search, no rerank)."""
+    response_cases = previous["cases"]
+    provisions = statute_service.lookup(previous.get("statute_ids") or [])
+    context = "\n---\n".join(
+        filter(None, [statute_service.provision_context(provisions), _case_context(response_cases)])
+    )
+
+    intent = _infer_intent(clean_query)
+    requested_language = (language or "english").strip().lower()
+    generation_language = "english" if requested_language not in {"english", "any"} else requested_language
+
+    history = history_service.compact(conversation_history, history_summary)
+    prompt = build_rag_prompt(
+        role, clean_query, context, generation_language, history["turns"],
+        intent=intent, history_summary=history["summary"],
+    )
+    summary, source, duration = llm_service.generate(prompt)
+    summary, rewritten = llm_service.enforce_output_language(summary, requested_language)
+    if rewritten:
+        source = f"{source}+langfix"
+
+    response_id = uuid.uuid4().hex
+    _log_retrieval(response_id, clean_query, role, "session", response_cases)
+
+    logger.info("RAG done   │ source=%s │ follow-up on '%s' │ cases=%d │ reranker=session │ %dms",
+                source, (previous.get("query") or "")[:60], len(response_cases), duration)
+
+    return {
+        "response_id": response_id,
+        "cases": response_cases,
+        "summary": summary,
+        "source": source,
+        "ranked": True,
+        "reranker": "session",
+        "reranker_policy": {"use_llm": False, "reason": "follow_up"},
+        "total_retrieved": len(response_cases),
+        "llm_time_ms": duration,
+        "confidence": previous.get("confidence") or _compute_confidence([], 0),
+        "statutes": [statute_service.brief(p) for p in provisions],
+        "reused_retrieval": True,
     }
 
 
@@ -240,12 +587,13 @@ def chat_with_pdf(
     role: str = "lawyer",
     language: str = "english",
     conversation_history: list[dict] | None = None,
+    history_summary: str = "",
 ) -> dict:
     """
     Chat with an uploaded PDF document.
 
     Chunks the document, embeds the query, finds relevant chunks,
-    and sends them to the LLM with the query.
+    and sends them to the LLM with the query (history_summary as in run_query).
 
     Returns:
         {answer, source, llm_time_ms, citations, confidence}
@@ -314,17 +662,18 @@ def chat_with_pdf(
 
     # 7 — Generate answer
     intent = _infer_intent(clean_query)
-    profile = build_response_profile(role, intent)
     requested_language = (language or "english").strip().lower()
     generation_language = "english" if requested_language not in {"english", "any"} else requested_language
 
+    history = history_service.compact(conversation_history, history_summary)
     prompt = build_pdf_chat_prompt(
         role,
         clean_query,
         doc_context,
         generation_language,
-        conversation_history,
-        profile,
+        history["turns"],
+        intent=intent,
+        history_summary=history["summary"],
     )
     answer, source, duration = llm_service.generate(prompt)
     answer, rewritten = llm_service.enforce_output_language(answer, requested_language)
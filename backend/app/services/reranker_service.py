@@ -11,17 +11,69 @@ much better legal-reasoning-aware ranking than pure vector similarity or
 heuristic feature scoring.
 
 Falls back to the feature-based ranker if the LLM call fails.
+
+Parsed rankings are cached per (normalized query, candidate ids) so the
+same candidate set is not re-ranked by the LLM twice; entries expire after
+RERANK_CACHE_TTL and the cache is dropped whenever the collection changes.
+
+A policy layer (decide_rerank) skips the LLM round-trip entirely when
+retrieval confidence is high and the feature ranker agrees with vector
+similarity, or when the top-k set is clearly separated from rank k+1.
 """
 
 import logging
+import os
 import re
 import time
 from typing import Optional
 
-from app.services import llm_service
+from app.core.cache import TTLCache
+from app.services import llm_service, qdrant_service
 
 logger = logging.getLogger("casecut")
 
+# ── Reranking policy ───────────────────────────────────────────────────
+
+RERANK_GATE_ENABLED = os.getenv("RERANK_GATE_ENABLED", "true").strip().lower() not in {"0", "false", "no"}
+# Minimum feature-score gap between rank k and k+1 to call the top-k unambiguous.
+RERANK_GATE_MIN_MARGIN = float(os.getenv("RERANK_GATE_MIN_MARGIN", "0.08"))
+
+# ── Ranking cache ──────────────────────────────────────────────────────
+
+RERANK_CACHE_TTL = float(os.getenv("RERANK_CACHE_TTL", "3600"))
+RERANK_CACHE_SIZE = int(os.getenv("RERANK_CACHE_SIZE", "2048"))
+
+# key → [(case_id, score), ...] in LLM-ranked order
+_rerank_cache = TTLCache(maxsize=RERANK_CACHE_SIZE, ttl=RERANK_CACHE_TTL)
+_cache_fingerprint = {"value": None}
+
+
+def _normalize_query(query: str) -> str:
+    return " ".join(re.sub(r"[^\w\s]", " ", (query or "").lower()).split())
+
+
+def _rerank_cache_key(query: str, cases: list[dict]) -> tuple:
+    return (_normalize_query(query), tuple(sorted(str(c.get("id")) for c in cases)))
+
+
+def invalidate_rerank_cache() -> None:
+    """Drop all cached rankings (call after the collection is re-indexed)."""
+    _rerank_cache.clear()
+
+
+def _check_collection_version() -> None:
+    """Clear the cache if the Qdrant collection changed since it was filled."""
+    fingerprint = qdrant_service.collection_fingerprint()
+    if fingerprint is not None and fingerprint != _cache_fingerprint["value"]:
+        if _cache_fingerprint["value"] is not None:
+            logger.info("Reranker   │ collection changed (%s) — cache cleared", fingerprint)
+        invalidate_rerank_cache()
+        _cache_fingerprint["value"] = fingerprint
+
+
+def rerank_cache_stats() -> dict:
+    return _rerank_cache.stats()
+
 # ── Master reranker prompt ─────────────────────────────────────────────
 
 RERANKER_SYSTEM = """You are an expert AI legal analysis system designed to assist with Indian legal documents and court judgments.
@@ -73,6 +125,49 @@ Example:
 """
 
 
+def decide_rerank(
+    confidence: dict,
+    feature_ranked: list[dict],
+    top_k: int,
+    similarity_top_id=None,
+) -> dict:
+    """
+    Decide whether the LLM reranker is worth a round-trip.
+
+    Args:
+        confidence:        Output of rag_service._compute_confidence.
+        feature_ranked:    Candidates already sorted by the feature ranker.
+        top_k:             Number of results that will be shown.
+        similarity_top_id: Id of the best candidate by raw vector similarity.
+
+    Returns:
+        {use_llm: bool, reason: str, margin: float | None}
+    """
+    # k <= 0 would read the margin from the wrong end of the list.
+    top_k = max(1, top_k)
+    margin = None
+    if len(feature_ranked) > top_k:
+        margin = round(
+            feature_ranked[top_k - 1].get("rank_score", 0) - feature_ranked[top_k].get("rank_score", 0),
+            4,
+        )
+
+    if not RERANK_GATE_ENABLED:
+        return {"use_llm": True, "reason": "gate_disabled", "margin": margin}
+
+    if len(feature_ranked) <= 2:
+        return {"use_llm": False, "reason": "few_candidates", "margin": margin}
+
+    feature_top_id = feature_ranked[0].get("id") if feature_ranked else None
+    if confidence.get("level") == "high" and feature_top_id == similarity_top_id:
+        return {"use_llm": False, "reason": "high_confidence", "margin": margin}
+
+    if margin is not None and margin >= RERANK_GATE_MIN_MARGIN:
+        return {"use_llm": False, "reason": "low_ambiguity", "margin": margin}
+
+    return {"use_llm": True, "reason": "ambiguous", "margin": margin}
+
+
 def _build_reranker_prompt(query: str, passages: list[dict]) -> str:
     """
     Build the full reranker prompt with user query and candidate passages.
@@ -192,11 +287,31 @@ def rerank_with_llm(
 
     start = time.perf_counter()
 
+    _check_collection_version()
+    cache_key = _rerank_cache_key(query, cases)
+    cached = _rerank_cache.get(cache_key)
+    if cached is not None:
+        # Cached by case id: the same candidates may arrive in another order.
+        by_id = {str(c.get("id")): c for c in cases}
+        reranked = []
+        for case_id, score in cached[:top_k]:
+            case = by_id[case_id].copy()
+            case["rank_score"] = round(score, 4)
+            case["reranker_source"] = "cache"
+            reranked.append(case)
+        logger.info("Reranker   │ cache hit │ returned=%d", len(reranked))
+        return reranked, True
+
     try:
         prompt = _build_reranker_prompt(query, cases)
-        response, source, duration = llm_service.generate(prompt)
+        response, source, duration = llm_service.generate(prompt, cache=True)
 
         ranked_indices = _parse_reranker_response(response, len(cases))
+        if ranked_indices:
+            _rerank_cache.set(
+                cache_key,
+                [(str(cases[idx].get("id")), score) for idx, score in ranked_indices],
+            )
 
         if not ranked_indices:
             logger.warning(
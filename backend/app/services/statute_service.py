@@ -0,0 +1,145 @@
+"""
+Statute service — exact (act, section) lookup over the prebuilt statute index.
+
+The index (cronjobs/build_statute_index.py) maps canonical ids such as
+"CRPC:438" to the section text plus judgments that cite it. It is loaded
+once into a dict, so a query naming a provision resolves with a key lookup
+instead of an embedding + vector search.
+
+  • match_query(query)      → provisions named in the query (found in the index)
+  • is_provision_only(query) → True when the query is just the reference
+    ("Section 438 CrPC", "what does IPC 420 say"): rag_service answers from
+    the index alone; otherwise the provisions augment the vector results
+"""
+
+import json
+import logging
+import os
+import re
+import threading
+
+from app.utils.statutes import canonical_ids, find_statute_refs
+
+logger = logging.getLogger("casecut")
+
+STATUTE_INDEX_FILE = os.getenv(
+    "STATUTE_INDEX_FILE",
+    os.path.join(os.path.dirname(__file__), "..", "..", "data", "processed", "statutes.json"),
+)
+STATUTE_FASTPATH = os.getenv("STATUTE_FASTPATH", "1") == "1"
+STATUTE_CONTEXT_CHARS = int(os.getenv("STATUTE_CONTEXT_CHARS", "3000"))
+
+# Words that may surround a bare provision reference without turning it
+# into a broader question.
+_FILLER_WORDS = {
+    "a", "about", "act", "an", "and", "bare", "can", "define", "definition", "does", "explain",
+    "full", "give", "is", "me", "meaning", "of", "please", "provision", "provisions", "read",
+    "say", "says", "section", "sections", "show", "tell", "text", "the", "under", "what",
+    "whats", "what's",
+}
+
+_index: dict | None = None
+_load_lock = threading.Lock()
+_stats = {"lookups": 0, "hits": 0, "fastpath": 0}
+
+
+def _load() -> dict:
+    global _index
+    if _index is None:
+        with _load_lock:
+            if _index is None:
+                try:
+                    with open(STATUTE_INDEX_FILE, "r", encoding="utf-8") as f:
+                        _index = json.load(f)
+                    logger.info(
+                        "Statutes   │ loaded %d sections │ acts=%s",
+                        len(_index.get("sections", {})), ",".join(_index.get("acts", [])),
+                    )
+                except FileNotFoundError:
+                    logger.info("Statutes   │ no index at %s (run cronjobs/build_statute_index.py)", STATUTE_INDEX_FILE)
+                    _index = {"sections": {}}
+                except Exception as e:
+                    logger.warning("Statutes   │ index load failed │ %s", e)
+                    _index = {"sections": {}}
+    return _index
+
+
+def lookup(ref_ids: list[str]) -> list[dict]:
+    """Index entries for canonical ids (unknown ids are skipped)."""
+    sections = _load()["sections"]
+    found = [sections[ref] for ref in ref_ids if ref in sections]
+    _stats["lookups"] += 1
+    _stats["hits"] += bool(found)
+    return found
+
+
+def match_query(query: str) -> list[dict]:
+    """
+    Provisions named in the query that the index knows. A 2023-code section
+    missing from the index resolves to the section it replaced ("482 BNSS"
+    → "CRPC:438").
+    """
+    sections = _load()["sections"]
+    refs = []
+    for _, _, ref in find_statute_refs(query, subsections=True):
+        section = ref.split("(", 1)[0]
+        for candidate in [section] if section in sections else canonical_ids(ref):
+            if candidate not in refs:
+                refs.append(candidate)
+    return lookup(refs) if refs else []
+
+
+def is_provision_only(query: str) -> bool:
+    """True when nothing but filler words remains once references are removed."""
+    if not STATUTE_FASTPATH:
+        return False
+    lower = query.lower()
+    spans = find_statute_refs(query)
+    if not spans:
+        return False
+    remainder = []
+    last = 0
+    for start, end, _ in spans:
+        if start >= last:
+            remainder.append(lower[last:start])
+        last = max(last, end)
+    remainder.append(lower[last:])
+    words = re.findall(r"[a-z']+", " ".join(remainder))
+    if all(word in _FILLER_WORDS for word in words):
+        _stats["fastpath"] += 1
+        return True
+    return False
+
+
+def provision_context(provisions: list[dict]) -> str:
+    """Prompt block with the text of each provision (capped per section)."""
+    blocks = []
+    for p in provisions:
+        text = p["text"]
+        if len(text) > STATUTE_CONTEXT_CHARS:
+            text = text[:STATUTE_CONTEXT_CHARS].rsplit(" ", 1)[0] + " …"
+        blocks.append(f"[Statute: {p['act_title']} — Section {p['section']}: {p['title']}]\n{text}")
+    return "\n---\n".join(blocks)
+
+
+def brief(provision: dict) -> dict:
+    """Response-sized view of an index entry (no full text)."""
+    return {
+        "id": provision["id"],
+        "act": provision["act"],
+        "act_title": provision["act_title"],
+        "section": provision["section"],
+        "title": provision["title"],
+        "source_url": provision.get("source_url", ""),
+        "related_count": len(provision.get("related", [])),
+    }
+
+
+def stats() -> dict:
+    loaded = _index is not None
+    return {
+        "loaded": loaded,
+        "sections": len(_index.get("sections", {})) if loaded else 0,
+        "built_at": _index.get("built_at") if loaded else None,
+        **_stats,
+    }
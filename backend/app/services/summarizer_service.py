@@ -2,6 +2,7 @@
 Summarizer service.
 
 Handles document summarization across:
+- precomputed corpus summaries (app/services/summary_store.py)
 - local model wrappers from app/models/summarizer.py
 - Groq/Gemini LLM pipeline
 """
@@ -17,7 +18,8 @@ import requests as http_requests
 
 from app.core.config import PDF_SMART_THRESHOLD
 from app.models import summarizer as local_summarizer
-from app.services import llm_service
+from app.services import inference_service, llm_service, summary_store
+from app.utils.parser import document_id
 
 logger = logging.getLogger("casecut")
 
@@ -91,16 +93,60 @@ def _resolve_local_model_ref(model_id: str) -> str:
     return ""
 
 
+def preload_local_models() -> list[str]:
+    """Warm the local summarizer pool with SUMMARIZER_PRELOAD (model ids or paths)."""
+    refs = [
+        _resolve_local_model_ref(item) if item in LOCAL_SUMMARIZER_MODELS else item
+        for item in local_summarizer.SUMMARIZER_PRELOAD
+    ]
+    refs = [ref for ref in refs if ref]
+    if not refs:
+        return []
+    loaded = inference_service.preload(refs)
+    logger.info("Summarizer pool │ preloaded %d/%d model(s) │ %s", len(loaded), len(refs), ", ".join(loaded))
+    if len(loaded) < len(refs) and inference_service.SUMMARIZER_WORKERS > 0:
+        logger.info("Summarizer pool │ workers still loading │ see /health inference_workers")
+    return loaded
+
+
+def get_precomputed(
+    doc_id: str,
+    model_id: str = "casecut-legal",
+    mode: str = "lawyer",
+    summary_size: str = "large",
+    decoding_profile: str | None = None,
+) -> dict | None:
+    """Look up a summary generated offline for a corpus document (same size and profile)."""
+    summary_size = _normalize_summary_size(summary_size)
+    profile = local_summarizer.resolve_decoding_profile(decoding_profile, summary_size)
+    stored = summary_store.get(doc_id, summary_size, model_id, mode, profile)
+    if stored:
+        logger.info(
+            "Summarize | precomputed hit | doc_id=%s | size=%s | profile=%s | model=%s",
+            doc_id, summary_size, profile, model_id,
+        )
+    return stored
+
+
 def summarize(
     text: str,
     model_id: str = "casecut-legal",
     mode: str = "lawyer",
     intent: str = "summarize",
     summary_size: str = "large",
+    doc_id: str | None = None,
+    use_store: bool = True,
+    refine: bool = True,
+    decoding_profile: str | None = None,
 ) -> dict:
     """
     Summarize text using the requested model/provider.
 
+    Plain summaries of corpus documents are served from the summary store
+    when available (looked up by doc_id, or by the parser's id for the text).
+    decoding_profile picks the local model's decoding ('fast' | 'balanced' |
+    'quality'); by default it follows summary_size.
+
     Returns:
         {
             "summary": str,
@@ -113,6 +159,11 @@ def summarize(
     """
     summary_size = _normalize_summary_size(summary_size)
 
+    if intent == "summarize" and use_store:
+        stored = get_precomputed(doc_id or document_id(text), model_id, mode, summary_size, decoding_profile)
+        if stored:
+            return stored
+
     logger.info(
         "Summarize | model=%s | mode=%s | intent=%s | size=%s | text_len=%d",
         model_id,
@@ -131,6 +182,8 @@ def summarize(
         summary_size=summary_size,
         model_ref=local_model_ref,
         model_id=model_id,
+        refine=refine,
+        decoding_profile=decoding_profile,
     )
 
     return {
@@ -141,6 +194,7 @@ def summarize(
         "summary_size": summary_size,
         "provider": provider,
         "resolved_model": Path(local_model_ref).name if local_model_ref else "default",
+        "decoding_profile": local_summarizer.resolve_decoding_profile(decoding_profile, summary_size),
     }
 
 
@@ -157,7 +211,7 @@ def _extract_key_points(text: str, summary_size: str) -> str:
         "KEY POINTS:"
     )
 
-    result, source, _ = llm_service.generate(prompt)
+    result, source, _ = llm_service.generate(prompt, cache=True)
     if source == "error" or not result or result.strip().lower().startswith("error:"):
         logger.warning("Key point extraction failed; using truncated source text.")
         return text[: cfg["context_chars"]]
@@ -171,22 +225,34 @@ def _summarize_casecut(
     summary_size: str,
     model_ref: str = "",
     model_id: str = "casecut-legal",
+    refine: bool = True,
+    decoding_profile: str | None = None,
 ) -> tuple[str, str]:
     """
     CaseCut default summarization pipeline.
 
     1) If intent is summarize, try local summarizer model first.
     2) Optionally refine local output using API-key LLMs for better clarity.
-    3) Fallback to full LLM summarization pipeline.
+    3) Fallback to full LLM summarization pipeline, also when the local job
+       times out or the worker pool fails it. A full queue propagates as
+       InferenceQueueFull (the router answers 503).
     """
     if intent == "summarize":
-        local_summary = local_summarizer.summarize_text(
-            text,
-            summary_size=summary_size,
-            model_ref=model_ref or None,
-        )
+        try:
+            local_summary = inference_service.summarize_text(
+                text,
+                summary_size=summary_size,
+                model_ref=model_ref or None,
+                decoding_profile=decoding_profile,
+            )
+        except inference_service.InferenceTimeout as exc:
+            logger.warning("Local summarizer timed out; using LLM pipeline │ %s", exc)
+            local_summary = None
+        except inference_service.InferenceWorkerError as exc:
+            logger.warning("Local summarizer failed; using LLM pipeline │ %s", exc)
+            local_summary = None
         if local_summary:
-            refined = _refine_local_summary(local_summary, text, mode, summary_size)
+            refined = _refine_local_summary(local_summary, text, mode, summary_size) if refine else ""
             if refined:
                 return refined, f"local+llm:{model_id}"
             return local_summary, f"local-model:{model_id}"
@@ -221,7 +287,7 @@ def _refine_local_summary(draft_summary: str, source_text: str, mode: str, summa
         "IMPROVED SUMMARY:"
     )
 
-    result, source, _ = llm_service.generate(prompt)
+    result, source, _ = llm_service.generate(prompt, cache=True)
     if source == "error" or not result or result.strip().lower().startswith("error:"):
         return ""
     return result.strip()
@@ -295,7 +361,7 @@ def _summarize_with_llm(text: str, mode: str, intent: str, summary_size: str) ->
         "RESPONSE:"
     )
 
-    result, source, _ = llm_service.generate(prompt)
+    result, source, _ = llm_service.generate(prompt, cache=True)
     if source == "error" or not result:
         raise RuntimeError("Summarization failed because no LLM provider was available.")
     return result.strip()
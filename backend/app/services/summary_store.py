@@ -0,0 +1,136 @@
+"""
+Summary store — precomputed summaries of corpus judgments.
+
+Filled offline by cronjobs/precompute_summaries.py and read by
+summarizer_service, so /summarize on a corpus document is a lookup.
+
+Keyed on (doc_id, summary_size, model_id, mode, decoding_profile); doc_id is
+the same id the parser assigns (utils.parser.document_id) and stores in the
+Qdrant payload. Callers pass the normalized size and the resolved profile
+(models.summarizer.resolve_decoding_profile), so a "quality" request is never
+served a "fast" summary.
+"""
+
+import logging
+import os
+import sqlite3
+import threading
+from datetime import datetime
+
+from app.models.summarizer import DEFAULT_DECODING_PROFILE
+
+logger = logging.getLogger("casecut")
+
+SUMMARY_STORE_PATH = os.getenv(
+    "SUMMARY_STORE_PATH",
+    os.path.join(os.path.dirname(__file__), "..", "..", "data", "summaries.sqlite3"),
+)
+
+_conn: sqlite3.Connection | None = None
+_lock = threading.Lock()
+
+
+def _connection() -> sqlite3.Connection:
+    global _conn
+    if _conn is None:
+        os.makedirs(os.path.dirname(os.path.abspath(SUMMARY_STORE_PATH)), exist_ok=True)
+        conn = sqlite3.connect(SUMMARY_STORE_PATH, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        columns = [row[1] for row in conn.execute("PRAGMA table_info(summaries)")]
+        if columns and "decoding_profile" not in columns:
+            conn.execute("ALTER TABLE summaries RENAME TO summaries_unprofiled")
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS summaries (
+                doc_id TEXT NOT NULL,
+                summary_size TEXT NOT NULL,
+                model_id TEXT NOT NULL,
+                mode TEXT NOT NULL,
+                decoding_profile TEXT NOT NULL,
+                summary TEXT NOT NULL,
+                provider TEXT NOT NULL,
+                resolved_model TEXT NOT NULL,
+                created_at TEXT NOT NULL,
+                PRIMARY KEY (doc_id, summary_size, model_id, mode, decoding_profile)
+            )
+            """
+        )
+        if columns and "decoding_profile" not in columns:
+            _migrate_unprofiled(conn)
+        conn.commit()
+        _conn = conn
+    return _conn
+
+
+def _migrate_unprofiled(conn: sqlite3.Connection) -> None:
+    """Rows stored before profiles were keyed used the size's default profile."""
+    for size, profile in DEFAULT_DECODING_PROFILE.items():
+        conn.execute(
+            "INSERT OR IGNORE INTO summaries "
+            "SELECT doc_id, summary_size, model_id, mode, ?, summary, provider, resolved_model, created_at "
+            "FROM summaries_unprofiled WHERE summary_size = ?",
+            (profile, size),
+        )
+    conn.execute("DROP TABLE summaries_unprofiled")
+    logger.info("Summary store │ migrated rows to (…, decoding_profile) keys")
+
+
+def get(doc_id: str, summary_size: str, model_id: str, mode: str, decoding_profile: str) -> dict | None:
+    """Return a stored summary in summarizer_service.summarize() shape, or None."""
+    try:
+        with _lock:
+            row = _connection().execute(
+                "SELECT summary, provider, resolved_model, created_at FROM summaries "
+                "WHERE doc_id = ? AND summary_size = ? AND model_id = ? AND mode = ? AND decoding_profile = ?",
+                (doc_id, summary_size, model_id, mode, decoding_profile),
+            ).fetchone()
+    except Exception as e:
+        logger.warning("Summary store │ read failed │ %s", e)
+        return None
+    if row is None:
+        return None
+    return {
+        "summary": row[0],
+        "model_id": model_id,
+        "mode": mode,
+        "intent": "summarize",
+        "summary_size": summary_size,
+        "provider": f"precomputed:{row[1]}",
+        "resolved_model": row[2],
+        "decoding_profile": decoding_profile,
+        "doc_id": doc_id,
+        "generated_at": row[3],
+    }
+
+
+def put(doc_id: str, result: dict) -> None:
+    """Store one summarizer_service.summarize() result for doc_id."""
+    with _lock:
+        conn = _connection()
+        conn.execute(
+            "INSERT OR REPLACE INTO summaries "
+            "(doc_id, summary_size, model_id, mode, decoding_profile, summary, provider, resolved_model, created_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (
+                doc_id,
+                result["summary_size"],
+                result["model_id"],
+                result["mode"],
+                result["decoding_profile"],
+                result["summary"],
+                result.get("provider", ""),
+                result.get("resolved_model", "default"),
+                datetime.now().isoformat(),
+            ),
+        )
+        conn.commit()
+
+
+def has(doc_id: str, summary_size: str, model_id: str, mode: str, decoding_profile: str) -> bool:
+    with _lock:
+        row = _connection().execute(
+            "SELECT 1 FROM summaries WHERE doc_id = ? AND summary_size = ? AND model_id = ? AND mode = ? "
+            "AND decoding_profile = ?",
+            (doc_id, summary_size, model_id, mode, decoding_profile),
+        ).fetchone()
+    return row is not None
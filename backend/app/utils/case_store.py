@@ -0,0 +1,191 @@
+"""
+Columnar store of processed case metadata (Parquet, append-only partitions).
+
+Replaces the per-case data/processed/case_<id>.json files:
+  • process_all appends one partition per run (part-<time_ns>-<uid>.parquet)
+  • readers stream pyarrow RecordBatches (iter_record_batches) or dicts
+    (iter_cases), optionally projecting only the columns they need
+  • read_case_ids reads just the id column; read_case_versions the
+    parser_version each case was last written with (0 = before versioning)
+  • compact() rewrites all partitions into one, last write wins per id
+  • migrate_legacy_json() imports leftover case_<id>.json files once
+
+pyarrow is optional; available() is False without it and callers fall back
+to the legacy JSON files.
+"""
+
+import json
+import os
+import shutil
+import time
+import uuid
+from typing import Iterable, Iterator
+
+try:
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+    import pyarrow.parquet as pq
+except Exception:
+    pa = ds = pq = None
+
+CASE_STORE_DIR = os.getenv(
+    "CASE_STORE_DIR",
+    os.path.join(os.path.dirname(__file__), "..", "..", "data", "processed", "cases"),
+)
+
+CASE_SCHEMA = (
+    pa.schema([
+        pa.field("id", pa.string(), nullable=False),
+        pa.field("filename", pa.string()),
+        pa.field("court", pa.string()),
+        pa.field("date", pa.string()),
+        pa.field("date_iso", pa.string()),
+        pa.field("year", pa.int32()),
+        pa.field("date_epoch_days", pa.int32()),
+        pa.field("court_tier", pa.string()),
+        pa.field("ipc_sections", pa.list_(pa.string())),
+        pa.field("section_ids", pa.list_(pa.string())),
+        pa.field("topics", pa.list_(pa.string())),
+        pa.field("outcome", pa.string()),
+        pa.field("facts", pa.string()),
+        pa.field("text_length", pa.int64()),
+        pa.field("page_count", pa.int32()),
+        pa.field("page_offsets", pa.list_(pa.int64())),
+        pa.field("source_url", pa.string()),
+        pa.field("parsed_at", pa.string()),
+        pa.field("parser_version", pa.int32()),
+    ])
+    if pa is not None
+    else None
+)
+
+
+def available() -> bool:
+    return pa is not None
+
+
+def _require() -> None:
+    if pa is None:
+        raise RuntimeError("Case store needs pyarrow: pip install pyarrow")
+
+
+def _partitions() -> list[str]:
+    if not os.path.isdir(CASE_STORE_DIR):
+        return []
+    return sorted(
+        os.path.join(CASE_STORE_DIR, name)
+        for name in os.listdir(CASE_STORE_DIR)
+        if name.startswith("part-") and name.endswith(".parquet")
+    )
+
+
+def exists() -> bool:
+    return available() and bool(_partitions())
+
+
+def _write_partition(table: "pa.Table") -> str:
+    os.makedirs(CASE_STORE_DIR, exist_ok=True)
+    # Zero-padded nanosecond prefix: lexical order of partitions == write order.
+    name = f"part-{time.time_ns():020d}-{uuid.uuid4().hex[:8]}.parquet"
+    path = os.path.join(CASE_STORE_DIR, name)
+    tmp_path = f"{path}.tmp"
+    pq.write_table(table, tmp_path, compression="zstd")
+    os.replace(tmp_path, path)  # readers never see a half-written partition
+    return path
+
+
+def append_cases(records: Iterable[dict]) -> str | None:
+    """
+    Write records (parse_document output; full_text is dropped) as a new
+    partition. Returns the partition path, or None when records is empty.
+    """
+    _require()
+    rows = [{name: record.get(name) for name in CASE_SCHEMA.names} for record in records]
+    if not rows:
+        return None
+
+    return _write_partition(pa.Table.from_pylist(rows, schema=CASE_SCHEMA))
+
+
+def iter_record_batches(columns: list[str] | None = None, batch_size: int = 1024) -> Iterator["pa.RecordBatch"]:
+    """Stream the store as RecordBatches, partitions in write order."""
+    _require()
+    partitions = _partitions()
+    if not partitions:
+        return
+    dataset = ds.dataset(partitions, schema=CASE_SCHEMA, format="parquet")
+    yield from dataset.to_batches(columns=columns, batch_size=batch_size)
+
+
+def iter_cases(columns: list[str] | None = None, batch_size: int = 1024) -> Iterator[dict]:
+    for batch in iter_record_batches(columns=columns, batch_size=batch_size):
+        yield from batch.to_pylist()
+
+
+def read_case_ids() -> set[str]:
+    ids: set[str] = set()
+    for batch in iter_record_batches(columns=["id"]):
+        ids.update(batch.column(0).to_pylist())
+    return ids
+
+
+def read_case_versions() -> dict[str, int]:
+    """id -> parser_version of its last-written row (0 for rows written before versioning)."""
+    versions: dict[str, int] = {}
+    for batch in iter_record_batches(columns=["id", "parser_version"]):
+        for case_id, version in zip(batch.column(0).to_pylist(), batch.column(1).to_pylist()):
+            versions[case_id] = version or 0
+    return versions
+
+
+def migrate_legacy_json(processed_dir: str) -> int:
+    """
+    Append legacy case_<id>.json files not yet in the store, then move them to
+    processed_dir/legacy_json/ so the import runs once. Returns cases imported.
+    """
+    _require()
+    if not os.path.isdir(processed_dir):
+        return 0
+    paths = sorted(
+        os.path.join(processed_dir, name)
+        for name in os.listdir(processed_dir)
+        if name.startswith("case_") and name.endswith(".json")
+    )
+    if not paths:
+        return 0
+
+    stored = read_case_ids() if exists() else set()
+    records = {}
+    for path in paths:
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                record = json.load(f)
+        except Exception:
+            continue
+        case_id = str(record.get("id") or "").strip()
+        if case_id and case_id not in stored:
+            records[case_id] = {**record, "parser_version": 0}
+    append_cases(records.values())
+
+    legacy_dir = os.path.join(processed_dir, "legacy_json")
+    os.makedirs(legacy_dir, exist_ok=True)
+    for path in paths:
+        shutil.move(path, os.path.join(legacy_dir, os.path.basename(path)))
+    return len(records)
+
+
+def compact() -> str | None:
+    """Merge all partitions into one, keeping the last-written row per id."""
+    _require()
+    partitions = _partitions()
+    if len(partitions) < 2:
+        return partitions[0] if partitions else None
+
+    table = ds.dataset(partitions, schema=CASE_SCHEMA, format="parquet").to_table()
+    last_index = {case_id: i for i, case_id in enumerate(table.column("id").to_pylist())}
+    table = table.take(pa.array(sorted(last_index.values()), type=pa.int64()))
+
+    path = _write_partition(table)
+    for old in partitions:
+        os.remove(old)
+    return path
@@ -8,17 +8,43 @@ import re
 import os
 import json
 import hashlib
-from datetime import datetime
+import multiprocessing as mp
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, datetime
+from typing import Iterator
+
+from app.utils import case_store
+from app.utils.statutes import canonical_section_ids
 
 DATA_RAW = os.path.join(os.path.dirname(__file__), "..", "..", "data", "raw")
 DATA_PROCESSED = os.path.join(os.path.dirname(__file__), "..", "..", "data", "processed")
 
+# Bump when extraction changes the stored metadata: process_all rewrites
+# cases last stored by an older version (rows written before versioning are 0).
+PARSER_VERSION = 1
+
+# With parallel=True (only batch ingest: process_all, process_and_upload),
+# PDF files of at least this many pages are extracted by a process pool, each
+# worker opening the file once and taking page ranges. Spawning workers costs
+# ~1s and must not happen per request, so everything else (uploads, fetched
+# URLs, including ones spooled to a temp file) is read serially.
+PDF_PARALLEL_MIN_PAGES = int(os.getenv("PDF_PARALLEL_MIN_PAGES", "150"))
+PDF_EXTRACT_WORKERS = int(os.getenv("PDF_EXTRACT_WORKERS", str(min(4, os.cpu_count() or 1))))
+PDF_PAGES_PER_TASK = 16
+
 IPC_PATTERN = re.compile(
     r"[Ss]ection\s+(\d+[A-Z]?)\s+(?:of\s+)?(?:the\s+)?"
     r"(?:Indian\s+Penal\s+Code|I\.?P\.?C\.?|Bharatiya Nyaya Sanhita|BNS)",
     re.IGNORECASE,
 )
 
+STANDALONE_SECTION_PATTERN = re.compile(r"[Ss]ection\s+(\d+[A-Z]?)")
+
+FACTS_PATTERN = re.compile(
+    r"(?:FACTS|Brief Facts|Factual Background)[:\s]*\n(.+?)(?:\n\s*\n|\n[A-Z]{3,})",
+    re.DOTALL | re.IGNORECASE,
+)
+
 TOPIC_KEYWORDS = {
     "bail": ["bail", "anticipatory bail", "regular bail", "interim bail"],
     "murder": ["murder", "homicide", "culpable homicide", "section 302", "section 304"],
@@ -32,48 +58,269 @@ TOPIC_KEYWORDS = {
     "defamation": ["defamation", "libel", "slander", "section 499", "section 500"],
 }
 
+# Topic scan table: only lowercase keywords can occur in lowercased text
+# ("IT Act" never matches), and a keyword that contains a shorter keyword
+# of the same topic is redundant.
+_TOPIC_SCAN = {
+    topic: [k for k in kws if k == k.lower() and not any(o != k and o == o.lower() and o in k for o in kws)]
+    for topic, kws in TOPIC_KEYWORDS.items()
+}
+
+# Characters re.IGNORECASE folds onto ASCII letters that str.lower() does
+# not map to them (dotless i, long s). Texts containing them — or whose
+# lowercase changes length — skip the shared-lowercase fast path.
+_FOLD_EXCEPTIONS = ("\u0131", "\u017f")
+
+
+# Formats produced by extract_date(); tried in order when normalizing.
+DATE_FORMATS = [
+    "%d/%m/%Y", "%d-%m-%Y", "%d.%m.%Y",
+    "%d/%m/%y", "%d-%m-%y", "%d.%m.%y",
+    "%B %d, %Y", "%d %B %Y", "%d %B, %Y",
+]
+
+EPOCH = date(1970, 1, 1)
+
+# Court tier enum stored in the Qdrant payload (keyword index).
+# Checked in order, so "Supreme Court" wins over a High Court mention.
+COURT_TIERS = [
+    ("supreme_court", "supreme court"),
+    ("high_court", "high court"),
+    ("district_court", "district court"),
+    ("sessions_court", "sessions court"),
+]
+COURT_TIER_UNKNOWN = "unknown"
+
 
 def extract_source_url(text: str) -> str:
     """Extract SOURCE: URL from the header of a scraped text file."""
-    for line in text.split("\n")[:5]:
+    for line in text.split("\n", 5)[:5]:
         if line.startswith("SOURCE:"):
             return line[len("SOURCE:"):].strip()
     return ""
 
 
-def extract_text_from_file(filepath: str) -> tuple[str, int]:
-    """Extract text and page count from a file.
-    Returns (text, page_count).
+def _open_pdf(source: str | bytes):
+    if isinstance(source, (bytes, bytearray)):
+        return fitz.open(stream=source, filetype="pdf")
+    return fitz.open(source)
+
+
+_worker_doc = None
+
+
+def _init_page_worker(source: str) -> None:
+    global _worker_doc
+    _worker_doc = _open_pdf(source)
+
+
+def _extract_page_range(page_range: tuple[int, int]) -> list[tuple[int, str]]:
+    start, end = page_range
+    return [(page_no, _worker_doc[page_no].get_text()) for page_no in range(start, end)]
+
+
+def iter_pdf_pages(source: str | bytes, parallel: bool = False) -> Iterator[tuple[int, str]]:
+    """Yield (page_no, text) for a PDF path or bytes, 0-based, in page order.
+
+    With parallel=True, files of at least PDF_PARALLEL_MIN_PAGES pages are
+    split into page ranges across a process pool; everything else, and all
+    byte buffers, is read serially.
     """
-    if filepath.endswith(".pdf"):
+    doc = _open_pdf(source)
+    page_count = len(doc)
+    if (
+        not parallel
+        or not isinstance(source, str)
+        or page_count < PDF_PARALLEL_MIN_PAGES
+        or PDF_EXTRACT_WORKERS <= 1
+    ):
         try:
-            doc = fitz.open(filepath)
-            pages = []
-            for page in doc:
-                pages.append(page.get_text())
-            page_count = len(doc)
+            for page_no in range(page_count):
+                yield page_no, doc[page_no].get_text()
+        finally:
             doc.close()
-            return "\n".join(pages), page_count
+        return
+    doc.close()
+
+    ranges = [
+        (start, min(start + PDF_PAGES_PER_TASK, page_count))
+        for start in range(0, page_count, PDF_PAGES_PER_TASK)
+    ]
+    with ProcessPoolExecutor(
+        max_workers=min(PDF_EXTRACT_WORKERS, len(ranges)),
+        mp_context=mp.get_context("spawn"),
+        initializer=_init_page_worker,
+        initargs=(source,),
+    ) as pool:
+        for pages in pool.map(_extract_page_range, ranges):
+            yield from pages
+
+
+def _pdf_text(source: str | bytes, parallel: bool = False) -> tuple[str, int, list[int]]:
+    """Return (text, page_count, page_offsets); page i starts at text[page_offsets[i]]."""
+    pages: list[str] = []
+    offsets: list[int] = []
+    position = 0
+    for _page_no, page_text in iter_pdf_pages(source, parallel):
+        offsets.append(position)
+        pages.append(page_text)
+        position += len(page_text) + 1  # "\n" separator
+    return "\n".join(pages), len(pages), offsets
+
+
+def _txt_page_estimate(text: str) -> int:
+    # Estimate pages for text files (~3000 chars per page)
+    return max(1, len(text) // 3000)
+
+
+def _extract_file(filepath: str, parallel: bool = False) -> tuple[str, int, list[int]]:
+    if filepath.endswith(".pdf"):
+        try:
+            return _pdf_text(filepath, parallel)
         except Exception as e:
             print(f"   [ERR] PDF error: {e}")
-            return "", 0
+            return "", 0, []
     elif filepath.endswith(".txt"):
         with open(filepath, "r", encoding="utf-8", errors="ignore") as f:
             text = f.read()
-        # Estimate pages for text files (~3000 chars per page)
-        return text, max(1, len(text) // 3000)
-    return "", 0
+        return text, _txt_page_estimate(text), []
+    return "", 0, []
+
+
+def _extract_bytes(data: bytes, filename: str = "") -> tuple[str, int, list[int]]:
+    if is_pdf_bytes(data) or filename.lower().endswith(".pdf"):
+        try:
+            return _pdf_text(data)
+        except Exception as e:
+            print(f"   [ERR] PDF error: {e}")
+            return "", 0, []
+    text = data.decode("utf-8", errors="ignore")
+    return text, _txt_page_estimate(text), []
+
+
+def extract_text_from_file(filepath: str) -> tuple[str, int]:
+    """Extract text and page count from a file.
+    Returns (text, page_count).
+    """
+    text, page_count, _offsets = _extract_file(filepath)
+    return text, page_count
+
+
+def is_pdf_bytes(data: bytes) -> bool:
+    return data[:1024].lstrip()[:5] == b"%PDF-"
+
+
+def extract_text_from_bytes(data: bytes, filename: str = "") -> tuple[str, int]:
+    """Extract text and page count from an in-memory PDF/TXT (no temp file).
+    PDF is detected from the %PDF- header or a .pdf filename.
+    Returns (text, page_count).
+    """
+    text, page_count, _offsets = _extract_bytes(data, filename)
+    return text, page_count
+
+
+def _lower_for_scan(text: str) -> tuple[str, bool]:
+    """Return (text.lower(), whether its offsets can locate IGNORECASE matches in text)."""
+    lower = text.lower()
+    exact = len(lower) == len(text) and not any(ch in text for ch in _FOLD_EXCEPTIONS)
+    return lower, exact
+
+
+def _ipc_sections(text: str, lower: str, exact: bool) -> list:
+    if not exact:
+        matches = IPC_PATTERN.findall(text)
+        standalone = STANDALONE_SECTION_PATTERN.findall(text)
+        return sorted(set(matches + standalone))[:20]
+
+    # Both patterns start with "section": locate candidates with str.find
+    # on the lowercase copy and match only there. last_end mirrors findall's
+    # non-overlapping scan ("section 12Section 5" → "12S", not "5").
+    found = set()
+    patterns = (IPC_PATTERN, STANDALONE_SECTION_PATTERN)
+    last_end = [0, 0]
+    pos = lower.find("section")
+    while pos != -1:
+        for idx, pattern in enumerate(patterns):
+            if pos < last_end[idx]:
+                continue
+            m = pattern.match(text, pos)
+            if m:
+                found.add(m.group(1))
+                last_end[idx] = m.end()
+        pos = lower.find("section", pos + 7)
+    return sorted(found)[:20]
+
+
+def _topics(lower: str) -> list:
+    return [t for t, kws in _TOPIC_SCAN.items() if any(k in lower for k in kws)]
+
+
+def _facts_match(text: str, lower: str, exact: bool):
+    if not exact:
+        return FACTS_PATTERN.search(text)
+
+    # Every heading (FACTS / Factual Background / Brief Facts) contains
+    # "fact"; try the regex only at those offsets, leftmost first.
+    pos = lower.find("fact")
+    while pos != -1:
+        if pos >= 6 and lower.startswith("brief ", pos - 6):
+            m = FACTS_PATTERN.match(text, pos - 6)
+            if m:
+                return m
+        m = FACTS_PATTERN.match(text, pos)
+        if m:
+            return m
+        pos = lower.find("fact", pos + 1)
+    return None
+
+
+def _iter_lines(text: str) -> Iterator[str]:
+    """Lazy text.split("\n")."""
+    start = 0
+    while True:
+        end = text.find("\n", start)
+        if end == -1:
+            yield text[start:]
+            return
+        yield text[start:end]
+        start = end + 1
+
+
+def _facts_summary(text: str, lower: str, exact: bool) -> str:
+    facts_match = _facts_match(text, lower, exact)
+    if facts_match and len(facts_match.group(1)) > 100:
+        return facts_match.group(1).strip()[:2000]
+
+    content_lines, started = [], False
+    joined_len = -1  # len("\n".join(content_lines)), tracked incrementally
+    for line in _iter_lines(text):
+        stripped = line.strip()
+        if not started and len(stripped) > 80:
+            started = True
+        if started:
+            content_lines.append(stripped)
+            joined_len += len(stripped) + 1
+        if joined_len > 2000:
+            break
+    return "\n".join(content_lines)[:2000]
+
+
+def extract_text_metadata(text: str) -> dict:
+    """IPC sections, topics and facts from one shared lowercase pass."""
+    lower, exact = _lower_for_scan(text)
+    return {
+        "ipc_sections": _ipc_sections(text, lower, exact),
+        "topics": _topics(lower),
+        "facts": _facts_summary(text, lower, exact),
+    }
 
 
 def extract_ipc_sections(text: str) -> list:
-    matches = IPC_PATTERN.findall(text)
-    standalone = re.findall(r"[Ss]ection\s+(\d+[A-Z]?)", text)
-    return sorted(set(matches + standalone))[:20]
+    return _ipc_sections(text, *_lower_for_scan(text))
 
 
 def detect_topics(text: str) -> list:
-    text_lower = text.lower()
-    return [t for t, kws in TOPIC_KEYWORDS.items() if any(k in text_lower for k in kws)]
+    return _topics(text.lower())
 
 
 def extract_court(text: str) -> str:
@@ -102,6 +349,45 @@ def extract_date(text: str) -> str:
     return ""
 
 
+def normalize_date(date_str: str) -> date | None:
+    """Parse a free-form judgment date (as returned by extract_date) into a date."""
+    clean = " ".join((date_str or "").split())
+    if not clean:
+        return None
+    for fmt in DATE_FORMATS:
+        try:
+            return datetime.strptime(clean, fmt).date()
+        except ValueError:
+            continue
+    return None
+
+
+def court_tier(court_name: str) -> str:
+    """Map a court name to one of the COURT_TIERS enum values."""
+    lower = (court_name or "").lower()
+    for tier, needle in COURT_TIERS:
+        if needle in lower:
+            return tier
+    return COURT_TIER_UNKNOWN
+
+
+def normalized_fields(court: str, date_str: str) -> dict:
+    """
+    Ingest-time normalized fields for filtering and ranking.
+
+    Returns:
+        {date_iso, year, date_epoch_days, court_tier} — date fields are None
+        when the date could not be parsed.
+    """
+    parsed = normalize_date(date_str)
+    return {
+        "date_iso": parsed.isoformat() if parsed else None,
+        "year": parsed.year if parsed else None,
+        "date_epoch_days": (parsed - EPOCH).days if parsed else None,
+        "court_tier": court_tier(court),
+    }
+
+
 def extract_outcome(text: str) -> str:
     lower = text[-3000:].lower()
     if any(w in lower for w in ["appeal is allowed", "petition allowed", "conviction set aside"]):
@@ -120,55 +406,68 @@ def extract_outcome(text: str) -> str:
 
 
 def extract_facts_summary(text: str) -> str:
-    facts_match = re.search(
-        r"(?:FACTS|Brief Facts|Factual Background)[:\s]*\n(.+?)(?:\n\s*\n|\n[A-Z]{3,})",
-        text,
-        re.DOTALL | re.IGNORECASE,
-    )
-    if facts_match and len(facts_match.group(1)) > 100:
-        return facts_match.group(1).strip()[:2000]
+    return _facts_summary(text, *_lower_for_scan(text))
 
-    lines = text.split("\n")
-    content_lines, started = [], False
-    for line in lines:
-        stripped = line.strip()
-        if not started and len(stripped) > 80:
-            started = True
-        if started:
-            content_lines.append(stripped)
-        if len("\n".join(content_lines)) > 2000:
-            break
-    return "\n".join(content_lines)[:2000]
+
+def document_id(text: str) -> str:
+    """Stable document id (doc_id in Qdrant, key of the summary store)."""
+    return hashlib.md5(text[:5000].encode()).hexdigest()[:12]
 
 
-def parse_document(filepath: str) -> dict | None:
-    text, page_count = extract_text_from_file(filepath)
+def _build_record(text: str, page_count: int, page_offsets: list[int], filename: str) -> dict | None:
     if not text or len(text) < 100:
         return None
 
-    filename = os.path.basename(filepath)
-    doc_hash = hashlib.md5(text[:5000].encode()).hexdigest()[:12]
+    doc_hash = document_id(text)
 
     source_url = extract_source_url(text)
+    court = extract_court(text)
+    date_str = extract_date(text)
+    metadata = extract_text_metadata(text)
 
     return {
         "id": doc_hash,
         "filename": filename,
-        "court": extract_court(text),
-        "date": extract_date(text),
-        "ipc_sections": extract_ipc_sections(text),
-        "topics": detect_topics(text),
+        "court": court,
+        "date": date_str,
+        **normalized_fields(court, date_str),
+        "ipc_sections": metadata["ipc_sections"],
+        # Act-qualified references, BNS/BNSS/BSA mapped to IPC/CrPC/IEA ids.
+        "section_ids": canonical_section_ids(text)[:50],
+        "topics": metadata["topics"],
         "outcome": extract_outcome(text),
-        "facts": extract_facts_summary(text),
+        "facts": metadata["facts"],
         "full_text": text,
         "text_length": len(text),
         "page_count": page_count,
+        "page_offsets": page_offsets,  # PDF only: char offset where each page starts
         "source_url": source_url,
         "parsed_at": datetime.now().isoformat(),
+        "parser_version": PARSER_VERSION,
     }
 
 
-def process_all():
+def parse_document(filepath: str, parallel: bool = False) -> dict | None:
+    """Parse a file; parallel=True is for batch ingest only (see PDF_PARALLEL_MIN_PAGES)."""
+    text, page_count, page_offsets = _extract_file(filepath, parallel)
+    return _build_record(text, page_count, page_offsets, os.path.basename(filepath))
+
+
+def parse_document_bytes(data: bytes, filename: str = "") -> dict | None:
+    """parse_document for an in-memory upload (no temp file)."""
+    text, page_count, page_offsets = _extract_bytes(data, filename)
+    return _build_record(text, page_count, page_offsets, filename)
+
+
+def process_all(reparse: bool = False):
+    """
+    Parse every raw document and record its metadata.
+
+    With pyarrow, new cases and cases stored by an older PARSER_VERSION (or
+    every case, with reparse=True) are appended to the case store, which is
+    then compacted so the fresh rows replace the stale ones. Leftover legacy
+    case_<id>.json files are imported into the store first.
+    """
     os.makedirs(DATA_PROCESSED, exist_ok=True)
     if not os.path.exists(DATA_RAW):
         print(f"[ERR] No raw data directory: {DATA_RAW}")
@@ -179,31 +478,62 @@ def process_all():
         print(f"[WARN] No documents in {DATA_RAW}")
         return []
 
+    use_store = case_store.available()
+    if use_store:
+        migrated = case_store.migrate_legacy_json(DATA_PROCESSED)
+        if migrated:
+            print(f"[INFO] Case store: imported {migrated} legacy case JSON file(s)")
+    stored_versions = case_store.read_case_versions() if use_store and case_store.exists() else {}
+    if not use_store:
+        print("[WARN] pyarrow not installed - writing legacy per-case JSON files")
+
     print(f"[INFO] Processing {len(files)} documents...")
     results = []
     for filename in files:
         filepath = os.path.join(DATA_RAW, filename)
         try:
-            parsed = parse_document(filepath)
+            parsed = parse_document(filepath, parallel=True)
             if parsed is None:
                 print(f"   [SKIP] Skipping {filename} (too short)")
                 continue
 
-            json_name = f"case_{parsed['id']}.json"
-            json_path = os.path.join(DATA_PROCESSED, json_name)
-            json_data = {k: v for k, v in parsed.items() if k != "full_text"}
-            with open(json_path, "w", encoding="utf-8") as f:
-                json.dump(json_data, f, indent=2, ensure_ascii=False)
+            if use_store:
+                target = "case store"
+            else:
+                target = f"case_{parsed['id']}.json"
+                json_data = {k: v for k, v in parsed.items() if k != "full_text"}
+                with open(os.path.join(DATA_PROCESSED, target), "w", encoding="utf-8") as f:
+                    json.dump(json_data, f, indent=2, ensure_ascii=False)
 
             results.append(parsed)
             sections_str = ", ".join(parsed["ipc_sections"][:5]) if parsed["ipc_sections"] else "none"
-            print(f"   [OK] {filename} -> {json_name} | Court: {parsed['court']} | IPC: {sections_str}")
+            print(f"   [OK] {filename} -> {target} | Court: {parsed['court']} | IPC: {sections_str}")
         except Exception as e:
             print(f"   [ERR] Error processing {filename}: {e}")
 
+    if use_store:
+        changed = {
+            r["id"]: r for r in results
+            if reparse or stored_versions.get(r["id"], -1) < PARSER_VERSION
+        }
+        updated = sum(1 for case_id in changed if case_id in stored_versions)
+        partition = case_store.append_cases(changed.values())
+        if updated:
+            partition = case_store.compact()
+        print(
+            f"[INFO] Case store: +{len(changed) - updated} new, {updated} re-parsed case(s) | "
+            f"{partition or 'no new partition'}"
+        )
+
     print(f"\n[DONE] Processed {len(results)}/{len(files)} documents")
     return results
 
 
 if __name__ == "__main__":
-    process_all()
+    import argparse
+
+    arg_parser = argparse.ArgumentParser(description="Parse data/raw into the processed case store")
+    arg_parser.add_argument(
+        "--reparse", action="store_true", help="Rewrite every case, not just new or older-version ones",
+    )
+    process_all(reparse=arg_parser.parse_args().reparse)
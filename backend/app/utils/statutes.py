@@ -0,0 +1,320 @@
+"""
+Statute references and Act-text parsing.
+
+  • find_statute_refs / extract_statute_refs — "Section 438 CrPC",
+    "u/s 302/34 IPC", "IPC 420", "Article 21" → canonical ids "CRPC:438",
+    "IPC:302", "IPC:34", "IPC:420", "CONST:21"
+  • canonical_ids / canonical_section_ids — references to the 2023 codes
+    (BNS, BNSS, BSA) mapped onto the IPC / CrPC / Evidence Act sections they
+    replaced, so "103 BNS" and "302 IPC" both normalize to "IPC:302"
+  • detect_act — act code for a title ("The Code of Criminal Procedure, 1973")
+  • parse_act_text — sections of a scraped Indian Kanoon Act / Section page
+
+A bare number without an act ("section 438") is ambiguous across Acts and
+is not returned; app.models.ranker.extract_query_sections covers those.
+"""
+
+import re
+
+# Act code → display name.
+ACT_NAMES = {
+    "IPC": "Indian Penal Code, 1860",
+    "CRPC": "Code of Criminal Procedure, 1973",
+    "CPC": "Code of Civil Procedure, 1908",
+    "IEA": "Indian Evidence Act, 1872",
+    "ICA": "Indian Contract Act, 1872",
+    "NIA": "Negotiable Instruments Act, 1881",
+    "BNS": "Bharatiya Nyaya Sanhita, 2023",
+    "BNSS": "Bharatiya Nagarik Suraksha Sanhita, 2023",
+    "BSA": "Bharatiya Sakshya Adhiniyam, 2023",
+    "CONST": "Constitution of India",
+}
+
+# Full names (matched literally) and acronyms (dots/spaces optional:
+# "crpc", "cr.p.c.", "cr. p. c.").
+_ACT_NAMES_LOWER = {
+    "IPC": ["indian penal code", "penal code"],
+    "CRPC": ["code of criminal procedure", "criminal procedure code"],
+    "CPC": ["code of civil procedure", "civil procedure code"],
+    "IEA": ["indian evidence act", "evidence act"],
+    "ICA": ["indian contract act", "contract act"],
+    "NIA": ["negotiable instruments act"],
+    "BNS": ["bharatiya nyaya sanhita"],
+    "BNSS": ["bharatiya nagarik suraksha sanhita"],
+    "BSA": ["bharatiya sakshya adhiniyam"],
+    "CONST": ["constitution of india", "constitution"],
+}
+_ACT_ACRONYMS = {
+    "IPC": ["ipc"],
+    "CRPC": ["crpc"],
+    "CPC": ["cpc"],
+    "IEA": ["iea"],
+    "NIA": ["ni act"],
+    "BNS": ["bns"],
+    "BNSS": ["bnss"],
+    "BSA": ["bsa"],
+}
+
+
+def _acronym_pattern(acronym: str) -> str:
+    parts = []
+    for word in acronym.split():
+        parts.append(r"\.?\s?".join(re.escape(ch) for ch in word) + r"\.?")
+    return r"\s".join(parts)
+
+
+def _act_alternation() -> tuple[str, dict[str, str]]:
+    """Regex alternation of every alias (longest first) and alias-group → code."""
+    groups = {}
+    alternatives = []
+    for code, names in _ACT_NAMES_LOWER.items():
+        for name in names:
+            alternatives.append((len(name), re.escape(name).replace(r"\ ", r"\s+"), code))
+    for code, acronyms in _ACT_ACRONYMS.items():
+        for acronym in acronyms:
+            alternatives.append((len(acronym), _acronym_pattern(acronym), code))
+    alternatives.sort(key=lambda item: -item[0])
+    parts = []
+    for idx, (_, pattern, code) in enumerate(alternatives):
+        name = f"a{idx}"
+        groups[name] = code
+        parts.append(f"(?P<{name}>{pattern})")
+    return "|".join(parts), groups
+
+
+_ACT_ALT, _ACT_GROUPS = _act_alternation()
+# Leading-letter lookahead: the alternation is only tried where an alias can start.
+_ACT_FIRST = "".join(sorted({n[0] for names in (*_ACT_NAMES_LOWER.values(), *_ACT_ACRONYMS.values()) for n in names}))
+_ACT = rf"(?<![a-z])(?=[{_ACT_FIRST}])(?:{_ACT_ALT})(?![a-z])"
+_SEC = r"\d{1,3}[a-z]{0,2}(?![\d])(?:\s*\(\w{1,4}\))*"
+_SEC_LIST = rf"{_SEC}(?:\s*(?:/|,|&|\band\b|\bor\b|\bread\s+with\b|\br/w\b)\s*{_SEC})*"
+_SEC_WORD = r"(?:sections?|secs?\.?|ss?\.|u/ss?\.?|under\s+sections?)"
+_OF = r"(?:\s*(?:of|in|under)\s+(?:the\s+)?|\s*,?\s*)"
+_YEAR = r"(?:\s*,?\s*(?:18|19|20)\d{2})?"
+
+REF_PATTERNS = [
+    # "section 438 of the code of criminal procedure", "u/s 302/34 ipc"
+    re.compile(rf"\b{_SEC_WORD}\s*(?P<secs>{_SEC_LIST}){_OF}(?P<act>{_ACT})"),
+    # "302/34 ipc", "420 i.p.c."
+    re.compile(rf"(?<![\w/.])(?P<secs>{_SEC_LIST})\s+(?:of\s+(?:the\s+)?)?(?P<act>{_ACT})"),
+    # "ipc 420", "crpc section 438", "indian penal code, 1860 section 302"
+    re.compile(rf"(?P<act>{_ACT}){_YEAR}\s*,?\s*(?:{_SEC_WORD}\s*)?(?P<secs>{_SEC_LIST})"),
+    # "article 21", "articles 14 and 21 of the constitution"
+    # (the lookbehind follows the literal so the scan can skip to "article")
+    re.compile(rf"article(?<![a-z]article)s?\s+(?P<secs>{_SEC_LIST})"),
+]
+_ACT_PATTERN = re.compile(_ACT)
+# Max characters between the start of a reference and its act name.
+_REF_WINDOW = 160
+_SECTION_NUMBER = re.compile(r"(\d{1,3}[a-z]{0,2})(?![\d])((?:\s*\(\w{1,4}\))*)")
+_SUBSECTION = re.compile(r"\(\w{1,4}\)")
+
+
+def _act_code(match: re.Match) -> str:
+    for name, code in _ACT_GROUPS.items():
+        if match.group(name):
+            return code
+    return ""
+
+
+def detect_act(title: str) -> str:
+    """Act code mentioned in a title/heading, or "" if none is recognized."""
+    match = re.search(_ACT, (title or "").lower())
+    return _act_code(match) if match else ""
+
+
+def find_statute_refs(text: str, subsections: bool = False) -> list[tuple[int, int, str]]:
+    """
+    (start, end, id) for every statute reference in text, by position.
+
+    Ids are "ACT:SECTION"; with subsections=True the first sub-section is
+    kept ("BNS:318(4)"), which the 2023-code mapping needs.
+    """
+    lower = (text or "").lower()
+    matches = []
+    # Act-qualified patterns are only tried around act-name occurrences
+    # rather than over the whole judgment.
+    for act in _ACT_PATTERN.finditer(lower):
+        for pattern in REF_PATTERNS[:2]:
+            for m in pattern.finditer(lower, max(0, act.start() - _REF_WINDOW), act.end()):
+                if m.end() == act.end():
+                    matches.append((m, _act_code(m)))
+        m = REF_PATTERNS[2].match(lower, act.start(), act.end() + _REF_WINDOW)
+        if m:
+            matches.append((m, _act_code(m)))
+    matches.extend((m, "CONST") for m in REF_PATTERNS[3].finditer(lower))
+
+    found = set()
+    for m, act in matches:
+        for number, subs in _SECTION_NUMBER.findall(m.group("secs")):
+            sub = _SUBSECTION.search(subs) if subsections else None
+            found.add((m.start(), m.end(), f"{act}:{number.upper()}{sub.group(0) if sub else ''}"))
+    return sorted(found)
+
+
+def extract_statute_refs(text: str) -> list[str]:
+    """Unique canonical ids ("IPC:420", "CRPC:438", "CONST:21") in order of appearance."""
+    seen = {}
+    for _, _, ref in find_statute_refs(text):
+        seen.setdefault(ref, None)
+    return list(seen)
+
+
+# ── 2023 codes → IPC / CrPC / Evidence Act ────────────────────────────
+
+# Sections of the replaced codes → their equivalent in the 2023 codes, for
+# the provisions most cited in judgments. Where a new section merges several
+# old ones (BNS 318 covers IPC 415/417/418/420) the sub-section tells them apart.
+SECTION_EQUIVALENTS = {
+    "IPC": ("BNS", {
+        "34": "3(5)", "84": "22", "96": "34", "100": "38", "107": "45", "109": "49",
+        "120A": "61(1)", "120B": "61(2)", "121": "147", "124A": "152", "147": "191(2)",
+        "148": "191(3)", "149": "190", "153A": "196", "193": "229", "201": "238",
+        "279": "281", "295A": "299", "299": "100", "300": "101", "302": "103(1)",
+        "304": "105", "304A": "106(1)", "304B": "80", "306": "108", "307": "109",
+        "308": "110", "312": "88", "319": "114", "320": "116", "323": "115(2)",
+        "324": "118(1)", "325": "117(2)", "326": "118(2)", "326A": "124(1)",
+        "341": "126(2)", "342": "127(2)", "354": "74", "354A": "75", "354B": "76",
+        "354C": "77", "354D": "78", "363": "137(2)", "364A": "140(2)", "366": "87",
+        "370": "143", "375": "63", "376": "64", "376A": "66", "376D": "70(1)",
+        "378": "303(1)", "379": "303(2)", "380": "305", "383": "308(1)", "384": "308(2)",
+        "390": "309(1)", "392": "309(4)", "395": "310(2)", "396": "310(3)", "397": "311",
+        "403": "314", "405": "316(1)", "406": "316(2)", "409": "316(5)", "411": "317(2)",
+        "415": "318(1)", "417": "318(2)", "418": "318(3)", "420": "318(4)", "425": "324(1)",
+        "426": "324(2)", "447": "329(3)", "448": "329(4)", "463": "336(1)", "465": "336(2)",
+        "467": "338", "468": "336(3)", "471": "340(2)", "489A": "178", "494": "82(1)",
+        "498A": "85", "499": "356(1)", "500": "356(2)", "503": "351(1)", "506": "351(2)",
+        "509": "79", "511": "62",
+    }),
+    "CRPC": ("BNSS", {
+        "41": "35", "41A": "35(3)", "107": "126", "125": "144", "144": "163", "154": "173",
+        "156": "175", "161": "180", "164": "183", "167": "187", "173": "193", "190": "210",
+        "197": "218", "200": "223", "204": "227", "227": "250", "228": "251", "239": "262",
+        "311": "348", "313": "351", "320": "359", "374": "415", "378": "419", "389": "430",
+        "397": "438", "401": "442", "406": "446", "436": "478", "436A": "479", "437": "480",
+        "438": "482", "439": "483", "482": "528",
+    }),
+    "IEA": ("BSA", {
+        "3": "2", "17": "15", "24": "22", "25": "23(1)", "26": "23(2)", "27": "23(2)",
+        "32": "26", "45": "39", "65B": "63", "101": "104", "106": "109", "113A": "117",
+        "113B": "118", "114": "119",
+    }),
+}
+
+
+def _compile_equivalents() -> dict[str, list[str]]:
+    """New-code id → canonical ids, keyed both with and without sub-section."""
+    reverse: dict[str, list[str]] = {}
+    for old_act, (new_act, table) in SECTION_EQUIVALENTS.items():
+        for old, new in table.items():
+            canonical = f"{old_act}:{old}"
+            keys = {f"{new_act}:{new}", f"{new_act}:{_SUBSECTION.sub('', new)}"}
+            for key in keys:
+                reverse.setdefault(key, [])
+                if canonical not in reverse[key]:
+                    reverse[key].append(canonical)
+    return reverse
+
+
+_CANONICAL = _compile_equivalents()
+
+
+def canonical_ids(ref: str) -> list[str]:
+    """
+    Canonical ids for one reference ("BNS:318(4)" → ["IPC:420"]).
+
+    2023-code sections map to the section(s) they replaced (all of them when
+    no sub-section narrows it down); anything else drops its sub-section.
+    Unmapped new-code sections stay as they are.
+    """
+    if ref in _CANONICAL:
+        return _CANONICAL[ref]
+    section = _SUBSECTION.sub("", ref)
+    return _CANONICAL.get(section, [section])
+
+
+def canonical_section_ids(text: str) -> list[str]:
+    """Unique canonical ids of every statute reference in text, in order of appearance."""
+    seen = {}
+    for _, _, ref in find_statute_refs(text, subsections=True):
+        for canonical in canonical_ids(ref):
+            seen.setdefault(canonical, None)
+    return list(seen)
+
+
+# ── Act text parsing ──────────────────────────────────────────────────
+
+_HEADER_ONLY = re.compile(r"^(\d{1,3}[A-Z]{0,2})\.$")
+_HEADER_INLINE = re.compile(r"^(\d{1,3}[A-Z]{0,2})\.\s*(\S.*)$")
+_CHAPTER = re.compile(r"^chapter\s+[ivxlc]+\b", re.IGNORECASE)
+# Schedules repeat section numbers of other Acts (CrPC First Schedule lists
+# IPC offences), so parsing stops there; "Translation" starts the site footer.
+_STOP = re.compile(r"^(?:the\s+)?(?:\w+\s+)?schedule$|^translation$", re.IGNORECASE)
+_BODY_START = re.compile(r"^Union of India - (?:Act|Section)$")
+
+
+def _title_from_header(text: str) -> str:
+    """First content line after the scraper's ==== separator."""
+    _, sep, rest = text.partition("=" * 20)
+    for line in (rest if sep else text).splitlines():
+        line = line.strip("= \t")
+        if line:
+            return line
+    return ""
+
+
+def parse_act_text(text: str) -> tuple[str, str, dict[str, dict]]:
+    """
+    Split an Act (or single-section) page into sections.
+
+    Sections start at a line "438." followed by the title line (whole Acts)
+    or "438. Title" (single-section pages). The first occurrence of a number
+    wins. Returns (act_code, act_title, {section: {"title", "text"}}).
+    """
+    act_title = _title_from_header(text)
+    if act_title.lower().startswith("section "):
+        # "Section 438 in The Code of Criminal Procedure, 1973"
+        act_title = act_title.split(" in ", 1)[-1]
+    act_code = detect_act(act_title)
+
+    lines = [line.strip() for line in text.splitlines()]
+    start = next((i + 1 for i, line in enumerate(lines) if _BODY_START.match(line)), 0)
+    single_section = "- Section" in (lines[start - 1] if start else "")
+
+    sections: dict[str, dict] = {}
+    current = None
+    body: list[str] = []
+
+    def _close() -> None:
+        if current is not None and current[0] not in sections:
+            sections[current[0]] = {"title": current[1], "text": "\n".join(body).strip()}
+
+    i = start
+    while i < len(lines):
+        line = lines[i]
+        if _STOP.match(line):
+            break
+        header = _HEADER_ONLY.match(line)
+        title = ""
+        if header:
+            j = i + 1
+            while j < len(lines) and not lines[j]:
+                j += 1
+            title = lines[j] if j < len(lines) else ""
+            i = j
+        elif single_section and current is None:
+            header = _HEADER_INLINE.match(line)
+            title = header.group(2) if header else ""
+        if header:
+            _close()
+            number = header.group(1)
+            current = (number, title.rstrip(" .—-")) if number not in sections else None
+            body = []
+        elif _CHAPTER.match(line):
+            _close()
+            current, body = None, []
+        elif current is not None and line:
+            body.append(line)
+        i += 1
+    _close()
+    return act_code, act_title, sections
@@ -0,0 +1,124 @@
+"""
+Microbenchmark: single-pass metadata extraction vs the legacy per-field scans.
+
+Usage:
+    python backend/benchmarks/parser_metadata.py [--raw-dir DIR] [--repeat 5]
+
+Runs the legacy extract_ipc_sections / detect_topics / extract_facts_summary
+(copied verbatim below) and utils.parser.extract_text_metadata over every
+.txt/.pdf in data/raw, checks the outputs are identical, and reports timings.
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import re
+import sys
+import time
+
+BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, BACKEND_DIR)
+
+from app.utils.parser import (  # noqa: E402
+    DATA_RAW,
+    IPC_PATTERN,
+    TOPIC_KEYWORDS,
+    extract_text_from_file,
+    extract_text_metadata,
+)
+
+
+# ── Legacy implementations (pre single-pass) ────────────────────────
+
+def legacy_extract_ipc_sections(text: str) -> list:
+    matches = IPC_PATTERN.findall(text)
+    standalone = re.findall(r"[Ss]ection\s+(\d+[A-Z]?)", text)
+    return sorted(set(matches + standalone))[:20]
+
+
+def legacy_detect_topics(text: str) -> list:
+    text_lower = text.lower()
+    return [t for t, kws in TOPIC_KEYWORDS.items() if any(k in text_lower for k in kws)]
+
+
+def legacy_extract_facts_summary(text: str) -> str:
+    facts_match = re.search(
+        r"(?:FACTS|Brief Facts|Factual Background)[:\s]*\n(.+?)(?:\n\s*\n|\n[A-Z]{3,})",
+        text,
+        re.DOTALL | re.IGNORECASE,
+    )
+    if facts_match and len(facts_match.group(1)) > 100:
+        return facts_match.group(1).strip()[:2000]
+
+    lines = text.split("\n")
+    content_lines, started = [], False
+    for line in lines:
+        stripped = line.strip()
+        if not started and len(stripped) > 80:
+            started = True
+        if started:
+            content_lines.append(stripped)
+        if len("\n".join(content_lines)) > 2000:
+            break
+    return "\n".join(content_lines)[:2000]
+
+
+def legacy_metadata(text: str) -> dict:
+    return {
+        "ipc_sections": legacy_extract_ipc_sections(text),
+        "topics": legacy_detect_topics(text),
+        "facts": legacy_extract_facts_summary(text),
+    }
+
+
+def _legacy_keys(metadata: dict) -> dict:
+    """Only the fields the legacy scans produced are compared."""
+    return {key: metadata[key] for key in ("ipc_sections", "topics", "facts")}
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmark parser metadata extraction")
+    parser.add_argument("--raw-dir", default=DATA_RAW)
+    parser.add_argument("--repeat", type=int, default=5)
+    return parser.parse_args()
+
+
+def _time(fn, texts: list[str], repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for text in texts:
+            fn(text)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main() -> int:
+    args = parse_args()
+    files = sorted(f for f in os.listdir(args.raw_dir) if f.endswith((".pdf", ".txt")))
+    docs = [(f, extract_text_from_file(os.path.join(args.raw_dir, f))[0]) for f in files]
+    docs = [(f, t) for f, t in docs if t]
+    texts = [t for _, t in docs]
+    if not texts:
+        print(f"[ERR] No documents in {args.raw_dir}")
+        return 1
+
+    mismatches = [f for f, t in docs if legacy_metadata(t) != _legacy_keys(extract_text_metadata(t))]
+    total_mb = sum(len(t) for t in texts) / (1024 * 1024)
+    print(f"[INFO] {len(texts)} document(s) | {total_mb:.1f} MB of text | best of {args.repeat}")
+
+    legacy = _time(legacy_metadata, texts, args.repeat)
+    single = _time(extract_text_metadata, texts, args.repeat)
+    print(f"legacy       {legacy * 1000:8.1f} ms  ({total_mb / legacy:6.1f} MB/s)")
+    print(f"single-pass  {single * 1000:8.1f} ms  ({total_mb / single:6.1f} MB/s)  x{legacy / single:.2f}")
+
+    if mismatches:
+        print(f"[ERR] Output differs for {len(mismatches)} file(s): {', '.join(mismatches[:5])}")
+        return 1
+    print("[OK] Outputs identical")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,148 @@
+"""
+Benchmark local summarizer decoding profiles (fast / balanced / quality).
+
+Usage:
+    python backend/benchmarks/summarizer_profiles.py --refs refs.jsonl [--model PATH] [--size short]
+
+refs.jsonl holds one {"text": ..., "summary": ...} object per line (reference
+summaries). Without --refs, the first --limit documents in data/raw/ are used
+and only throughput is reported.
+
+Reports per profile: wall time, generated tokens/sec (every generate call,
+chunk passes included, not only the final summary), and ROUGE-1/2/L F1
+against the references.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import re
+import sys
+import time
+from collections import Counter
+
+BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, BACKEND_DIR)
+
+from app.models import summarizer  # noqa: E402
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmark summarizer decoding profiles")
+    parser.add_argument("--refs", help="JSONL file of {text, summary} pairs")
+    parser.add_argument("--model", default=None, help="Model path/name (default: summarizer's resolution)")
+    parser.add_argument("--size", default="short", choices=sorted(summarizer.SUMMARY_PRESETS))
+    parser.add_argument("--profiles", default=",".join(summarizer.DECODING_PROFILES))
+    parser.add_argument("--limit", type=int, default=5)
+    return parser.parse_args()
+
+
+def _tokens(text: str) -> list[str]:
+    return re.findall(r"\w+", (text or "").lower())
+
+
+def _ngrams(tokens: list[str], n: int) -> Counter:
+    return Counter(tuple(tokens[i : i + n]) for i in range(len(tokens) - n + 1))
+
+
+def _f1(overlap: int, pred_total: int, ref_total: int) -> float:
+    if not overlap or not pred_total or not ref_total:
+        return 0.0
+    precision, recall = overlap / pred_total, overlap / ref_total
+    return 2 * precision * recall / (precision + recall)
+
+
+def _lcs(a: list[str], b: list[str]) -> int:
+    prev = [0] * (len(b) + 1)
+    for x in a:
+        cur = [0]
+        for j, y in enumerate(b, start=1):
+            cur.append(prev[j - 1] + 1 if x == y else max(prev[j], cur[j - 1]))
+        prev = cur
+    return prev[-1]
+
+
+def rouge(prediction: str, reference: str) -> dict[str, float]:
+    pred, ref = _tokens(prediction), _tokens(reference)
+    scores = {}
+    for n in (1, 2):
+        p, r = _ngrams(pred, n), _ngrams(ref, n)
+        scores[f"rouge{n}"] = _f1(sum((p & r).values()), sum(p.values()), sum(r.values()))
+    scores["rougeL"] = _f1(_lcs(pred, ref), len(pred), len(ref))
+    return scores
+
+
+def _count_generated_tokens(counter: Counter):
+    """Wrap summarizer._generate_batch so every generated output is counted."""
+    generate_batch = summarizer._generate_batch
+
+    def counting(entry, prompts, *args, **kwargs):
+        outputs = generate_batch(entry, prompts, *args, **kwargs)
+        counter["tokens"] += sum(len(ids) for ids in entry.tokenizer(outputs)["input_ids"]) if outputs else 0
+        return outputs
+
+    summarizer._generate_batch = counting
+
+
+def load_samples(args: argparse.Namespace) -> list[dict]:
+    if args.refs:
+        with open(args.refs, "r", encoding="utf-8") as f:
+            return [json.loads(line) for line in f if line.strip()][: args.limit]
+
+    raw_dir = os.path.join(BACKEND_DIR, "data", "raw")
+    samples = []
+    for name in sorted(os.listdir(raw_dir)) if os.path.isdir(raw_dir) else []:
+        if name.endswith(".txt"):
+            with open(os.path.join(raw_dir, name), "r", encoding="utf-8", errors="ignore") as f:
+                samples.append({"text": f.read(), "summary": None})
+        if len(samples) >= args.limit:
+            break
+    return samples
+
+
+def main() -> int:
+    args = parse_args()
+    samples = load_samples(args)
+    if not samples:
+        print("[ERR] No samples to benchmark.")
+        return 1
+
+    entry = summarizer._load_model(args.model)
+    if entry is None:
+        print("[ERR] No local summarizer model available.")
+        return 1
+    print(f"[INFO] model={entry.ref} | device={entry.device} | size={args.size} | samples={len(samples)}")
+
+    generated = Counter()
+    _count_generated_tokens(generated)
+
+    print(f"{'profile':<10} {'seconds':>8} {'tok/s':>8} {'rouge1':>7} {'rouge2':>7} {'rougeL':>7}")
+    for profile in [p.strip() for p in args.profiles.split(",") if p.strip()]:
+        generated.clear()
+        elapsed = 0.0
+        totals = Counter()
+        scored = 0
+        for sample in samples:
+            start = time.perf_counter()
+            output = summarizer.summarize_text(
+                sample["text"],
+                summary_size=args.size,
+                model_ref=args.model,
+                decoding_profile=profile,
+            ) or ""
+            elapsed += time.perf_counter() - start
+            if sample.get("summary"):
+                totals.update(rouge(output, sample["summary"]))
+                scored += 1
+
+        tps = generated["tokens"] / elapsed if elapsed else 0.0
+        r = {k: (totals[k] / scored if scored else float("nan")) for k in ("rouge1", "rouge2", "rougeL")}
+        print(f"{profile:<10} {elapsed:>8.2f} {tps:>8.1f} {r['rouge1']:>7.3f} {r['rouge2']:>7.3f} {r['rougeL']:>7.3f}")
+
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,186 @@
+"""
+Blue/green build of the chunk index (see app/core/index_registry.py).
+
+Usage:
+    python backend/cronjobs/build_index.py build [--activate] [--alias NAME] [--drop-legacy]
+    python backend/cronjobs/build_index.py activate <collection> [--alias NAME] [--drop-legacy]
+    python backend/cronjobs/build_index.py rollback
+    python backend/cronjobs/build_index.py list
+    python backend/cronjobs/build_index.py prune [--keep 2]
+
+`build` embeds data/raw/ with the current EMBED_MODEL / CHUNK_SIZE /
+CHUNK_OVERLAP into a fresh collection while the live alias keeps serving
+the previous build; `--activate` swaps the alias once the build is
+verified. `rollback` points the alias back at the newest retired build.
+
+First migration of a deployment whose QDRANT_COLLECTION is still a physical
+collection: `build --activate --alias <new-name>`, then set
+QDRANT_COLLECTION=<new-name> and restart the API (no downtime). The old
+collection can be deleted once nothing reads it. `--drop-legacy` instead
+deletes the live collection before the alias exists, so searches fail
+until the swap completes.
+"""
+
+import argparse
+import os
+import re
+import sys
+import time
+
+BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, BACKEND_DIR)
+
+from app.core import index_registry  # noqa: E402
+from app.core.config import (  # noqa: E402
+    CHUNK_OVERLAP,
+    CHUNK_SIZE,
+    COLLECTION,
+    EMBED_DIM,
+    EMBED_MODEL,
+    EMBED_MRL_DIM,
+    embedder,
+    qdrant_client,
+)
+from app.models.embeddings import create_collection, process_and_upload  # noqa: E402
+
+
+DROP_LEGACY_HELP = (
+    "Delete a physical collection named like the alias before creating the alias. "
+    "Causes downtime: searches fail until the alias exists. Prefer --alias with a new name."
+)
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Versioned chunk-index builds behind a Qdrant alias")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    build = sub.add_parser("build", help="Build a new index version from data/raw/")
+    build.add_argument("--activate", action="store_true", help="Swap the alias to the new build when verified")
+    build.add_argument("--alias", default=COLLECTION, help="Alias to build for (default: QDRANT_COLLECTION)")
+    build.add_argument("--drop-legacy", action="store_true", help=DROP_LEGACY_HELP)
+
+    activate = sub.add_parser("activate", help="Point the alias at a registered build")
+    activate.add_argument("name")
+    activate.add_argument("--alias", default=COLLECTION, help="Alias the build was registered for")
+    activate.add_argument("--drop-legacy", action="store_true", help=DROP_LEGACY_HELP)
+
+    sub.add_parser("rollback", help="Point the alias back at the newest retired build")
+    sub.add_parser("list", help="Show registered builds")
+
+    prune = sub.add_parser("prune", help="Delete old retired builds")
+    prune.add_argument("--keep", type=int, default=2, help="Retired builds to keep for rollback")
+    return parser.parse_args()
+
+
+def _model_slug(model: str) -> str:
+    return re.sub(r"[^a-z0-9]+", "-", model.split("/")[-1].lower()).strip("-")
+
+
+def build(activate: bool, drop_legacy: bool, alias: str = COLLECTION) -> int:
+    name = f"{alias}__{_model_slug(EMBED_MODEL)}__{time.strftime('%Y%m%d%H%M%S')}"
+    mrl_dim = EMBED_MRL_DIM if 0 < EMBED_MRL_DIM < EMBED_DIM else 0
+    print(
+        f"[INFO] Building {name} | model={EMBED_MODEL} | dim={EMBED_DIM} | mrl_dim={mrl_dim or '-'} "
+        f"| chunk={CHUNK_SIZE}/{CHUNK_OVERLAP}"
+    )
+
+    index_registry.register(name, alias, EMBED_MODEL, EMBED_DIM, CHUNK_SIZE, CHUNK_OVERLAP, mrl_dim)
+    create_collection(name, mrl_dim)
+    summary = process_and_upload(os.path.join(BACKEND_DIR, "data", "raw"), skip_existing=False, collection=name)
+
+    points = qdrant_client.count(collection_name=name, exact=True).count
+    if points == 0 or summary.get("failed_docs"):
+        index_registry.update(name, status=index_registry.STATUS_FAILED, points=points)
+        print(f"[ERR] Build {name} incomplete: points={points} | failed_docs={summary.get('failed_docs')}")
+        return 1
+
+    # Smoke query: the new collection must answer with this embedder's vectors.
+    probe = embedder.encode("cheating and criminal breach of trust").tolist()
+    hits = qdrant_client.query_points(
+        collection_name=name,
+        query=probe,
+        using=index_registry.FULL_VECTOR if mrl_dim else None,
+        limit=3,
+    ).points
+    if not hits:
+        index_registry.update(name, status=index_registry.STATUS_FAILED, points=points)
+        print(f"[ERR] Build {name} returned no results for the probe query")
+        return 1
+
+    index_registry.update(name, status=index_registry.STATUS_READY, points=points)
+    print(f"[OK] {name} ready | points={points}")
+
+    if activate:
+        index_registry.activate(qdrant_client, alias, name, drop_legacy=drop_legacy)
+        print(f"[DONE] Alias '{alias}' → {name}")
+        if alias != COLLECTION:
+            print(f"[INFO] Set QDRANT_COLLECTION={alias} and restart the API to serve this build")
+    else:
+        flag = f" --alias {alias}" if alias != COLLECTION else ""
+        print(f"[DONE] Activate with: python backend/cronjobs/build_index.py activate {name}{flag}")
+    return 0
+
+
+def rollback() -> int:
+    current = index_registry.alias_target(qdrant_client, COLLECTION)
+    retired = [
+        e for e in index_registry.entries(COLLECTION)
+        if e["status"] == index_registry.STATUS_RETIRED and e["name"] != current
+    ]
+    retired.sort(key=lambda e: e.get("activated_at", ""), reverse=True)
+    if not retired:
+        print("[ERR] No retired build to roll back to.")
+        return 1
+    index_registry.activate(qdrant_client, COLLECTION, retired[0]["name"])
+    print(f"[DONE] Alias '{COLLECTION}' → {retired[0]['name']} (was {current})")
+    return 0
+
+
+def list_builds() -> int:
+    current = index_registry.alias_target(qdrant_client, COLLECTION)
+    print(f"[INFO] Alias '{COLLECTION}' → {current or '-'}")
+    for e in index_registry.entries(COLLECTION):
+        marker = "*" if e["name"] == current else " "
+        print(
+            f" {marker} {e['name']:<60} {e['status']:<9} {e['model']} dim={e['dim']} mrl={e.get('mrl_dim', 0)} "
+            f"chunk={e['chunk_size']}/{e['chunk_overlap']} points={e.get('points', 0)} built={e['built_at']}"
+        )
+    return 0
+
+
+def prune(keep: int) -> int:
+    current = index_registry.alias_target(qdrant_client, COLLECTION)
+    stale = [
+        e for e in index_registry.entries(COLLECTION)
+        if e["name"] != current and e["status"] in (index_registry.STATUS_RETIRED, index_registry.STATUS_FAILED)
+    ]
+    retired_seen = 0
+    for e in stale:
+        if e["status"] == index_registry.STATUS_RETIRED and retired_seen < keep:
+            retired_seen += 1
+            continue
+        if qdrant_client.collection_exists(e["name"]):
+            qdrant_client.delete_collection(e["name"])
+        index_registry.remove(e["name"])
+        print(f"   [OK] Deleted {e['name']} ({e['status']})")
+    print("[DONE] Prune complete.")
+    return 0
+
+
+def main() -> int:
+    args = parse_args()
+    if args.command == "build":
+        return build(args.activate, args.drop_legacy, args.alias)
+    if args.command == "activate":
+        index_registry.activate(qdrant_client, args.alias, args.name, drop_legacy=args.drop_legacy)
+        print(f"[DONE] Alias '{args.alias}' → {args.name}")
+        return 0
+    if args.command == "rollback":
+        return rollback()
+    if args.command == "prune":
+        return prune(args.keep)
+    return list_builds()
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
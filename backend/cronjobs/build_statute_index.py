@@ -0,0 +1,142 @@
+"""
+Build the statute index (data/processed/statutes.json) from data/raw/.
+
+Usage:
+    python backend/cronjobs/build_statute_index.py [--raw-dir PATH] [--max-related 10]
+
+Act pages (Entire_Act_*.txt) and single-section pages (Section_*.txt) are
+split into sections keyed "ACT:SECTION" (e.g. "CRPC:438"); single-section
+pages override the whole-Act text. Every other document is treated as a
+judgment: its statute references ("Section 438 CrPC", "u/s 420 IPC") link
+it to those sections as a related judgment, with a snippet around the first
+mention. The API loads the file once (app/services/statute_service.py).
+"""
+
+import argparse
+import json
+import os
+import sys
+from datetime import datetime
+
+BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, BACKEND_DIR)
+
+from app.services.statute_service import STATUTE_INDEX_FILE  # noqa: E402
+from app.utils.parser import extract_text_from_file, parse_document  # noqa: E402
+from app.utils.statutes import ACT_NAMES, canonical_ids, find_statute_refs, parse_act_text  # noqa: E402
+
+SNIPPET_CHARS = 300
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Build the statute/section index")
+    parser.add_argument("--raw-dir", default=os.path.join(BACKEND_DIR, "data", "raw"))
+    parser.add_argument("--output", default=STATUTE_INDEX_FILE)
+    parser.add_argument("--max-related", type=int, default=10, help="Related judgments kept per section")
+    return parser.parse_args()
+
+
+def _is_statute_file(name: str) -> bool:
+    return name.startswith(("Entire_Act_", "Section_"))
+
+
+def _source_url(text: str) -> str:
+    first = text.split("\n", 1)[0]
+    return first[len("SOURCE:"):].strip() if first.startswith("SOURCE:") else ""
+
+
+def build_sections(raw_dir: str, files: list[str]) -> dict[str, dict]:
+    sections: dict[str, dict] = {}
+    # Whole Acts first so single-section pages override them.
+    for name in sorted(files, key=lambda n: (not n.startswith("Entire_Act_"), n)):
+        text, _page_count = extract_text_from_file(os.path.join(raw_dir, name))
+        act, act_title, parsed = parse_act_text(text)
+        if not act:
+            print(f"   [SKIP] {name}: act not recognized ({act_title[:60]})")
+            continue
+        for number, section in parsed.items():
+            sections[f"{act}:{number}"] = {
+                "id": f"{act}:{number}",
+                "act": act,
+                "act_title": act_title or ACT_NAMES.get(act, act),
+                "section": number,
+                "title": section["title"],
+                "text": section["text"],
+                "source_file": name,
+                "source_url": _source_url(text),
+                "related": [],
+            }
+        print(f"   [OK] {name}: {act} | {len(parsed)} section(s)")
+    return sections
+
+
+def link_judgments(raw_dir: str, files: list[str], sections: dict[str, dict], max_related: int) -> int:
+    linked = 0
+    for name in sorted(files):
+        parsed = parse_document(os.path.join(raw_dir, name))
+        if parsed is None:
+            continue
+        text = parsed["full_text"]
+        mentions: dict[str, list[int]] = {}
+        for start, _end, ref in find_statute_refs(text, subsections=True):
+            section = ref.split("(", 1)[0]
+            # BNS/BNSS/BSA citations link to the IPC/CrPC/IEA section they replaced.
+            for target in [section] if section in sections else canonical_ids(ref):
+                if target in sections:
+                    mentions.setdefault(target, []).append(start)
+        for ref, positions in mentions.items():
+            first = positions[0]
+            snippet = text[max(0, first - SNIPPET_CHARS // 2): first + SNIPPET_CHARS].strip()
+            sections[ref]["related"].append({
+                "doc_id": parsed["id"],
+                "file": parsed["filename"],
+                "court": parsed["court"],
+                "court_tier": parsed.get("court_tier", "unknown"),
+                "date": parsed["date"],
+                "year": parsed.get("year"),
+                "outcome": parsed.get("outcome", "unknown"),
+                "ipc_sections": parsed.get("ipc_sections", []),
+                "topics": parsed.get("topics", []),
+                "source_url": parsed.get("source_url", ""),
+                "mentions": len(positions),
+                "snippet": snippet,
+            })
+            linked += 1
+
+    for section in sections.values():
+        section["related"].sort(key=lambda r: (r["mentions"], r.get("year") or 0), reverse=True)
+        del section["related"][max_related:]
+    return linked
+
+
+def main() -> int:
+    args = parse_args()
+    if not os.path.isdir(args.raw_dir):
+        print(f"[ERR] No raw data directory: {args.raw_dir}")
+        return 1
+
+    names = [n for n in os.listdir(args.raw_dir) if n.endswith((".txt", ".pdf")) and not n.startswith(".")]
+    statute_files = [n for n in names if _is_statute_file(n)]
+    judgment_files = [n for n in names if not _is_statute_file(n)]
+    print(f"[INFO] statute files={len(statute_files)} | judgments={len(judgment_files)}")
+
+    sections = build_sections(args.raw_dir, statute_files)
+    linked = link_judgments(args.raw_dir, judgment_files, sections, args.max_related)
+
+    output = {
+        "built_at": datetime.now().isoformat(timespec="seconds"),
+        "acts": sorted({s["act"] for s in sections.values()}),
+        "sections": sections,
+    }
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    tmp_path = f"{args.output}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(output, f, ensure_ascii=False)
+    os.replace(tmp_path, args.output)
+
+    print(f"[DONE] {len(sections)} sections | {linked} judgment links → {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,111 @@
+"""
+Precompute short/medium/large summaries for every ingested document.
+
+Usage:
+    python backend/cronjobs/precompute_summaries.py [--sizes short,medium,large]
+        [--decoding-profile fast|balanced|quality] [--no-refine] [--force]
+
+Runs alongside process_and_upload over the same data/raw/ folder. Each
+document is parsed, summarized with the local seq2seq model through
+summarizer_service.summarize, and stored in the summary store keyed by its
+doc_id. /summarize then serves those documents with a lookup.
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+import time
+
+BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, BACKEND_DIR)
+
+from app.models.summarizer import resolve_decoding_profile  # noqa: E402
+from app.services import summarizer_service, summary_store  # noqa: E402
+from app.services.summarizer_service import SUMMARY_SIZE_CONFIG  # noqa: E402
+from app.utils.parser import parse_document  # noqa: E402
+
+DATA_RAW = os.path.join(BACKEND_DIR, "data", "raw")
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Precompute corpus summaries")
+    parser.add_argument("--raw-dir", default=DATA_RAW, help="Folder of ingested .pdf/.txt files")
+    parser.add_argument("--sizes", default="short,medium,large")
+    parser.add_argument("--model-id", default="casecut-legal")
+    parser.add_argument("--mode", default="lawyer")
+    parser.add_argument("--decoding-profile", default=None, help="Local decoding profile (default: by size)")
+    parser.add_argument("--no-refine", action="store_true", help="Store raw local-model output (no LLM refinement)")
+    parser.add_argument("--force", action="store_true", help="Regenerate summaries that already exist")
+    return parser.parse_args()
+
+
+def main() -> int:
+    args = parse_args()
+    sizes = [s.strip().lower() for s in args.sizes.split(",") if s.strip()]
+    unknown = [s for s in sizes if s not in SUMMARY_SIZE_CONFIG]
+    if unknown:
+        print(f"[ERR] Unknown size(s): {', '.join(unknown)} (expected {', '.join(SUMMARY_SIZE_CONFIG)})")
+        return 1
+
+    if not os.path.isdir(args.raw_dir):
+        print(f"[WARN] {args.raw_dir} not found - nothing to summarize.")
+        return 0
+
+    files = sorted(
+        f for f in os.listdir(args.raw_dir)
+        if f.endswith((".pdf", ".txt")) and not f.startswith(".")
+    )
+    print(f"[INFO] {len(files)} document(s) | sizes={sizes} | model={args.model_id} | mode={args.mode}")
+
+    stored = skipped = failed = 0
+    for idx, filename in enumerate(files, start=1):
+        parsed = parse_document(os.path.join(args.raw_dir, filename))
+        if parsed is None:
+            print(f"   [SKIP] {filename}: parser returned empty/short text")
+            continue
+
+        doc_id = parsed["id"]
+        for size in sizes:
+            profile = resolve_decoding_profile(args.decoding_profile, size)
+            if not args.force and summary_store.has(doc_id, size, args.model_id, args.mode, profile):
+                skipped += 1
+                continue
+
+            start = time.perf_counter()
+            try:
+                result = summarizer_service.summarize(
+                    text=parsed["full_text"],
+                    model_id=args.model_id,
+                    mode=args.mode,
+                    intent="summarize",
+                    summary_size=size,
+                    use_store=False,
+                    refine=not args.no_refine,
+                    decoding_profile=profile,
+                )
+            except Exception as e:
+                failed += 1
+                print(f"   [ERR] {filename} ({size}): {e}")
+                continue
+
+            if not result["provider"].startswith(("local-model", "local+llm")):
+                # Local model unavailable — don't persist pure-LLM output as "precomputed".
+                failed += 1
+                print(f"   [ERR] {filename} ({size}): local summarizer unavailable (provider={result['provider']})")
+                continue
+
+            summary_store.put(doc_id, result)
+            stored += 1
+            print(
+                f"   [OK] {filename} ({idx}/{len(files)}) | {size}/{profile} | doc_id={doc_id} | "
+                f"{len(result['summary'])} chars | {time.perf_counter() - start:.1f}s"
+            )
+
+    print(f"[DONE] stored={stored} | skipped(existing)={skipped} | failed={failed}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,215 @@
+"""
+Calibrate the feature-ranker weights from user feedback.
+
+Usage:
+    python backend/cronjobs/train_ranker_weights.py [--min-samples 30] [--prior 50]
+
+This script:
+1) Joins data/feedback.jsonl with data/retrieval_log.jsonl (plus its rotated
+   retrieval_log.<timestamp>.jsonl files) — on response_id
+   when the client sent one, otherwise on (role, query) to the latest
+   retrieval logged before the feedback.
+2) Fits a per-role logistic regression over the logged ranking features
+   (semantic, ipc_match, topic_match, court_authority, recency), with
+   thumbs up = 1 / thumbs down = 0 and higher-ranked cases weighted more.
+3) Converts the coefficients into non-negative weights summing to 1, shrunk
+   towards the hand-tuned defaults by sample count.
+4) Writes a versioned file under data/ranker_weights/ and atomically
+   replaces data/ranker_weights.json, which rank_cases loads at startup.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import sys
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(BACKEND_DIR))
+
+from app.core.prompts import ROLE_RETRIEVAL_BIAS  # noqa: E402
+from app.models.ranker import DEFAULT_WEIGHTS, FEATURE_KEYS, RANKER_WEIGHTS_PATH, default_role_weights  # noqa: E402
+
+DATA_DIR = BACKEND_DIR / "data"
+FEEDBACK_FILE = DATA_DIR / "feedback.jsonl"
+RETRIEVAL_LOG_FILE = DATA_DIR / "retrieval_log.jsonl"
+VERSIONS_DIR = DATA_DIR / "ranker_weights"
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Train per-role ranker weights from feedback")
+    parser.add_argument("--min-samples", type=int, default=30, help="Minimum labelled cases per role")
+    parser.add_argument("--prior", type=float, default=50.0, help="Shrinkage strength towards default weights")
+    parser.add_argument("--l2", type=float, default=0.01, help="L2 regularisation")
+    parser.add_argument("--epochs", type=int, default=500)
+    parser.add_argument("--dry-run", action="store_true", help="Print weights without writing files")
+    return parser.parse_args()
+
+
+def _read_jsonl(path: Path) -> list[dict]:
+    if not path.exists():
+        return []
+    rows = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                rows.append(json.loads(line))
+            except json.JSONDecodeError:
+                continue
+    return rows
+
+
+def join_feedback(feedback: list[dict], retrievals: list[dict]) -> list[tuple[dict, dict]]:
+    """Pair each feedback entry with the retrieval it rated."""
+    by_response_id = {r["response_id"]: r for r in retrievals if r.get("response_id")}
+    by_query: dict[tuple[str, str], list[dict]] = {}
+    for r in retrievals:
+        key = (r.get("role", ""), (r.get("query") or "").strip().lower())
+        by_query.setdefault(key, []).append(r)
+
+    joined = []
+    for fb in feedback:
+        if not fb.get("rating"):
+            continue
+        retrieval = by_response_id.get(fb.get("response_id") or "")
+        if retrieval is None:
+            key = (fb.get("role", ""), (fb.get("query") or "").strip().lower())
+            candidates = [
+                r for r in by_query.get(key, [])
+                if (r.get("timestamp") or "") <= (fb.get("timestamp") or "~")
+            ]
+            retrieval = candidates[-1] if candidates else None
+        if retrieval is not None:
+            joined.append((fb, retrieval))
+    return joined
+
+
+def build_dataset(joined: list[tuple[dict, dict]]) -> dict[str, tuple[np.ndarray, np.ndarray, np.ndarray]]:
+    """Per role: (features X, labels y, sample weights)."""
+    rows: dict[str, list[tuple[list[float], float, float]]] = {}
+    feature_names = list(FEATURE_KEYS.values())
+    for fb, retrieval in joined:
+        label = 1.0 if fb["rating"] > 0 else 0.0
+        role = retrieval.get("role") or fb.get("role") or "lawyer"
+        for case in retrieval.get("cases", []):
+            features = case.get("features") or {}
+            if not all(name in features for name in feature_names):
+                continue
+            x = [float(features[name]) for name in feature_names]
+            position_weight = 1.0 / (1.0 + case.get("rank", 0))
+            rows.setdefault(role, []).append((x, label, position_weight))
+
+    return {
+        role: (
+            np.array([r[0] for r in items], dtype=np.float64),
+            np.array([r[1] for r in items], dtype=np.float64),
+            np.array([r[2] for r in items], dtype=np.float64),
+        )
+        for role, items in rows.items()
+    }
+
+
+def fit_logistic(X: np.ndarray, y: np.ndarray, w: np.ndarray, l2: float, epochs: int) -> np.ndarray:
+    """Weighted logistic regression by full-batch gradient descent. Returns coefficients (no bias)."""
+    n, d = X.shape
+    coef = np.zeros(d)
+    bias = 0.0
+    lr = 0.5
+    w = w / w.sum()
+    for _ in range(epochs):
+        p = 1.0 / (1.0 + np.exp(-(X @ coef + bias)))
+        err = (p - y) * w
+        coef -= lr * (X.T @ err + l2 * coef)
+        bias -= lr * err.sum()
+    return coef
+
+
+def coefficients_to_weights(coef: np.ndarray, defaults: dict[str, float], n: int, prior: float) -> dict[str, float]:
+    """Clip to non-negative, normalise, then shrink towards defaults."""
+    positive = np.clip(coef, 0.0, None)
+    keys = list(FEATURE_KEYS)
+    if positive.sum() <= 0:
+        return dict(defaults)
+    learned = positive / positive.sum()
+    alpha = n / (n + prior)
+    blended = {k: alpha * float(learned[i]) + (1 - alpha) * defaults[k] for i, k in enumerate(keys)}
+    total = sum(blended.values())
+    return {k: round(v / total, 4) for k, v in blended.items()}
+
+
+def _next_version() -> int:
+    try:
+        with open(RANKER_WEIGHTS_PATH, "r", encoding="utf-8") as f:
+            return int(json.load(f).get("version", 0)) + 1
+    except Exception:
+        return 1
+
+
+def main() -> int:
+    args = parse_args()
+
+    feedback = _read_jsonl(FEEDBACK_FILE)
+    retrievals = [
+        row
+        for path in [*sorted(DATA_DIR.glob("retrieval_log.*.jsonl")), RETRIEVAL_LOG_FILE]
+        for row in _read_jsonl(path)
+    ]
+    joined = join_feedback(feedback, retrievals)
+    print(f"[INFO] feedback={len(feedback)} | retrievals={len(retrievals)} | joined={len(joined)}")
+
+    dataset = build_dataset(joined)
+    roles: dict[str, dict] = {}
+    stats: dict[str, dict] = {}
+    for role, (X, y, w) in sorted(dataset.items()):
+        n = len(y)
+        if n < args.min_samples or y.min() == y.max():
+            print(f"   [SKIP] {role}: {n} samples (need {args.min_samples} with both labels)")
+            continue
+        # Shrink towards the hand-tuned prior, never the previous fit (that would compound).
+        defaults = default_role_weights(ROLE_RETRIEVAL_BIAS.get(role, {}).get("court_weight_boost", 0.0))
+        coef = fit_logistic(X, y, w, args.l2, args.epochs)
+        roles[role] = coefficients_to_weights(coef, defaults, n, args.prior)
+        stats[role] = {"samples": n, "positive_rate": round(float(y.mean()), 3)}
+        print(f"   [OK] {role}: n={n} | weights={roles[role]}")
+
+    if not roles:
+        print("[DONE] Not enough feedback to calibrate any role; weights unchanged.")
+        return 0
+
+    version = _next_version()
+    output = {
+        "version": version,
+        "trained_at": datetime.now().isoformat(),
+        "method": "weighted_logistic",
+        "default_weights": DEFAULT_WEIGHTS,
+        "roles": roles,
+        "stats": stats,
+    }
+
+    if args.dry_run:
+        print(json.dumps(output, indent=2))
+        return 0
+
+    VERSIONS_DIR.mkdir(parents=True, exist_ok=True)
+    versioned_path = VERSIONS_DIR / f"ranker_weights_v{version}.json"
+    versioned_path.write_text(json.dumps(output, indent=2), encoding="utf-8")
+
+    tmp_path = f"{RANKER_WEIGHTS_PATH}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(output, f, indent=2)
+    os.replace(tmp_path, RANKER_WEIGHTS_PATH)
+
+    print(f"[DONE] Wrote {versioned_path.name} and activated v{version} (restart API to load).")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -40,5 +40,9 @@ echo ""
 echo "▶ Step 3: Re-indexing into Qdrant..."
 python cronjobs/update_index.py
 
+echo ""
+echo "▶ Step 4: Precomputing summaries for new documents..."
+python cronjobs/precompute_summaries.py
+
 echo ""
 echo "✅ Case update completed at $(date)"
@@ -1,11 +1,20 @@
-"""Upload processed case JSON files to Qdrant using a stronger embedding model.
+"""Upload processed cases to Qdrant using a stronger embedding model.
 
 Behavior:
-- Reads case metadata JSON files from data/processed/
+- Reads case metadata from the Parquet case store (app/utils/case_store.py),
+  falling back to legacy case_*.json files in data/processed/
 - Builds one semantic embedding per case
-- Processes 10 case files at a time
-- Upserts each 10-case batch to Qdrant
-- Skips cases already present (by case_id) for safe reruns
+- Groups cases into batches by token length (similar lengths together, capped
+  by PROCESSED_BATCH_TOKENS of padded tokens and PROCESSED_DOC_BATCH_SIZE cases)
+- Embeds on the main thread while a background thread upserts finished
+  batches (bounded queue, so embedding never runs far ahead of uploads)
+- Records each uploaded batch as one appended (fsynced) line of a JSONL
+  checkpoint; a rerun skips checkpointed cases instead of scrolling the
+  whole collection
+- Reports progress and throughput in docs/sec
+- New collections store a PROCESSED_MRL_DIM-dim Matryoshka prefix vector
+  (first-pass ANN, in RAM) next to the full vector (rescoring, on disk);
+  PROCESSED_MRL_DIM=0 keeps a single full vector
 """
 
 from __future__ import annotations
@@ -14,14 +23,25 @@ import hashlib
 import json
 import logging
 import os
+import queue
+import sys
+import threading
+import time
 import warnings
 from pathlib import Path
 
 from dotenv import dotenv_values
 from qdrant_client import QdrantClient
-from qdrant_client.models import Distance, PayloadSchemaType, PointStruct, VectorParams
+from qdrant_client.models import PayloadSchemaType, PointStruct
 from sentence_transformers import SentenceTransformer
 
+# Ensure the backend root is on the path so app imports resolve.
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from app.core import index_registry  # noqa: E402
+from app.utils import case_store  # noqa: E402
+from app.utils.parser import normalized_fields  # noqa: E402
+
 warnings.filterwarnings("ignore", category=FutureWarning, module=r"google\.api_core\._python_version_support")
 
 logging.basicConfig(
@@ -36,9 +56,19 @@ PROCESSED_DIR = BASE_DIR / "data" / "processed"
 
 EMBED_MODEL = os.getenv("PROCESSED_EMBED_MODEL", "Qwen/Qwen3-Embedding-0.6B")
 TARGET_COLLECTION = os.getenv("PROCESSED_QDRANT_COLLECTION", "legal_cases_sota_processed")
-DOC_BATCH_SIZE = int(os.getenv("PROCESSED_DOC_BATCH_SIZE", "10"))
+DOC_BATCH_SIZE = int(os.getenv("PROCESSED_DOC_BATCH_SIZE", "32"))
 EMBED_BATCH_SIZE = int(os.getenv("PROCESSED_EMBED_BATCH_SIZE", "16"))
 MAX_FACTS_CHARS = int(os.getenv("PROCESSED_MAX_FACTS_CHARS", "500"))
+# Qwen3-Embedding is Matryoshka-trained: its first 256 dims stand alone.
+MRL_DIM = int(os.getenv("PROCESSED_MRL_DIM", "256"))
+# Padded-token budget per batch: cases x longest case in the batch.
+BATCH_TOKEN_BUDGET = int(os.getenv("PROCESSED_BATCH_TOKENS", "8192"))
+UPLOAD_QUEUE_SIZE = max(1, int(os.getenv("PROCESSED_UPLOAD_QUEUE", "2")))
+UPLOAD_RETRIES = max(1, int(os.getenv("PROCESSED_UPLOAD_RETRIES", "3")))
+# JSONL: a {"collection", "model"} header line, then one {"batch", "case_ids"} line per upload.
+CHECKPOINT_PATH = Path(os.getenv("PROCESSED_CHECKPOINT", str(PROCESSED_DIR / "upload_checkpoint.jsonl")))
+# Set PROCESSED_RESCAN=1 to ignore the checkpoint and scroll the collection.
+FORCE_RESCAN = os.getenv("PROCESSED_RESCAN", "0") == "1"
 
 
 def _get_qdrant_client() -> QdrantClient:
@@ -59,16 +89,22 @@ def _load_model(model_id: str) -> SentenceTransformer:
         return SentenceTransformer(model_id)
 
 
-def _ensure_collection(client: QdrantClient, collection: str, vector_size: int) -> None:
+def _ensure_collection(client: QdrantClient, collection: str, vector_size: int) -> int:
+    """Create the collection if needed; returns its mrl_dim (0 = single vector)."""
     collections = {c.name for c in client.get_collections().collections}
     if collection not in collections:
+        mrl_dim = MRL_DIM if 0 < MRL_DIM < vector_size else 0
         client.create_collection(
             collection_name=collection,
-            vectors_config=VectorParams(size=vector_size, distance=Distance.COSINE),
+            vectors_config=index_registry.vectors_config(vector_size, mrl_dim),
         )
-        logger.info("Created collection '%s' (dim=%d)", collection, vector_size)
+        logger.info("Created collection '%s' (dim=%d, mrl_dim=%d)", collection, vector_size, mrl_dim)
 
-    for field in ["source_type", "case_id", "filename", "court", "topics", "ipc_sections", "outcome"]:
+    mrl_dim = index_registry.mrl_dim_of(client, collection)
+    if 0 < MRL_DIM < vector_size and not mrl_dim:
+        logger.warning("Collection '%s' has a single vector; recreate it to use PROCESSED_MRL_DIM", collection)
+
+    for field in ["source_type", "case_id", "filename", "court", "court_tier", "topics", "ipc_sections", "section_ids", "outcome"]:
         try:
             client.create_payload_index(
                 collection_name=collection,
@@ -78,6 +114,22 @@ def _ensure_collection(client: QdrantClient, collection: str, vector_size: int)
         except Exception:
             pass
 
+    for field, schema in [
+        ("year", PayloadSchemaType.INTEGER),
+        ("date_epoch_days", PayloadSchemaType.INTEGER),
+        ("date_iso", PayloadSchemaType.DATETIME),
+    ]:
+        try:
+            client.create_payload_index(
+                collection_name=collection,
+                field_name=field,
+                field_schema=schema,
+            )
+        except Exception:
+            pass
+
+    return mrl_dim
+
 
 def _get_existing_case_ids(client: QdrantClient, collection: str) -> set[str]:
     existing: set[str] = set()
@@ -132,13 +184,205 @@ def _point_id(case_id: str, model_id: str) -> int:
     return int(digest, 16) % (2**63)
 
 
-def _iter_batches(items: list[Path], size: int):
-    for i in range(0, len(items), size):
-        yield items[i : i + size]
+def _load_pending_cases(existing_case_ids: set[str]) -> tuple[int, list[dict]]:
+    """Return (total cases, cases not yet in the collection) in one sequential read."""
+    if case_store.exists():
+        total = 0
+        pending = []
+        for case in case_store.iter_cases():
+            total += 1
+            if case["id"] and case["id"] not in existing_case_ids:
+                pending.append(case)
+        return total, pending
+
+    # Legacy layout: one JSON file per case.
+    files = sorted(PROCESSED_DIR.glob("case_*.json"))
+    pending = []
+    for path in files:
+        try:
+            case = json.loads(path.read_text(encoding="utf-8"))
+        except Exception as e:
+            logger.warning("[SKIP] %s parse error: %s", path.name, e)
+            continue
+        case_id = str(case.get("id", "")).strip()
+        if case_id and case_id not in existing_case_ids:
+            pending.append(case)
+    return len(files), pending
+
+
+def _load_checkpoint() -> dict:
+    empty = {"collection": TARGET_COLLECTION, "model": EMBED_MODEL, "batches": {}}
+    if FORCE_RESCAN or not CHECKPOINT_PATH.exists():
+        return empty
+    try:
+        lines = CHECKPOINT_PATH.read_text(encoding="utf-8").splitlines()
+        header = json.loads(lines[0])
+    except Exception as e:
+        logger.warning("Ignoring unreadable checkpoint %s: %s", CHECKPOINT_PATH, e)
+        return empty
+    if header.get("collection") != TARGET_COLLECTION or header.get("model") != EMBED_MODEL:
+        logger.info("Checkpoint is for %s/%s; starting fresh", header.get("collection"), header.get("model"))
+        return empty
+    batches = {}
+    for line in lines[1:]:
+        try:
+            record = json.loads(line)
+        except ValueError:
+            continue  # torn final line from a crash mid-append; that batch is redone
+        batches[record["batch"]] = record["case_ids"]
+    return {**empty, "batches": batches}
+
+
+def _reset_checkpoint(batches: dict) -> None:
+    """Start a new checkpoint (header + batches); write-then-rename so a crash never truncates it."""
+    CHECKPOINT_PATH.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = CHECKPOINT_PATH.with_name(CHECKPOINT_PATH.name + ".tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(json.dumps({"collection": TARGET_COLLECTION, "model": EMBED_MODEL}) + "\n")
+        for batch_id, case_ids in batches.items():
+            f.write(json.dumps({"batch": batch_id, "case_ids": case_ids}) + "\n")
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, CHECKPOINT_PATH)
+
+
+def _append_checkpoint(batch_id: str, case_ids: list[str]) -> None:
+    """Record one uploaded batch: O(batch) per call, durable once this returns."""
+    with open(CHECKPOINT_PATH, "a", encoding="utf-8") as f:
+        f.write(json.dumps({"batch": batch_id, "case_ids": case_ids}) + "\n")
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def _checkpointed_case_ids(checkpoint: dict) -> set[str]:
+    return {case_id for case_ids in checkpoint["batches"].values() for case_id in case_ids}
+
+
+def _token_lengths(model: SentenceTransformer, texts: list[str]) -> list[int]:
+    """Tokens per text as the model will see them (truncated to max_seq_length)."""
+    limit = getattr(model, "max_seq_length", None) or 10**9
+    tokenizer = getattr(model, "tokenizer", None)
+    try:
+        lengths = [len(ids) for ids in tokenizer(texts, add_special_tokens=True)["input_ids"]]
+    except Exception:
+        lengths = [len(text) // 4 + 1 for text in texts]
+    return [min(length, limit) for length in lengths]
+
+
+def _plan_batches(lengths: list[int]) -> list[list[int]]:
+    """
+    Group indices into batches of similar token length.
+
+    Sorting by length keeps padding low; a batch closes when adding the next
+    case would push cases x longest over BATCH_TOKEN_BUDGET, so short cases
+    travel in large batches and long ones in small batches.
+    """
+    batches: list[list[int]] = []
+    current: list[int] = []
+    longest = 0
+    for idx in sorted(range(len(lengths)), key=lengths.__getitem__):
+        longest_next = max(longest, lengths[idx])
+        if current and (len(current) >= DOC_BATCH_SIZE or longest_next * (len(current) + 1) > BATCH_TOKEN_BUDGET):
+            batches.append(current)
+            current, longest_next = [], lengths[idx]
+        current.append(idx)
+        longest = longest_next
+    if current:
+        batches.append(current)
+    return batches
+
+
+def _batch_id(case_ids: list[str]) -> str:
+    return hashlib.sha1("|".join(case_ids).encode("utf-8")).hexdigest()[:16]
+
+
+def _case_payload(case: dict, case_id: str) -> dict:
+    return {
+        "source_type": "processed_json",  # kept for existing payload filters
+        "case_id": case_id,
+        "filename": case.get("filename", ""),
+        "court": case.get("court", "Unknown"),
+        "date": case.get("date", ""),
+        # Older processed JSON files predate the normalized fields.
+        **normalized_fields(case.get("court", "Unknown"), case.get("date", "")),
+        "ipc_sections": case.get("ipc_sections", []),
+        "section_ids": case.get("section_ids") or [],
+        "topics": case.get("topics", []),
+        "outcome": case.get("outcome", "unknown"),
+        "facts": (case.get("facts") or "")[:MAX_FACTS_CHARS],
+        "page_count": case.get("page_count", 0),
+        "text_length": case.get("text_length", 0),
+        "source_url": case.get("source_url", ""),
+        "embed_model": EMBED_MODEL,
+    }
+
+
+class _Uploader(threading.Thread):
+    """Consumes (batch_id, case_ids, points) jobs: upsert, then checkpoint."""
+
+    def __init__(self, client: QdrantClient, checkpoint: dict, total: int):
+        super().__init__(name="qdrant-upload", daemon=True)
+        self.client = client
+        self.checkpoint = checkpoint
+        self.total = total
+        self.jobs: queue.Queue = queue.Queue(maxsize=UPLOAD_QUEUE_SIZE)
+        self.uploaded = 0
+        self.failed = 0
+        self.batches = 0
+        self.started_at = time.perf_counter()
+
+    def put(self, job) -> None:
+        # Block while the queue is full, but never hang on a dead consumer.
+        while True:
+            try:
+                self.jobs.put(job, timeout=1.0)
+                return
+            except queue.Full:
+                if not self.is_alive():
+                    raise RuntimeError("Upload thread stopped unexpectedly")
+
+    def docs_per_sec(self) -> float:
+        elapsed = time.perf_counter() - self.started_at
+        return self.uploaded / elapsed if elapsed > 0 else 0.0
+
+    def run(self) -> None:
+        while True:
+            job = self.jobs.get()
+            if job is None:
+                return
+            batch_id, case_ids, points = job
+            for attempt in range(1, UPLOAD_RETRIES + 1):
+                try:
+                    self.client.upsert(collection_name=TARGET_COLLECTION, points=points, wait=True)
+                    break
+                except Exception as e:
+                    if attempt == UPLOAD_RETRIES:
+                        # Not checkpointed, so the next run retries this batch.
+                        logger.error("[BATCH %s] upload failed after %d attempts: %s", batch_id, attempt, e)
+                        self.failed += len(points)
+                        points = None
+                        break
+                    logger.warning("[BATCH %s] upload attempt %d failed: %s (retrying)", batch_id, attempt, e)
+                    time.sleep(2**attempt)
+            if points is None:
+                continue
+
+            self.checkpoint["batches"][batch_id] = case_ids
+            _append_checkpoint(batch_id, case_ids)
+            self.uploaded += len(points)
+            self.batches += 1
+            logger.info(
+                "[BATCH %d] Uploaded %d cases | %d/%d | %.1f docs/s",
+                self.batches,
+                len(points),
+                self.uploaded,
+                self.total,
+                self.docs_per_sec(),
+            )
 
 
 def run() -> dict:
-    if not PROCESSED_DIR.exists():
+    if not PROCESSED_DIR.exists() and not case_store.exists():
         raise RuntimeError(f"Processed directory not found: {PROCESSED_DIR}")
 
     client = _get_qdrant_client()
@@ -148,114 +392,97 @@ def run() -> dict:
     vector_dim = len(probe_vec[0])
     logger.info("Embedding dimension: %d", vector_dim)
 
-    _ensure_collection(client, TARGET_COLLECTION, vector_dim)
-
-    existing_case_ids = _get_existing_case_ids(client, TARGET_COLLECTION)
-    logger.info("Existing cases in target collection: %d", len(existing_case_ids))
+    mrl_dim = _ensure_collection(client, TARGET_COLLECTION, vector_dim)
+
+    checkpoint = _load_checkpoint()
+    resumed = bool(checkpoint["batches"])
+    if resumed and client.count(collection_name=TARGET_COLLECTION, exact=True).count == 0:
+        logger.info("Checkpoint found but collection is empty; starting fresh")
+        checkpoint["batches"], resumed = {}, False
+
+    if resumed:
+        existing_case_ids = _checkpointed_case_ids(checkpoint)
+        logger.info("Resuming from checkpoint: %d cases already uploaded", len(existing_case_ids))
+    else:
+        existing_case_ids = _get_existing_case_ids(client, TARGET_COLLECTION)
+        logger.info("Existing cases in target collection: %d", len(existing_case_ids))
+        if existing_case_ids:
+            # Seed the checkpoint so later runs do not need to scroll again.
+            checkpoint["batches"]["collection-scan"] = sorted(existing_case_ids)
+    # Rewritten once per run (drops a torn last line); batches are then appended.
+    _reset_checkpoint(checkpoint["batches"])
+
+    total_files, to_process = _load_pending_cases(existing_case_ids)
+    source = "case store" if case_store.exists() else "json files"
+
+    logger.info(
+        "Processed cases (%s) total=%d | pending=%d | skipped(existing)=%d",
+        source, total_files, len(to_process), total_files - len(to_process),
+    )
 
-    files = sorted(PROCESSED_DIR.glob("*.json"))
-    total_files = len(files)
-    to_process = []
-
-    for path in files:
-        try:
-            data = json.loads(path.read_text(encoding="utf-8"))
-        except Exception:
-            continue
-        case_id = str(data.get("id", "")).strip()
-        if not case_id:
-            continue
-        if case_id in existing_case_ids:
+    failed_cases = 0
+    cases, texts = [], []
+    for case in to_process:
+        case_text = _build_case_text(case)
+        if not case_text:
+            failed_cases += 1
             continue
-        to_process.append(path)
-
-    logger.info("Processed files total=%d | pending=%d | skipped(existing)=%d", total_files, len(to_process), total_files - len(to_process))
+        cases.append(case)
+        texts.append(case_text)
 
-    uploaded_points = 0
-    uploaded_cases = 0
-    failed_cases = 0
+    encode_kwargs = {"batch_size": EMBED_BATCH_SIZE, "show_progress_bar": False}
+    try:
+        prompts = getattr(model, "prompts", {}) or {}
+        if isinstance(prompts, dict):
+            if "document" in prompts:
+                encode_kwargs["prompt_name"] = "document"
+            elif "passage" in prompts:
+                encode_kwargs["prompt_name"] = "passage"
+    except Exception:
+        pass
 
-    for batch_index, batch_files in enumerate(_iter_batches(to_process, DOC_BATCH_SIZE), start=1):
-        batch_cases = []
-        texts = []
+    batches = _plan_batches(_token_lengths(model, texts))
+    logger.info("Planned %d batches (<=%d cases, <=%d padded tokens each)", len(batches), DOC_BATCH_SIZE, BATCH_TOKEN_BUDGET)
 
-        for path in batch_files:
-            try:
-                case = json.loads(path.read_text(encoding="utf-8"))
-                case_id = str(case.get("id", "")).strip()
-                if not case_id:
-                    failed_cases += 1
-                    continue
-                case_text = _build_case_text(case)
-                if not case_text:
-                    failed_cases += 1
-                    continue
-                batch_cases.append(case)
-                texts.append(case_text)
-            except Exception as e:
-                failed_cases += 1
-                logger.warning("[SKIP] %s parse error: %s", path.name, e)
-
-        if not batch_cases:
-            continue
+    uploader = _Uploader(client, checkpoint, total=len(cases))
+    uploader.start()
+    embed_seconds = 0.0
+    try:
+        for batch in batches:
+            batch_cases = [cases[i] for i in batch]
+            case_ids = [str(case.get("id", "")).strip() for case in batch_cases]
 
-        encode_kwargs = {"batch_size": EMBED_BATCH_SIZE, "show_progress_bar": False}
-        try:
-            prompts = getattr(model, "prompts", {}) or {}
-            if isinstance(prompts, dict):
-                if "document" in prompts:
-                    encode_kwargs["prompt_name"] = "document"
-                elif "passage" in prompts:
-                    encode_kwargs["prompt_name"] = "passage"
-        except Exception:
-            pass
+            started = time.perf_counter()
+            vectors = model.encode([texts[i] for i in batch], **encode_kwargs)
+            embed_seconds += time.perf_counter() - started
 
-        vectors = model.encode(texts, **encode_kwargs)
-
-        points: list[PointStruct] = []
-        for case, vector in zip(batch_cases, vectors):
-            case_id = str(case.get("id", "")).strip()
-            payload = {
-                "source_type": "processed_json",
-                "case_id": case_id,
-                "filename": case.get("filename", ""),
-                "court": case.get("court", "Unknown"),
-                "date": case.get("date", ""),
-                "ipc_sections": case.get("ipc_sections", []),
-                "topics": case.get("topics", []),
-                "outcome": case.get("outcome", "unknown"),
-                "facts": (case.get("facts") or "")[:MAX_FACTS_CHARS],
-                "page_count": case.get("page_count", 0),
-                "text_length": case.get("text_length", 0),
-                "source_url": case.get("source_url", ""),
-                "embed_model": EMBED_MODEL,
-            }
-            points.append(
+            points = [
                 PointStruct(
                     id=_point_id(case_id, EMBED_MODEL),
-                    vector=vector.tolist(),
-                    payload=payload,
+                    vector=index_registry.point_vector(vector, mrl_dim),
+                    payload=_case_payload(case, case_id),
                 )
-            )
-
-        client.upsert(collection_name=TARGET_COLLECTION, points=points)
-        uploaded_points += len(points)
-        uploaded_cases += len(points)
-        logger.info(
-            "[BATCH %d] Uploaded %d cases (running total=%d)",
-            batch_index,
-            len(points),
-            uploaded_cases,
-        )
-
+                for case, case_id, vector in zip(batch_cases, case_ids, vectors)
+            ]
+            uploader.put((_batch_id(case_ids), case_ids, points))
+    finally:
+        if uploader.is_alive():
+            uploader.put(None)
+        uploader.join()
+
+    elapsed = time.perf_counter() - uploader.started_at
     total_points = client.count(collection_name=TARGET_COLLECTION, exact=True).count
     summary = {
         "collection": TARGET_COLLECTION,
         "model": EMBED_MODEL,
         "total_processed_files": total_files,
-        "new_cases_uploaded": uploaded_cases,
-        "new_points_uploaded": uploaded_points,
-        "failed_cases": failed_cases,
+        "resumed_from_checkpoint": resumed,
+        "batches": uploader.batches,
+        "new_cases_uploaded": uploader.uploaded,
+        "new_points_uploaded": uploader.uploaded,
+        "failed_cases": failed_cases + uploader.failed,
+        "embed_docs_per_sec": round(len(cases) / embed_seconds, 2) if embed_seconds else 0.0,
+        "docs_per_sec": round(uploader.uploaded / elapsed, 2) if elapsed else 0.0,
         "collection_points_after_run": total_points,
     }
     logger.info("SUMMARY %s", summary)
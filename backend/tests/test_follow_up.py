@@ -0,0 +1,35 @@
+"""Follow-up detection for server-side sessions (rag_service._is_follow_up)."""
+
+import pytest
+
+pytest.importorskip("sentence_transformers")  # rag_service loads the embedder via app.core.config
+
+from app.services.rag_service import _is_follow_up  # noqa: E402
+
+
+@pytest.mark.parametrize(
+    "query, expected",
+    [
+        # Continue the previous answer from the same cases.
+        ("explain more", True),
+        ("why?", True),
+        ("simplify the second case", True),
+        ("tell me more about the first case", True),
+        ("can you elaborate on that judgment", True),
+        ("give me an example", True),
+        ("explain it in simple words", True),
+        # Ask for additional or different results: search again.
+        ("more cases", False),
+        ("give me more cases", False),
+        ("show me more judgments", False),
+        ("any similar cases", False),
+        ("give me another example", False),
+        ("other relevant judgments please", False),
+        # Name something new.
+        ("what about section 438", False),
+        ("bail for murder accused", False),
+        ("", False),
+    ],
+)
+def test_is_follow_up(query, expected):
+    assert _is_follow_up(query) is expected
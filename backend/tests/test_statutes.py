@@ -0,0 +1,112 @@
+"""Statute reference extraction and 2023-code mapping (app/utils/statutes.py)."""
+
+import pytest
+
+from app.utils.statutes import (
+    SECTION_EQUIVALENTS,
+    canonical_ids,
+    canonical_section_ids,
+    find_statute_refs,
+)
+
+FILLER = "The appellant was heard at length. " * 150
+
+
+def _ids(text: str, subsections: bool = False) -> set[str]:
+    return {ref for _, _, ref in find_statute_refs(text, subsections=subsections)}
+
+
+@pytest.mark.parametrize(
+    "text, expected",
+    [
+        ("Section 438 CrPC", {"CRPC:438"}),
+        ("u/s 302/34 IPC", {"IPC:302", "IPC:34"}),
+        ("accused under sections 302 read with 34 IPC", {"IPC:302", "IPC:34"}),
+        ("Sections 302 and 34 of the Indian Penal Code", {"IPC:302", "IPC:34"}),
+        ("IPC section 302", {"IPC:302"}),
+        ("Indian Penal Code, Section 302", {"IPC:302"}),
+        ("Section 302, IPC, 1860", {"IPC:302"}),
+        ("s. 65B of the Evidence Act", {"IEA:65B"}),
+        ("Art. 21 of the Constitution", {"CONST:21"}),
+        ("under Section 420 IPC and Section 438 CrPC", {"IPC:420", "CRPC:438"}),
+        # No act named: ambiguous, left to the ranker.
+        ("section 438", set()),
+        # Act-qualified patterns only run around act names; the window must
+        # still catch references deep inside a long judgment...
+        (FILLER + "convicted under Section 420 IPC. " + FILLER, {"IPC:420"}),
+        (FILLER + "IPC section 302 " + FILLER, {"IPC:302"}),
+        # ...but not join a number to an act name far away from it.
+        ("section 302 " + FILLER + " IPC", set()),
+        ("IPC " + "y" * 170 + " section 302", set()),
+    ],
+)
+def test_find_statute_refs(text, expected):
+    assert _ids(text) == expected
+
+
+@pytest.mark.parametrize(
+    "text, subsections, expected",
+    [
+        ("Section 103(1) BNS", True, {"BNS:103(1)"}),
+        ("Section 103(1) BNS", False, {"BNS:103"}),
+        ("318(4) BNS", True, {"BNS:318(4)"}),
+        ("318(4) BNS", False, {"BNS:318"}),
+    ],
+)
+def test_find_statute_refs_subsections(text, subsections, expected):
+    assert _ids(text, subsections=subsections) == expected
+
+
+def test_find_statute_refs_positions_are_sorted():
+    text = "Section 438 CrPC read with Section 420 IPC"
+    refs = find_statute_refs(text)
+    assert refs == sorted(refs)
+    assert all(0 <= start < end <= len(text) for start, end, _ in refs)
+
+
+@pytest.mark.parametrize(
+    "ref, expected",
+    [
+        ("BNS:103(1)", ["IPC:302"]),
+        ("BNS:103", ["IPC:302"]),
+        ("BNS:318(4)", ["IPC:420"]),
+        # A merged section without sub-section maps to every section it replaced.
+        ("BNS:318", ["IPC:415", "IPC:417", "IPC:418", "IPC:420"]),
+        ("BNSS:482", ["CRPC:438"]),
+        ("BSA:63", ["IEA:65B"]),
+        ("IPC:302(2)", ["IPC:302"]),
+        ("CONST:21", ["CONST:21"]),
+        # Unmapped new-code sections are kept as they are.
+        ("BNS:999", ["BNS:999"]),
+    ],
+)
+def test_canonical_ids(ref, expected):
+    assert canonical_ids(ref) == expected
+
+
+@pytest.mark.parametrize(
+    "text, expected",
+    [
+        ("murder under 103 BNS", ["IPC:302"]),
+        ("Section 302 IPC", ["IPC:302"]),
+        ("anticipatory bail u/s 482 BNSS", ["CRPC:438"]),
+        ("Section 420 IPC and Section 438 CrPC", ["IPC:420", "CRPC:438"]),
+        ("section 438", []),
+    ],
+)
+def test_canonical_section_ids(text, expected):
+    assert canonical_section_ids(text) == expected
+
+
+@pytest.mark.parametrize(
+    "old_act, new_act, old, new",
+    [
+        (old_act, new_act, old, new)
+        for old_act, (new_act, table) in SECTION_EQUIVALENTS.items()
+        for old, new in table.items()
+    ],
+)
+def test_section_equivalents_map_back(old_act, new_act, old, new):
+    assert f"{old_act}:{old}" in canonical_ids(f"{new_act}:{new}")
+    # The sub-section-free form maps back too (possibly with merged siblings).
+    assert f"{old_act}:{old}" in canonical_ids(f"{new_act}:{new.split('(', 1)[0]}")